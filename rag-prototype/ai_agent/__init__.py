@@ -10,4 +10,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from . import agent
+import importlib
+
+
+def __getattr__(name):
+    # The agent (and its corpus settings) is only built when asked for, so
+    # `import ai_agent.retrieval` and the like work without any configuration.
+    # ADK and deploy.py load `ai_agent.agent` directly.
+    if name == "agent":
+        return importlib.import_module(f"{__name__}.agent")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
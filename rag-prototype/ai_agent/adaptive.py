@@ -0,0 +1,68 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Adaptive top-k: trims an over-fetched chunk list using its score distribution.
+
+Retrieval over-fetches, then the list is cut where relevance drops off:
+chunks far below the best score are dropped, the list is cut at the largest
+score gap, and what remains is capped by a token budget.
+"""
+
+from .retrieval import RetrievedChunk, estimate_tokens
+
+
+class AdaptiveCutoff:
+    """Post-processor `(query, chunks) -> chunks` for CorpusRetrievalTool."""
+
+    def __init__(
+        self,
+        min_keep: int = 1,
+        max_keep: int = 10,
+        min_relative_score: float = 0.8,
+        min_gap: float = 0.05,
+        token_budget: int = 2000,
+    ):
+        self.min_keep = min_keep
+        self.max_keep = max_keep
+        # Keep chunks scoring at least this fraction of the best chunk's score
+        self.min_relative_score = min_relative_score
+        # Only cut at a gap when it is at least this large (in similarity)
+        self.min_gap = min_gap
+        self.token_budget = token_budget
+
+    def __call__(self, query: str, chunks: list[RetrievedChunk]) -> list[RetrievedChunk]:
+        if len(chunks) <= self.min_keep:
+            return chunks
+        # Similarity from cosine distance; retrievers return chunks closest first
+        scores = [1.0 - chunk.distance for chunk in chunks[:self.max_keep]]
+
+        keep = len(scores)
+        best = scores[0]
+        if best > 0:
+            keep = max(self.min_keep, sum(score >= best * self.min_relative_score for score in scores))
+
+        # Largest drop between neighbours, ignoring the first min_keep positions
+        gaps = [(scores[i - 1] - scores[i], i) for i in range(self.min_keep, keep)]
+        if gaps:
+            gap, position = max(gaps)
+            if gap >= self.min_gap:
+                keep = position
+
+        selected = []
+        used_tokens = 0
+        for chunk in chunks[:keep]:
+            tokens = estimate_tokens(chunk.text)
+            if len(selected) >= self.min_keep and used_tokens + tokens > self.token_budget:
+                break
+            selected.append(chunk)
+            used_tokens += tokens
+        return selected
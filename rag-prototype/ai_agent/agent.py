@@ -13,39 +13,155 @@
 import os
 
 from google.adk.agents import Agent
-from google.adk.tools.retrieval.vertex_ai_rag_retrieval import VertexAiRagRetrieval
-from vertexai.preview import rag
 
-from dotenv import load_dotenv
-from .prompts import return_instructions_root
+from .adaptive import AdaptiveCutoff
+from .compression import ContextCompressor
+from .context_cache import StaticPrefixCache
+from .fanout import FanoutRetriever, load_corpus_config, shards_generation
+from .history import HistoryWindow
+from .local_index import LocalVectorIndex, local_retriever
+from .prompts import active_prompt_version, prompt_fingerprint, return_instructions_root
+from .retrieval import vertex_retriever
+from .retrieval_cache import CorpusGeneration, RetrievalCache, vertex_corpus_generation
+from .retrieval_tool import CorpusRetrievalTool
+from .router import IntentRouter
+from .router_callbacks import RoutingCallbacks
+from .token_budget import TokenAccounting
 
-load_dotenv()
+# Local runs read the project's .env. On Agent Engine there is no .env:
+# deploy.py passes the settings as environment variables, so python-dotenv
+# is neither imported nor installed there.
+_ENV_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".env")
+if os.path.exists(_ENV_FILE):
+    from dotenv import load_dotenv
 
-ask_vertex_retrieval = VertexAiRagRetrieval(
+    load_dotenv(_ENV_FILE)
+
+# Corpora come from configuration, not source edits: RAG_CORPORA lists several
+# corpora (shards, see ai_agent/fanout.py), otherwise RAG_CORPUS is used.
+# e.g. projects/123/locations/us-central1/ragCorpora/456
+# The cloud environment cannot read your local .env file; deploy.py passes
+# these variables to Agent Engine at deploy time.
+CORPUS_SHARDS = load_corpus_config()
+RAG_CORPORA = [shard.corpus for shard in CORPUS_SHARDS]
+
+# "vertex" queries the RAG Engine corpora; "local" searches an in-process
+# snapshot built by data-load-to-corpus/build_local_index.py (offline
+# development, or a low-latency path for hot documents).
+RETRIEVAL_BACKEND = os.getenv("RAG_RETRIEVAL_BACKEND", "vertex")
+
+if RETRIEVAL_BACKEND == "local":
+    local_index = LocalVectorIndex(os.getenv(
+        "RAG_LOCAL_INDEX_PATH",
+        os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "local_index"),
+    ))
+    retriever = local_retriever(local_index)
+    corpus_id = f"local:{local_index.path}"
+    # Row count: picks up chunks appended by a later build_local_index.py run
+    generation = CorpusGeneration(local_index.refresh)
+elif not CORPUS_SHARDS:
+    # Importing the agent stays possible without a corpus (adk web, tests);
+    # the first retrieval explains what is missing
+    def retriever(query, top_k, threshold):
+        raise RuntimeError(
+            "No RAG corpus configured: set RAG_CORPUS or RAG_CORPORA (see .env.example), "
+            "or RAG_RETRIEVAL_BACKEND=local"
+        )
+
+    corpus_id = ""
+    generation = None
+else:
+    # Shards are queried concurrently and merged into one ranking
+    retriever = FanoutRetriever(
+        CORPUS_SHARDS,
+        vertex_retriever,
+        timeout_seconds=float(os.getenv("RAG_SHARD_TIMEOUT_SECONDS", "5")),
+        merge=os.getenv("RAG_SHARD_MERGE", "distance"),
+    )
+    corpus_id = ",".join(RAG_CORPORA)
+    generation = CorpusGeneration(shards_generation([vertex_corpus_generation(corpus) for corpus in RAG_CORPORA]))
+
+# "adaptive" over-fetches and trims the chunk list by score distribution and
+# token budget; "fixed" always sends up to SIMILARITY_TOP_K chunks.
+RETRIEVAL_MODE = os.getenv("RAG_RETRIEVAL_MODE", "adaptive")
+# Drops near-duplicate chunks, diversifies with MMR and trims chunks to their
+# query-relevant sentences. Off by default: trimming can cut a fact the query
+# words don't point at.
+CONTEXT_COMPRESSION = os.getenv("RAG_CONTEXT_COMPRESSION", "false").lower() == "true"
+SIMILARITY_TOP_K = 10
+ADAPTIVE_OVERFETCH_TOP_K = 20
+
+ask_vertex_retrieval = CorpusRetrievalTool(
     name='retrieve_rag_documentation',
     description=(
         'Use this tool to retrive information for the question from the RAG corpus,'
     ),
-    rag_resources=[
-        rag.RagResource(
-            # please fill in your own rag corpus
-            # here is a sample rag corpus for testing purpose
-            # e.g. projects/123/locations/us-central1/ragCorpora/456
-            # ⚠️ IMPORTANT: You must Hardcode this string for deployment
-            # because the cloud environment cannot read your local .env file.
-            # Copy the value of RAG_CORPUS from your .env file and paste it here.
-            rag_corpus="COPY RAG_CORPUS VALUE HERE",
-        )
-    ],
-    similarity_top_k=10,
+    retriever=retriever,
+    similarity_top_k=ADAPTIVE_OVERFETCH_TOP_K if RETRIEVAL_MODE == "adaptive" else SIMILARITY_TOP_K,
     vector_distance_threshold=0.6,
+    corpus_id=corpus_id,
+    # Repeated queries (within a conversation or across users) skip the vector search.
+    # The corpus generation marker invalidates cached results after new imports.
+    cache=RetrievalCache(
+        max_entries=int(os.getenv("RAG_CACHE_MAX_ENTRIES", "1024")),
+        ttl_seconds=float(os.getenv("RAG_CACHE_TTL_SECONDS", "600")),
+    ),
+    generation=generation,
+    postprocessors=([
+        AdaptiveCutoff(
+            max_keep=ADAPTIVE_OVERFETCH_TOP_K,
+            token_budget=int(os.getenv("RAG_CONTEXT_TOKEN_BUDGET", "2000")),
+        ),
+    ] if RETRIEVAL_MODE == "adaptive" else []) + (
+        [ContextCompressor()] if CONTEXT_COMPRESSION else []
+    ),
+    # Retrieval for the user message starts before the model asks for it
+    prefetch=os.getenv("AGENT_RETRIEVAL_PREFETCH", "true").lower() == "true",
+)
+
+token_accounting = TokenAccounting(
+    retrieval_tool_names=[ask_vertex_retrieval.name],
+    prompt_version=active_prompt_version(),
+    prompt_fingerprint=prompt_fingerprint(active_prompt_version()),
 )
 
+# Small talk is answered locally; corpus questions start retrieval right away
+routing = RoutingCallbacks(IntentRouter(), ask_vertex_retrieval)
+
+# Explicit context caching of the instruction and tool declarations. Off by
+# default: the v1 prefix is about 630 tokens, under the 1024 the API accepts,
+# and Gemini's implicit caching already covers a byte-stable prefix. Turn it on
+# for prompt versions with a longer prefix.
+CONTEXT_CACHE = os.getenv("AGENT_CONTEXT_CACHE", "false").lower() == "true"
+
 root_agent = Agent(
     model='gemini-2.5-flash',
     name='ask_rag_agent',
     instruction=return_instructions_root(),
     tools=[
         ask_vertex_retrieval,
-    ]
+    ],
+    before_agent_callback=routing.before_agent,
+    after_agent_callback=routing.after_agent,
+    # Routing runs first so token accounting sees the prefetched retrieval,
+    # history windowing before accounting so it sees what is actually sent,
+    # and accounting before the prefix cache so it still sees the full instruction
+    before_model_callback=[
+        routing.before_model,
+        # Long sessions: recent turns verbatim, old retrieval results stubbed,
+        # older turns folded into a summary
+        HistoryWindow(
+            tool_names=[ask_vertex_retrieval.name],
+            max_turns=int(os.getenv("AGENT_HISTORY_MAX_TURNS", "6")),
+            summary_token_budget=int(os.getenv("AGENT_HISTORY_SUMMARY_TOKENS", "400")),
+        ),
+        token_accounting.before_model,
+    ] + ([
+        StaticPrefixCache(
+            min_tokens=int(os.getenv("AGENT_CONTEXT_CACHE_MIN_TOKENS", "1024")),
+        ),
+    ] if CONTEXT_CACHE else []),
+    after_model_callback=[
+        token_accounting.after_model,
+    ],
 )
\ No newline at end of file
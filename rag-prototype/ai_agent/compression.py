@@ -0,0 +1,159 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Context compression for retrieved chunks.
+
+Chunks from the same section of a filing overlap heavily. This stage drops
+near-duplicates (cosine over hashed word shingles), re-ranks the rest with
+MMR for diversity and trims each chunk to the sentences relevant to the
+query. All similarity work is done with NumPy matrix products.
+"""
+
+import re
+import zlib
+from dataclasses import replace
+
+import numpy as np
+
+from .retrieval import RetrievedChunk
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+_ELLIPSIS = " ... "
+
+
+def _tokens(text: str) -> list[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def hashed_vectors(texts: list[str], shingle_size: int = 1, dim: int = 4096) -> np.ndarray:
+    """
+    L2-normalized bag of hashed word shingles, one row per text.
+    crc32 keeps the hashing stable across processes (unlike hash()).
+    """
+    rows, cols = [], []
+    for row, text in enumerate(texts):
+        tokens = _tokens(text)
+        shingles = [
+            " ".join(tokens[i:i + shingle_size])
+            for i in range(max(1, len(tokens) - shingle_size + 1))
+        ]
+        rows.extend([row] * len(shingles))
+        cols.extend(zlib.crc32(shingle.encode()) % dim for shingle in shingles)
+    flat = np.asarray(rows, dtype=np.intp) * dim + np.asarray(cols, dtype=np.intp)
+    matrix = np.bincount(flat, minlength=len(texts) * dim).astype(np.float32).reshape(len(texts), dim)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def drop_near_duplicates(similarity: np.ndarray, threshold: float) -> list[int]:
+    """Greedy in rank order: keeps a chunk unless it is too close to a kept one."""
+    kept = []
+    for i in range(similarity.shape[0]):
+        if not kept or similarity[i, kept].max() < threshold:
+            kept.append(i)
+    return kept
+
+
+def mmr_order(relevance: np.ndarray, similarity: np.ndarray, lambda_: float) -> list[int]:
+    """Maximal Marginal Relevance ordering of all candidates."""
+    n = len(relevance)
+    selected = []
+    max_sim = np.zeros(n, dtype=np.float32)
+    available = np.ones(n, dtype=bool)
+    for _ in range(n):
+        scores = np.where(available, lambda_ * relevance - (1 - lambda_) * max_sim, -np.inf)
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        max_sim = np.maximum(max_sim, similarity[best])
+    return selected
+
+
+def trim_sentences(query: str, texts: list[str], min_sentences: int = 3, keep_ratio: float = 0.5) -> list[str]:
+    """
+    Keeps, per text, the sentences whose similarity to the query is at least
+    `keep_ratio` of that text's best sentence. Short texts are left alone.
+    """
+    sentences, owners = [], []
+    for index, text in enumerate(texts):
+        parts = [s for s in _SENTENCE_RE.split(text.strip()) if s]
+        if len(parts) >= min_sentences:
+            sentences.extend(parts)
+            owners.extend([index] * len(parts))
+    if not sentences:
+        return texts
+
+    scores = hashed_vectors(sentences) @ hashed_vectors([query])[0]
+    owners = np.asarray(owners)
+    best = np.zeros(len(texts), dtype=np.float32)
+    np.maximum.at(best, owners, scores)
+    keep = scores >= best[owners] * keep_ratio
+
+    trimmed = list(texts)
+    for index in np.unique(owners):
+        if best[index] <= 0:
+            # Nothing overlaps the query lexically, don't guess
+            continue
+        positions = np.flatnonzero((owners == index) & keep)
+        trimmed[index] = _ELLIPSIS.join(sentences[p] for p in positions)
+    return trimmed
+
+
+class ContextCompressor:
+    """Post-processor `(query, chunks) -> chunks` for CorpusRetrievalTool."""
+
+    def __init__(
+        self,
+        duplicate_threshold: float = 0.6,
+        mmr_lambda: float = 0.7,
+        trim: bool = True,
+        keep_ratio: float = 0.5,
+    ):
+        self.duplicate_threshold = duplicate_threshold
+        self.mmr_lambda = mmr_lambda
+        self.trim = trim
+        self.keep_ratio = keep_ratio
+
+    def __call__(self, query: str, chunks: list[RetrievedChunk]) -> list[RetrievedChunk]:
+        if not chunks:
+            return chunks
+        if len(chunks) > 1:
+            # Word bigrams catch overlapping windows and lightly reworded copies
+            vectors = hashed_vectors([chunk.text for chunk in chunks], shingle_size=2)
+            similarity = vectors @ vectors.T
+            kept = drop_near_duplicates(similarity, self.duplicate_threshold)
+            relevance = np.asarray([1.0 - chunks[i].distance for i in kept], dtype=np.float32)
+            order = mmr_order(relevance, similarity[np.ix_(kept, kept)], self.mmr_lambda)
+            chunks = [chunks[kept[i]] for i in order]
+        if self.trim:
+            texts = trim_sentences(query, [chunk.text for chunk in chunks], keep_ratio=self.keep_ratio)
+            chunks = [replace(chunk, text=text) for chunk, text in zip(chunks, texts, strict=True)]
+        return chunks
+
+
+def group_by_source(chunks: list[RetrievedChunk]) -> list[dict]:
+    """
+    Groups chunks by source file (in order of each file's best chunk), so the
+    model sees every file once and cites it once.
+    """
+    groups = {}
+    for chunk in chunks:
+        key = chunk.source_uri or chunk.source_display_name
+        if key not in groups:
+            groups[key] = {
+                "title": chunk.source_display_name,
+                "source_uri": chunk.source_uri,
+                "passages": [],
+            }
+        groups[key]["passages"].append(chunk.text)
+    return list(groups.values())
@@ -0,0 +1,136 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Model-side context caching for the static request prefix.
+
+The instruction and tool declarations are identical on every turn. When that
+prefix is large enough for explicit caching, it is stored once as Gemini
+cached content and requests reference it instead of re-sending it, so
+repeated turns don't pay full input cost or prefill latency for it. Smaller
+prefixes are left in place, where Gemini's implicit prefix caching applies
+because the prefix is byte-stable.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+
+from .retrieval import estimate_tokens
+from .token_budget import instruction_text
+from .transient import TransientState
+
+logger = logging.getLogger(__name__)
+
+# Explicit caching is rejected by the API below this many tokens
+DEFAULT_MIN_TOKENS = 1024
+# Recreate the cache this long before it expires
+_REFRESH_MARGIN_SECONDS = 60
+# After a failed create, don't try again for this long
+_RETRY_AFTER_SECONDS = 300
+
+
+class StaticPrefixCache(TransientState):
+    """
+    before_model_callback that serves the static prefix from cached content.
+    One request creates the cache; requests arriving meanwhile send the full
+    prefix instead of waiting for it.
+    """
+
+    _transient = ("_lock", "_creating")
+
+    def __init__(self, min_tokens: int = DEFAULT_MIN_TOKENS, ttl_seconds: int = 3600, client=None):
+        self.min_tokens = min_tokens
+        self.ttl_seconds = ttl_seconds
+        self._client = client
+        self._caches = {}
+        self._disabled_until = 0.0
+        self._init_transient()
+
+    def _init_transient(self):
+        self._lock = threading.Lock()
+        # Prefix keys whose cache is being created
+        self._creating = set()
+
+    @property
+    def client(self):
+        if self._client is None:
+            from google import genai
+
+            self._client = genai.Client(
+                vertexai=True,
+                project=os.getenv("GOOGLE_CLOUD_PROJECT"),
+                location=os.getenv("GOOGLE_CLOUD_LOCATION"),
+            )
+        return self._client
+
+    def _prefix(self, llm_request: LlmRequest):
+        config = llm_request.config
+        instruction = instruction_text(config.system_instruction)
+        tools = "".join(tool.model_dump_json(exclude_none=True) for tool in config.tools or [])
+        return instruction, tools
+
+    def _cached_content_name(self, llm_request: LlmRequest, key: str) -> str | None:
+        from google.genai import types
+
+        with self._lock:
+            name, expires_at = self._caches.get(key, (None, 0.0))
+            if name and expires_at - _REFRESH_MARGIN_SECONDS > time.time():
+                return name
+            if time.time() < self._disabled_until or key in self._creating:
+                return None
+            self._creating.add(key)
+        config = llm_request.config
+        try:
+            cached = self.client.caches.create(
+                model=llm_request.model,
+                config=types.CreateCachedContentConfig(
+                    display_name=f"agent-prefix-{key[:12]}",
+                    system_instruction=config.system_instruction,
+                    tools=config.tools,
+                    tool_config=config.tool_config,
+                    ttl=f"{self.ttl_seconds}s",
+                ),
+            )
+        except Exception as e:
+            logger.warning("Context cache creation failed, sending the full prefix: %s", e)
+            with self._lock:
+                self._creating.discard(key)
+                self._disabled_until = time.time() + _RETRY_AFTER_SECONDS
+            return None
+        with self._lock:
+            self._creating.discard(key)
+            self._caches[key] = (cached.name, time.time() + self.ttl_seconds)
+        logger.info("Created context cache %s for the static prefix", cached.name)
+        return cached.name
+
+    def __call__(self, callback_context: CallbackContext, llm_request: LlmRequest) -> LlmResponse | None:
+        config = llm_request.config
+        if config is None or config.cached_content or not config.system_instruction:
+            return None
+        instruction, tools = self._prefix(llm_request)
+        if estimate_tokens(instruction + tools) < self.min_tokens:
+            return None
+        key = hashlib.sha256(f"{llm_request.model}\n{instruction}\n{tools}".encode()).hexdigest()
+        name = self._cached_content_name(llm_request, key)
+        if name is None:
+            return None
+        # The cached content carries these; the API rejects requests that repeat them
+        config.cached_content = name
+        config.system_instruction = None
+        config.tools = None
+        config.tool_config = None
+        return None
@@ -0,0 +1,201 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Fan-out retrieval over several RAG corpora (shards).
+
+Documents can be split across corpora, e.g. by year, business unit or doc
+type. A RAG Engine retrieval query covers a single corpus, so the shards are
+queried concurrently and their chunks merged into one ranked list. Each shard
+gets the same deadline, which keeps fan-out latency close to the slowest
+shard rather than the sum of all of them. A shard that misses the deadline or
+fails is left out of the answer instead of failing it.
+
+The shard list comes from configuration (RAG_CORPORA, falling back to
+RAG_CORPUS), which deploy.py passes to Agent Engine as environment variables.
+"""
+
+import json
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field, replace
+
+from .retrieval import RetrievedChunk
+from .transient import TransientState
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"[\w.-]+")
+
+
+@dataclass
+class CorpusShard:
+    corpus: str
+    name: str = ""
+    # e.g. {"year": "2024", "unit": "cloud", "doc_type": "10-K"}
+    metadata: dict = field(default_factory=dict)
+
+    def __post_init__(self):
+        self.name = self.name or self.corpus.rsplit("/", 1)[-1]
+
+
+def load_corpus_config(value: str | None = None) -> list[CorpusShard]:
+    """
+    Parses the shard list from RAG_CORPORA: either a JSON list of
+    {"corpus": ..., "name": ..., "metadata": {...}} objects or a comma-separated
+    list of corpus resource names. Falls back to a single RAG_CORPUS shard.
+    """
+    if value is None:
+        value = os.getenv("RAG_CORPORA") or os.getenv("RAG_CORPUS", "")
+    value = value.strip()
+    if not value:
+        return []
+    if value.startswith("["):
+        return [
+            CorpusShard(entry) if isinstance(entry, str) else CorpusShard(**entry)
+            for entry in json.loads(value)
+        ]
+    return [CorpusShard(corpus.strip()) for corpus in value.split(",") if corpus.strip()]
+
+
+def select_shards(query: str, shards: list[CorpusShard]) -> list[CorpusShard]:
+    """
+    Metadata routing: if the query mentions a shard's metadata value (a year,
+    a unit, a doc type), only the shards matching every mentioned key are
+    queried. Queries that mention no metadata go to all shards.
+    """
+    words = set(_WORD_RE.findall(query.casefold()))
+    mentioned = {}
+    for shard in shards:
+        for key, value in shard.metadata.items():
+            if str(value).casefold() in words:
+                mentioned.setdefault(key, set()).add(str(value).casefold())
+    if not mentioned:
+        return shards
+    selected = [
+        shard for shard in shards
+        if all(str(shard.metadata.get(key, "")).casefold() in values for key, values in mentioned.items())
+    ]
+    return selected or shards
+
+
+def _chunk_key(chunk: RetrievedChunk):
+    # The same document imported into several shards comes back once per shard
+    return (chunk.source_uri, chunk.text)
+
+
+def merge_by_distance(results: list[list[RetrievedChunk]], top_k: int) -> list[RetrievedChunk]:
+    """
+    Merges shard results by distance, keeping the closest copy of a chunk
+    found in several shards. Cosine distances are comparable across shards
+    that share the embedding model.
+    """
+    merged = {}
+    for chunk in sorted((chunk for chunks in results for chunk in chunks), key=lambda chunk: chunk.distance):
+        merged.setdefault(_chunk_key(chunk), chunk)
+    return list(merged.values())[:top_k]
+
+
+def merge_by_rank(results: list[list[RetrievedChunk]], top_k: int, k: int = 60) -> list[RetrievedChunk]:
+    """
+    Reciprocal rank fusion, for shards whose distances are not comparable
+    (different embedding models). A chunk found in several shards sums its
+    scores and keeps the copy with the best rank, and its own distance.
+    """
+    scores, chunks_by_key = {}, {}
+    for chunks in results:
+        for rank, chunk in enumerate(chunks, start=1):
+            key = _chunk_key(chunk)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            if key not in chunks_by_key or rank < chunks_by_key[key][0]:
+                chunks_by_key[key] = (rank, chunk)
+    ranked = sorted(scores, key=scores.get, reverse=True)
+    return [chunks_by_key[key][1] for key in ranked[:top_k]]
+
+
+MERGERS = {
+    "distance": merge_by_distance,
+    "rank": merge_by_rank,
+}
+
+
+class FanoutRetriever(TransientState):
+    """
+    Retriever `(query, top_k, threshold) -> chunks` over several shards.
+    `retriever_factory(corpus)` builds the per-shard retriever, e.g.
+    ai_agent.retrieval.vertex_retriever.
+    """
+
+    _transient = ("_executor",)
+
+    def __init__(
+        self,
+        shards: list[CorpusShard],
+        retriever_factory,
+        timeout_seconds: float = 5.0,
+        merge: str = "distance",
+        route_by_metadata: bool = True,
+        max_workers: int | None = None,
+    ):
+        if not shards:
+            raise ValueError("FanoutRetriever needs at least one corpus")
+        self.shards = shards
+        self.retrievers = {shard.corpus: retriever_factory(shard.corpus) for shard in shards}
+        self.timeout_seconds = timeout_seconds
+        self.merge = MERGERS[merge]
+        self.route_by_metadata = route_by_metadata
+        self.max_workers = max_workers or 4 * len(shards)
+        self._init_transient()
+
+    def _init_transient(self):
+        # Shared by concurrent tool calls; calls past their deadline still hold a worker
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="rag-fanout")
+
+    def _retrieve_shard(self, shard: CorpusShard, query: str, top_k: int, threshold: float):
+        chunks = self.retrievers[shard.corpus](query, top_k, threshold)
+        return [replace(chunk, corpus=shard.name) for chunk in chunks]
+
+    def __call__(self, query: str, top_k: int, threshold: float) -> list[RetrievedChunk]:
+        shards = select_shards(query, self.shards) if self.route_by_metadata else self.shards
+        # A single shard goes through the executor as well, so the deadline still applies
+        futures = {
+            self._executor.submit(self._retrieve_shard, shard, query, top_k, threshold): shard
+            for shard in shards
+        }
+        done, not_done = wait(futures, timeout=self.timeout_seconds)
+        for future in not_done:
+            # A running call can't be interrupted; its result is discarded
+            future.cancel()
+            logger.warning("Corpus %s timed out after %.1fs, skipped", futures[future].name, self.timeout_seconds)
+
+        results, errors = [], []
+        for future in done:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                logger.warning("Corpus %s failed, skipped: %s", futures[future].name, e)
+                errors.append(e)
+        if not results:
+            # Nothing to answer from: surface the failure like a single-corpus retriever would
+            if errors:
+                raise errors[0]
+            raise TimeoutError(f"No corpus answered within {self.timeout_seconds}s")
+        return self.merge(results, top_k)
+
+
+def shards_generation(generation_fns):
+    """Combines per-shard generation_fns into one marker for CorpusGeneration."""
+    def generation_fn():
+        return tuple(fn() for fn in generation_fns)
+
+    return generation_fn
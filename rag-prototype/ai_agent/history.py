@@ -0,0 +1,154 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Session history windowing for long conversations.
+
+Every model call re-sends the whole session history, including the large
+retrieval results of earlier turns. This policy keeps the request flat:
+
+- the last `max_turns` turns are sent as they are, except that retrieval
+  results older than the last `keep_tool_results_turns` turns are replaced by
+  a short stub (the call/response pair stays, so the history remains valid);
+- older turns are folded into a running summary of the conversation that is
+  kept under `summary_token_budget`, dropping the oldest lines first.
+
+The default summarizer is extractive (each folded turn becomes one line with
+the question and the start of the answer), so it adds no model call and no
+session state: the summary is rebuilt from the history on every call.
+"""
+
+import logging
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.genai import types
+
+from .retrieval import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_HEADER = "Summary of the earlier conversation (for context only):"
+_OMITTED = "(earlier turns omitted)"
+_LINE_CHARS = 200
+
+
+def _texts(content: types.Content) -> list[str]:
+    return [part.text for part in content.parts or [] if part.text and not part.thought]
+
+
+def _is_user_message(content: types.Content) -> bool:
+    """A user turn starts with user text; tool results also come back as 'user'."""
+    parts = content.parts or []
+    return content.role == "user" and any(part.text for part in parts) and not any(part.function_response for part in parts)
+
+
+def split_turns(contents: list[types.Content]) -> list[list[types.Content]]:
+    """Groups the history into turns, each starting with a user message."""
+    turns = []
+    for content in contents:
+        if _is_user_message(content) or not turns:
+            turns.append([])
+        turns[-1].append(content)
+    return turns
+
+
+def _shorten(text: str, limit: int = _LINE_CHARS) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit - 3].rstrip() + "..."
+
+
+def extractive_summary(turns: list[list[types.Content]], token_budget: int) -> str:
+    """One line per turn (question and start of the answer), newest kept first."""
+    lines = []
+    for turn in turns:
+        question = " ".join(_texts(turn[0])) if _is_user_message(turn[0]) else ""
+        answers = [text for content in turn if content.role == "model" for text in _texts(content)]
+        line = f"- User: {_shorten(question)}"
+        if answers:
+            line += f" / Assistant: {_shorten(answers[-1])}"
+        lines.append(line)
+
+    kept, used = [], estimate_tokens(SUMMARY_HEADER)
+    for line in reversed(lines):
+        cost = estimate_tokens(line) + 1
+        if used + cost > token_budget:
+            kept.append(_OMITTED)
+            break
+        kept.append(line)
+        used += cost
+    return "\n".join([SUMMARY_HEADER, *reversed(kept)])
+
+
+def _stub_tool_results(content: types.Content, tool_names: set) -> types.Content:
+    parts = []
+    changed = False
+    for part in content.parts or []:
+        response = part.function_response
+        if response and response.name in tool_names:
+            changed = True
+            part = types.Part(function_response=types.FunctionResponse(
+                id=response.id,
+                name=response.name,
+                response={"result": "Retrieved passages omitted from history; call the tool again if needed."},
+            ))
+        parts.append(part)
+    return types.Content(role=content.role, parts=parts) if changed else content
+
+
+class HistoryWindow:
+    """before_model_callback applying the windowing policy to the request."""
+
+    def __init__(
+        self,
+        tool_names,
+        max_turns: int = 6,
+        keep_tool_results_turns: int = 1,
+        summary_token_budget: int = 400,
+        summarizer=extractive_summary,
+    ):
+        self.tool_names = set(tool_names)
+        self.max_turns = max(1, max_turns)
+        self.keep_tool_results_turns = max(1, keep_tool_results_turns)
+        self.summary_token_budget = summary_token_budget
+        self.summarizer = summarizer
+
+    def apply(self, contents: list[types.Content]) -> list[types.Content]:
+        turns = split_turns(contents)
+        folded, recent = turns[:-self.max_turns], turns[-self.max_turns:]
+
+        window = []
+        stub_before = len(recent) - self.keep_tool_results_turns
+        for index, turn in enumerate(recent):
+            if index < stub_before:
+                turn = [_stub_tool_results(content, self.tool_names) for content in turn]
+            window.extend(turn)
+
+        if folded and self.summary_token_budget > 0:
+            summary = self.summarizer(folded, self.summary_token_budget)
+            # Leads the window's first user message rather than adding a turn
+            first = window[0]
+            window[0] = types.Content(role=first.role, parts=[types.Part(text=summary), *(first.parts or [])])
+        return window
+
+    def __call__(self, callback_context: CallbackContext, llm_request: LlmRequest) -> LlmResponse | None:
+        if not llm_request.contents:
+            return None
+        before = len(llm_request.contents)
+        llm_request.contents = self.apply(llm_request.contents)
+        if len(llm_request.contents) != before:
+            logger.debug(
+                "History window: %d -> %d contents (invocation=%s)",
+                before,
+                len(llm_request.contents),
+                callback_context.invocation_id,
+            )
+        return None
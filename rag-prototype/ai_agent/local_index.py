@@ -0,0 +1,290 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""In-process vector index: a local mirror of the corpus.
+
+Gives offline retrieval for development and a low-latency path that skips
+the network. A snapshot is a directory of flat files, all memory-mapped:
+
+  manifest.json     dim, dtype, row count, embedding model, sources
+  vectors.bin       float16 or int8 rows (L2-normalized before quantizing)
+  scales.bin        float32 per-row scales (int8 only)
+  text_spans.bin    int64 (offset, length) of each chunk in texts.bin
+  texts.bin         UTF-8 chunk texts
+  source_ids.bin    int32 index into the manifest's sources
+
+Appends write the new rows to the end of every file first and then bump the
+row count in the manifest, so readers never see a partial append. Search is
+a blocked matrix product over the mapped rows with a running top-k, so
+memory stays bounded however large the index gets.
+
+Snapshots are built by data-load-to-corpus/build_local_index.py.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from functools import partial
+
+import numpy as np
+
+from .compression import hashed_vectors
+from .retrieval import RetrievedChunk
+from .transient import TransientState
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = "manifest.json"
+DTYPES = {"float16": np.float16, "int8": np.int8}
+# Rows per matrix-product block: bounds the float32 working set and keeps
+# the converted block in cache for the product
+BLOCK_ROWS = 4096
+# Offline embedder: hashed word vectors, lexical matching only
+HASHED_EMBEDDING_MODEL = "hashed"
+
+
+class HashedEmbedder:
+    """Embeds texts without a network call, for offline development."""
+
+    def __init__(self, dim: int = 768):
+        self.dim = dim
+
+    def __call__(self, texts: list[str]) -> np.ndarray:
+        return hashed_vectors(texts, dim=self.dim)
+
+
+class VertexEmbedder:
+    """Embeds texts with a Vertex AI text embedding model."""
+
+    def __init__(self, model: str, task_type: str = "RETRIEVAL_QUERY", batch_size: int = 32):
+        # Corpus configs use the full publisher path, the SDK wants the short name
+        self.model_name = model.rsplit("/", 1)[-1]
+        self.task_type = task_type
+        self.batch_size = batch_size
+        self._model = None
+
+    def __call__(self, texts: list[str]) -> np.ndarray:
+        from vertexai.language_models import TextEmbeddingInput, TextEmbeddingModel
+
+        if self._model is None:
+            self._model = TextEmbeddingModel.from_pretrained(self.model_name)
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = [TextEmbeddingInput(text, self.task_type) for text in texts[start:start + self.batch_size]]
+            vectors.extend(embedding.values for embedding in self._model.get_embeddings(batch))
+        return np.asarray(vectors, dtype=np.float32)
+
+
+def make_embedder(model: str, dim: int, task_type: str = "RETRIEVAL_QUERY"):
+    if model == HASHED_EMBEDDING_MODEL:
+        return HashedEmbedder(dim)
+    return VertexEmbedder(model, task_type=task_type)
+
+
+def _quantize(vectors: np.ndarray, dtype: str):
+    """Returns (rows, scales) for storage; scales is None for float16."""
+    vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    if dtype == "float16":
+        return vectors.astype(np.float16), None
+    scales = np.maximum(np.abs(vectors).max(axis=1), 1e-12) / 127.0
+    rows = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return rows, scales.astype(np.float32)
+
+
+class LocalVectorIndex(TransientState):
+    """Memory-mapped embedding matrix plus array-backed chunk metadata."""
+
+    # A copy maps the snapshot files again instead of carrying the arrays
+    _transient = ("_lock", "_manifest_mtime", "manifest", "vectors", "scales", "text_spans", "source_ids", "texts")
+
+    def __init__(self, path: str):
+        self.path = path
+        self._init_transient()
+
+    def _init_transient(self):
+        self._lock = threading.Lock()
+        self._manifest_mtime = None
+        self._load()
+
+    @classmethod
+    def create(cls, path: str, dim: int, dtype: str = "float16", embedding_model: str = HASHED_EMBEDDING_MODEL):
+        if dtype not in DTYPES:
+            raise ValueError(f"Unsupported dtype {dtype!r}, expected one of {sorted(DTYPES)}")
+        os.makedirs(path, exist_ok=True)
+        if os.path.exists(os.path.join(path, MANIFEST)):
+            raise FileExistsError(f"An index already exists in {path}")
+        for name in ("vectors.bin", "scales.bin", "text_spans.bin", "texts.bin", "source_ids.bin"):
+            open(os.path.join(path, name), "wb").close()
+        cls._write_manifest(path, {
+            "dim": dim,
+            "dtype": dtype,
+            "count": 0,
+            "text_bytes": 0,
+            "embedding_model": embedding_model,
+            "sources": [],
+            "updated_at": time.time(),
+        })
+        return cls(path)
+
+    @staticmethod
+    def _write_manifest(path, manifest):
+        tmp = os.path.join(path, MANIFEST + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp, os.path.join(path, MANIFEST))
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _map(self, name, dtype, shape):
+        if shape[0] == 0:
+            return np.zeros(shape, dtype=dtype)
+        return np.memmap(self._file(name), dtype=dtype, mode="r", shape=shape)
+
+    def _load(self):
+        manifest_path = self._file(MANIFEST)
+        with open(manifest_path) as f:
+            self.manifest = json.load(f)
+        self._manifest_mtime = os.path.getmtime(manifest_path)
+        count, dim = self.manifest["count"], self.manifest["dim"]
+        # Rows past `count` belong to an append in progress and are ignored
+        self.vectors = self._map("vectors.bin", DTYPES[self.manifest["dtype"]], (count, dim))
+        self.scales = self._map("scales.bin", np.float32, (count,)) if self.manifest["dtype"] == "int8" else None
+        self.text_spans = self._map("text_spans.bin", np.int64, (count, 2))
+        self.source_ids = self._map("source_ids.bin", np.int32, (count,))
+        self.texts = self._map("texts.bin", np.uint8, (self.manifest["text_bytes"],))
+
+    def __len__(self):
+        return self.manifest["count"]
+
+    @property
+    def dim(self) -> int:
+        return self.manifest["dim"]
+
+    @property
+    def embedding_model(self) -> str:
+        return self.manifest["embedding_model"]
+
+    def refresh(self) -> int:
+        """Picks up appends made by another process; returns the row count."""
+        with self._lock:
+            if os.path.getmtime(self._file(MANIFEST)) != self._manifest_mtime:
+                self._load()
+            return len(self)
+
+    def source_uris(self) -> set:
+        return {source["uri"] for source in self.manifest["sources"]}
+
+    def append(self, vectors: np.ndarray, texts: list[str], source_uri: str, source_display_name: str = ""):
+        """Adds the chunks of one source document."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or vectors.shape[1] != self.dim or len(vectors) != len(texts):
+            raise ValueError(f"Expected {len(texts)} vectors of dimension {self.dim}, got {vectors.shape}")
+        with self._lock:
+            manifest = dict(self.manifest)
+            rows, scales = _quantize(vectors, manifest["dtype"])
+            encoded = [text.encode("utf-8") for text in texts]
+            lengths = np.asarray([len(text) for text in encoded], dtype=np.int64)
+            offsets = manifest["text_bytes"] + np.concatenate([[0], np.cumsum(lengths)[:-1]]).astype(np.int64)
+            sources = [*manifest["sources"], {"uri": source_uri, "display_name": source_display_name}]
+            source_id = len(sources) - 1
+
+            # Truncate leftovers of an interrupted append, then write the new rows
+            self._append_file("vectors.bin", rows, manifest["count"] * rows.itemsize * self.dim)
+            if scales is not None:
+                self._append_file("scales.bin", scales, manifest["count"] * 4)
+            self._append_file("text_spans.bin", np.stack([offsets, lengths], axis=1), manifest["count"] * 16)
+            self._append_file("source_ids.bin", np.full(len(texts), source_id, dtype=np.int32), manifest["count"] * 4)
+            self._append_file("texts.bin", np.frombuffer(b"".join(encoded), dtype=np.uint8), manifest["text_bytes"])
+
+            manifest["count"] += len(texts)
+            manifest["text_bytes"] += int(lengths.sum())
+            manifest["sources"] = sources
+            manifest["updated_at"] = time.time()
+            self._write_manifest(self.path, manifest)
+            self._load()
+
+    def _append_file(self, name, array, expected_size):
+        with open(self._file(name), "r+b") as f:
+            f.truncate(expected_size)
+            f.seek(expected_size)
+            f.write(np.ascontiguousarray(array).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+    def search(self, queries: np.ndarray, top_k: int, block_rows: int = BLOCK_ROWS):
+        """
+        Cosine top-k for a batch of query vectors. Returns (rows, scores),
+        each of shape (n_queries, k) and sorted best first.
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+        with self._lock:
+            vectors, scales = self.vectors, self.scales
+        count = len(vectors)
+        k = min(top_k, count)
+        if k == 0:
+            return np.empty((len(queries), 0), dtype=np.int64), np.empty((len(queries), 0), dtype=np.float32)
+        best_rows = np.empty((len(queries), 0), dtype=np.int64)
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+        # Dequantized rows are written into one reused buffer per call
+        buffer = np.empty((min(block_rows, count), self.dim), dtype=np.float32)
+        for start in range(0, count, block_rows):
+            rows_in_block = min(block_rows, count - start)
+            block = buffer[:rows_in_block]
+            np.copyto(block, vectors[start:start + rows_in_block], casting="unsafe")
+            scores = queries @ block.T
+            if scales is not None:
+                scores *= scales[start:start + block_rows]
+            # Keep only the block's top k before merging with the running best
+            if scores.shape[1] > k:
+                part = np.argpartition(scores, -k, axis=1)[:, -k:]
+                scores = np.take_along_axis(scores, part, axis=1)
+                rows = part + start
+            else:
+                rows = np.broadcast_to(np.arange(start, start + scores.shape[1]), scores.shape)
+            best_scores = np.concatenate([best_scores, scores], axis=1)
+            best_rows = np.concatenate([best_rows, rows], axis=1)
+            if best_scores.shape[1] > k:
+                part = np.argpartition(best_scores, -k, axis=1)[:, -k:]
+                best_scores = np.take_along_axis(best_scores, part, axis=1)
+                best_rows = np.take_along_axis(best_rows, part, axis=1)
+        order = np.argsort(-best_scores, axis=1)
+        return np.take_along_axis(best_rows, order, axis=1), np.take_along_axis(best_scores, order, axis=1)
+
+    def chunk(self, row: int, score: float) -> RetrievedChunk:
+        offset, length = self.text_spans[row]
+        source = self.manifest["sources"][self.source_ids[row]]
+        return RetrievedChunk(
+            text=bytes(self.texts[offset:offset + length]).decode("utf-8"),
+            source_uri=source["uri"],
+            source_display_name=source["display_name"],
+            # int8 rounding can push a self-match just past 1.0
+            distance=max(0.0, float(1.0 - score)),
+        )
+
+
+def local_retrieve(query: str, top_k: int, threshold: float, index: LocalVectorIndex, embedder) -> list[RetrievedChunk]:
+    """Retriever over a LocalVectorIndex (see ai_agent.retrieval)."""
+    if len(index) == 0:
+        return []
+    rows, scores = index.search(embedder([query]), top_k)
+    chunks = [index.chunk(row, score) for row, score in zip(rows[0], scores[0], strict=True)]
+    return [chunk for chunk in chunks if chunk.distance <= threshold]
+
+
+def local_retriever(index: LocalVectorIndex):
+    """Returns a retriever that embeds queries with the index's embedding model."""
+    embedder = make_embedder(index.embedding_model, index.dim)
+    return partial(local_retrieve, index=index, embedder=embedder)
@@ -0,0 +1,149 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Speculative retrieval prefetch.
+
+Retrieval for the raw user message starts as soon as the message arrives and
+runs while the model plans its first step. When the model then calls the
+retrieval tool with a query close enough to the message, the tool is served
+from the prefetch instead of starting its own retrieval. Prefetches that are
+not used are cancelled at the end of the turn; one that already reached the
+retriever still lands in the retrieval cache, so the work is not wasted.
+"""
+
+import asyncio
+import logging
+import re
+import threading
+from collections import OrderedDict
+
+from .transient import TransientState
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def _tokens(text: str) -> set:
+    return set(_TOKEN_RE.findall(text.lower()))
+
+
+def query_overlap(message: str, query: str) -> float:
+    """
+    Share of the tool query's words that appear in the message. The model
+    usually rewrites a question into a shorter query made of its words.
+    """
+    query_tokens = _tokens(query)
+    if not query_tokens:
+        return 0.0
+    return len(query_tokens & _tokens(message)) / len(query_tokens)
+
+
+class RetrievalPrefetcher(TransientState):
+    """
+    Runs `select(query) -> chunks` (CorpusRetrievalTool.select) ahead of the
+    tool call, one prefetch per invocation. Concurrent sessions may run on
+    different event loops, so each task is only touched through its own loop.
+    """
+
+    # In-flight prefetches belong to this process's event loops
+    _transient = ("_pending", "_lock")
+
+    def __init__(self, select, min_overlap: float = 0.6, max_pending: int = 1000):
+        self.select = select
+        self.min_overlap = min_overlap
+        self.max_pending = max_pending
+        self.started = 0
+        self.used = 0
+        self.discarded = 0
+        self._init_transient()
+
+    def _init_transient(self):
+        # invocation_id -> (message, task)
+        self._pending = OrderedDict()
+        self._lock = threading.Lock()
+
+    def start(self, invocation_id: str, message: str):
+        """Starts a prefetch; must be called from the invocation's event loop."""
+        if not message.strip():
+            return
+        with self._lock:
+            if invocation_id in self._pending:
+                return
+            task = asyncio.get_running_loop().create_task(asyncio.to_thread(self.select, message))
+            self._pending[invocation_id] = (message, task)
+            self.started += 1
+            stale = []
+            while len(self._pending) > self.max_pending:
+                stale.append(self._pending.popitem(last=False)[1][1])
+        for task in stale:
+            self._drop(task)
+
+    async def take(self, invocation_id: str, query: str):
+        """Prefetched chunks for this query, or None if there is no usable prefetch."""
+        with self._lock:
+            entry = self._pending.get(invocation_id)
+            if entry is None:
+                return None
+            message, task = entry
+            overlap = query_overlap(message, query)
+            if overlap < self.min_overlap:
+                logger.debug("Prefetch not used: query overlap %.2f (invocation=%s)", overlap, invocation_id)
+                return None
+            del self._pending[invocation_id]
+        try:
+            chunks = await task
+        except Exception as e:
+            logger.warning("Prefetch failed, retrieving again: %s", e)
+            return None
+        with self._lock:
+            self.used += 1
+        return chunks
+
+    def discard(self, invocation_id: str):
+        """Cancels this invocation's prefetch if nothing took it."""
+        with self._lock:
+            entry = self._pending.pop(invocation_id, None)
+        if entry is not None:
+            self._drop(entry[1])
+
+    def _drop(self, task):
+        with self._lock:
+            self.discarded += 1
+        if task.done():
+            _consume_result(task)
+            return
+        try:
+            task.get_loop().call_soon_threadsafe(_cancel, task)
+        except RuntimeError:
+            # The loop is already closed, and the task with it
+            pass
+
+    def stats(self) -> dict:
+        return {
+            "started": self.started,
+            "used": self.used,
+            "discarded": self.discarded,
+            "use_rate": self.used / self.started if self.started else 0.0,
+        }
+
+
+def _cancel(task):
+    # Cancelling stops it if the retrieval thread has not started yet
+    task.cancel()
+    task.add_done_callback(_consume_result)
+
+
+def _consume_result(task):
+    # Keeps "exception was never retrieved" warnings out of the logs
+    if not task.cancelled():
+        task.exception()
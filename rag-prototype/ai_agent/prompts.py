@@ -14,12 +14,16 @@
 
 This module defines functions that return instruction prompts for the root agent.
 These instructions guide the agent's behavior, workflow, and tool usage.
-"""
 
+Instruction variants are versioned in INSTRUCTION_PROMPTS. Their text is kept
+static (no per-turn templating) so it forms a stable prefix that the model can
+serve from its context cache; see ai_agent/context_cache.py.
+"""
 
-def return_instructions_root() -> str:
+import hashlib
+import os
 
-    instruction_prompt_v1 = """
+INSTRUCTION_PROMPT_V1 = """
         You are an AI assistant with access to specialized corpus of documents.
         Your role is to provide accurate and concise answers to questions based
         on documents that are retrievable using ask_vertex_retrieval. If you believe
@@ -62,7 +66,7 @@ def return_instructions_root() -> str:
         enough information.
         """
 
-    instruction_prompt_v0 = """
+INSTRUCTION_PROMPT_V0 = """
         You are a Documentation Assistant. Your role is to provide accurate and concise
         answers to questions based on documents that are retrievable using ask_vertex_retrieval. If you believe
         the user is just discussing, don't use the retrieval tool. But if the user is asking a question and you are
@@ -101,4 +105,30 @@ def return_instructions_root() -> str:
         enough information.
         """
 
-    return instruction_prompt_v1
\ No newline at end of file
+INSTRUCTION_PROMPTS = {
+    "v1": INSTRUCTION_PROMPT_V1,
+    "v0": INSTRUCTION_PROMPT_V0,
+}
+DEFAULT_PROMPT_VERSION = "v1"
+
+
+def get_instruction(version: str = DEFAULT_PROMPT_VERSION) -> str:
+    """Returns the instruction prompt for a registered version."""
+    if version not in INSTRUCTION_PROMPTS:
+        raise ValueError(
+            f"Unknown prompt version '{version}'. Available: {', '.join(INSTRUCTION_PROMPTS)}"
+        )
+    return INSTRUCTION_PROMPTS[version]
+
+
+def prompt_fingerprint(version: str = DEFAULT_PROMPT_VERSION) -> str:
+    """Short content hash of a prompt version, recorded in traces."""
+    return hashlib.sha256(get_instruction(version).encode("utf-8")).hexdigest()[:12]
+
+
+def active_prompt_version() -> str:
+    return os.getenv("AGENT_PROMPT_VERSION", DEFAULT_PROMPT_VERSION)
+
+
+def return_instructions_root() -> str:
+    return get_instruction(active_prompt_version())
@@ -0,0 +1,77 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Corpus retrieval primitives shared by the agent tools and the benchmarks.
+
+A retriever is any callable `retrieve(query, top_k, threshold)` returning a
+list of RetrievedChunk ordered from closest to farthest. `vertex_retriever`
+builds one for Vertex AI RAG Engine corpora.
+"""
+
+from dataclasses import dataclass
+from functools import partial
+
+
+@dataclass
+class RetrievedChunk:
+    text: str
+    source_uri: str = ""
+    source_display_name: str = ""
+    # Vector distance to the query (COSINE_DISTANCE): lower is closer
+    distance: float = 0.0
+    # Shard name when retrieved through ai_agent.fanout.FanoutRetriever
+    corpus: str = ""
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English text)."""
+    return (len(text) + 3) // 4
+
+
+def vertex_retrieve(
+    query: str,
+    top_k: int,
+    threshold: float,
+    rag_resources: list,
+) -> list[RetrievedChunk]:
+    """Runs a retrieval query against Vertex AI RAG Engine corpora."""
+    from vertexai.preview import rag
+
+    response = rag.retrieval_query(
+        text=query,
+        rag_resources=rag_resources,
+        similarity_top_k=top_k,
+        vector_distance_threshold=threshold,
+    )
+    return [
+        RetrievedChunk(
+            text=context.text,
+            source_uri=context.source_uri,
+            source_display_name=context.source_display_name,
+            distance=_context_distance(context),
+        )
+        for context in response.contexts.contexts
+    ]
+
+
+def _context_distance(context) -> float:
+    # Newer API versions report the distance in the optional `score` field.
+    # An unset score also reads as 0.0, the distance of an exact match, so
+    # presence is checked rather than the value.
+    return context.score if "score" in context else context.distance
+
+
+def vertex_retriever(rag_corpus: str):
+    """Returns a retriever bound to a single RAG corpus resource name."""
+    from vertexai.preview import rag
+
+    return partial(vertex_retrieve, rag_resources=[rag.RagResource(rag_corpus=rag_corpus)])
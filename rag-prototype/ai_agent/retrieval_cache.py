@@ -0,0 +1,179 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""In-process cache for corpus retrieval results.
+
+Entries are keyed on the normalized query, the retrieval settings, the corpus
+and the corpus generation, so a new import into the corpus invalidates them.
+The cache is bounded (LRU eviction) and entries expire after a TTL.
+"""
+
+import logging
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+from .transient import TransientState
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_EDGE_PUNCTUATION = " \t\n?!.,;:'\""
+
+
+def normalize_query(query: str) -> str:
+    """Folds case, unicode forms, whitespace and trailing punctuation."""
+    query = unicodedata.normalize("NFKC", query).casefold()
+    return _WHITESPACE_RE.sub(" ", query).strip(_EDGE_PUNCTUATION)
+
+
+class RetrievalCache(TransientState):
+    """Thread-safe TTL + LRU cache that tracks hit rate and saved latency."""
+
+    _transient = ("_lock",)
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 600, report_every: int = 100):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.report_every = report_every
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.saved_ms = 0.0
+        self._init_transient()
+
+    def _init_transient(self):
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Returns the cached value or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                self._maybe_report()
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            # A hit saves what the original lookup cost
+            self.saved_ms += entry[2]
+            self._maybe_report()
+            return entry[1]
+
+    def put(self, key, value, latency_ms: float = 0.0):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value, latency_ms)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "saved_ms": round(self.saved_ms, 1),
+        }
+
+    def _maybe_report(self):
+        lookups = self.hits + self.misses
+        if self.report_every and lookups % self.report_every == 0:
+            logger.info("Retrieval cache stats: %s", self.stats())
+
+
+class CorpusGeneration(TransientState):
+    """
+    Caches a corpus generation marker and re-reads it at most every
+    `poll_seconds`, so checking it on every tool call stays cheap. Only the
+    first read blocks; later ones run on a background thread while callers
+    keep getting the previous marker.
+    """
+
+    _transient = ("_lock", "_refreshing")
+
+    def __init__(self, generation_fn, poll_seconds: float = 60):
+        self.generation_fn = generation_fn
+        self.poll_seconds = poll_seconds
+        self._value = None
+        self._checked_at = float("-inf")
+        self._init_transient()
+
+    def _init_transient(self):
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    def refresh(self):
+        """Reads the marker now; on failure the last one is kept."""
+        try:
+            value = self.generation_fn()
+        except Exception as e:
+            # Keep serving with the last marker; the TTL still bounds staleness
+            logger.warning("Could not read corpus generation: %s", e)
+        else:
+            with self._lock:
+                self._value = value
+        finally:
+            with self._lock:
+                self._checked_at = time.monotonic()
+                self._refreshing = False
+        return self._value
+
+    def current(self):
+        with self._lock:
+            if self._refreshing or time.monotonic() - self._checked_at < self.poll_seconds:
+                return self._value
+            self._refreshing = True
+            first_read = self._checked_at == float("-inf")
+        if first_read:
+            return self.refresh()
+        # Listing a large corpus takes a while; tool calls don't wait for it
+        threading.Thread(target=self.refresh, name="corpus-generation", daemon=True).start()
+        return self._value
+
+
+def vertex_corpus_generation(rag_corpus: str, client=None):
+    """
+    Returns a generation_fn for a Vertex AI RAG corpus: its file count and
+    latest file update time. The corpus' own update_time does not change when
+    files are imported, so it cannot be used to invalidate cached results.
+    Every read lists the corpus files; CorpusGeneration bounds how often.
+    """
+    clients = [client] if client is not None else []
+
+    def generation_fn():
+        if not clients:
+            from google.cloud import aiplatform_v1beta1
+
+            location = rag_corpus.split("/")[3]
+            clients.append(aiplatform_v1beta1.VertexRagDataServiceClient(
+                client_options={"api_endpoint": f"{location}-aiplatform.googleapis.com"}
+            ))
+        count, latest = 0, None
+        # The pager fetches the following pages as it is iterated
+        for rag_file in clients[0].list_rag_files(parent=rag_corpus):
+            count += 1
+            if latest is None or rag_file.update_time > latest:
+                latest = rag_file.update_time
+        return (count, str(latest))
+
+    return generation_fn
@@ -0,0 +1,144 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Function-calling retrieval tool with an optional result cache.
+
+Unlike VertexAiRagRetrieval, which hands retrieval to Gemini's built-in RAG
+grounding on Gemini 2 models, this tool always runs retrieval in-process,
+so results can be cached and post-processed before they reach the model.
+Post-processors are callables `(query, chunks) -> chunks` applied in order
+after the (cached) retrieval, e.g. ai_agent.adaptive.AdaptiveCutoff.
+With `prefetch=True` the tool can be served from a speculative retrieval
+started when the user message arrived (see ai_agent.prefetch).
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any
+
+# Not google.adk.tools.retrieval.BaseRetrievalTool: that package imports
+# llama_index, which the agent does not otherwise need
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.tool_context import ToolContext
+from google.genai import types
+
+from .compression import group_by_source
+from .prefetch import RetrievalPrefetcher
+from .retrieval import estimate_tokens
+from .retrieval_cache import normalize_query
+
+logger = logging.getLogger(__name__)
+
+
+class CorpusRetrievalTool(BaseTool):
+    """Retrieval tool backed by a retriever (see ai_agent.retrieval)."""
+
+    def __init__(
+        self,
+        *,
+        name: str,
+        description: str,
+        retriever,
+        similarity_top_k: int,
+        vector_distance_threshold: float,
+        corpus_id: str = "",
+        cache=None,
+        generation=None,
+        postprocessors=(),
+        prefetch: bool = False,
+    ):
+        super().__init__(name=name, description=description)
+        self.retriever = retriever
+        self.similarity_top_k = similarity_top_k
+        self.vector_distance_threshold = vector_distance_threshold
+        self.corpus_id = corpus_id
+        self.cache = cache
+        self.generation = generation
+        self.postprocessors = list(postprocessors)
+        self.prefetcher = RetrievalPrefetcher(self.select) if prefetch else None
+
+    def _get_declaration(self) -> types.FunctionDeclaration:
+        return types.FunctionDeclaration(
+            name=self.name,
+            description=self.description,
+            parameters=types.Schema(
+                type=types.Type.OBJECT,
+                properties={
+                    "query": types.Schema(
+                        type=types.Type.STRING,
+                        description="The query to retrieve.",
+                    ),
+                },
+            ),
+        )
+
+    def _cache_key(self, query: str):
+        generation = self.generation.current() if self.generation else None
+        return (
+            self.corpus_id,
+            generation,
+            self.similarity_top_k,
+            self.vector_distance_threshold,
+            normalize_query(query),
+        )
+
+    def retrieve(self, query: str) -> list:
+        """Returns the chunks for a query, from the cache when possible."""
+        key = self._cache_key(query) if self.cache is not None else None
+        if key is not None:
+            chunks = self.cache.get(key)
+            if chunks is not None:
+                return chunks
+
+        start = time.perf_counter()
+        chunks = self.retriever(query, self.similarity_top_k, self.vector_distance_threshold)
+        latency_ms = (time.perf_counter() - start) * 1000
+        logger.debug("Retrieved %d chunks in %.0f ms", len(chunks), latency_ms)
+
+        if key is not None:
+            self.cache.put(key, chunks, latency_ms)
+        return chunks
+
+    def select(self, query: str) -> list:
+        """Retrieves and post-processes the chunks that go to the model."""
+        retrieved = self.retrieve(query)
+        chunks = retrieved
+        for postprocess in self.postprocessors:
+            chunks = postprocess(query, chunks)
+        logger.info(
+            "Retrieval context: %d/%d chunks, ~%d tokens",
+            len(chunks),
+            len(retrieved),
+            sum(estimate_tokens(chunk.text) for chunk in chunks),
+        )
+        return chunks
+
+    async def run_async(self, *, args: dict[str, Any], tool_context: ToolContext) -> Any:
+        chunks = None
+        if self.prefetcher is not None:
+            chunks = await self.prefetcher.take(tool_context.invocation_id, args["query"])
+        if chunks is None:
+            # The retrievers are blocking network calls, keep them off the event loop
+            chunks = await asyncio.to_thread(self.select, args["query"])
+        return self.format_result(chunks)
+
+    def format_result(self, chunks: list) -> Any:
+        """The tool result the model sees for the selected chunks."""
+        if not chunks:
+            return (
+                "No matching result found with the config: "
+                f"similarity_top_k={self.similarity_top_k}, "
+                f"vector_distance_threshold={self.vector_distance_threshold}"
+            )
+        # One entry per source file, so each file is cited once
+        return group_by_source(chunks)
@@ -0,0 +1,197 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Local fast-path intent routing in front of the agent.
+
+Whole-message regex rules recognize small talk (greetings, thanks, goodbyes,
+"what can you do"), which is answered from templates without calling Gemini.
+A small nearest-centroid model over hashed character n-grams flags corpus
+questions so retrieval can start without waiting for the model to plan the
+tool call (see router_callbacks.py). Anything the router is unsure about is
+left to the model, as before.
+"""
+
+import logging
+import re
+import threading
+import zlib
+from collections import Counter
+
+import numpy as np
+
+from .transient import TransientState
+
+logger = logging.getLogger(__name__)
+
+GREETING = "greeting"
+THANKS = "thanks"
+GOODBYE = "goodbye"
+CAPABILITIES = "capabilities"
+CORPUS_QUESTION = "corpus_question"
+UNKNOWN = "unknown"
+
+SMALL_TALK_INTENTS = (GREETING, THANKS, GOODBYE, CAPABILITIES)
+
+# Rules match the whole (normalized) message, so "hi, what was the operating
+# margin" is not mistaken for a greeting, nor "how do I say goodbye" for a
+# goodbye. Goodbyes may follow a short sign-off ("ok", "thanks, that's all").
+# Rules are tried in order: a question of four or more words that no
+# small-talk rule took is a corpus question, unless it trails off at "about",
+# "you" or "me" ("what do you know about", "can you help me") or asks how
+# the assistant is doing.
+_RULES = [
+    (GREETING, re.compile(
+        r"^(hi|hello|hey|hiya|yo|howdy|good (morning|afternoon|evening)|greetings)( there| again| all| everyone)?"
+        r"( how are you( doing)?( today)?)?$|^how are you( doing)?( today)?$|^how's it going$"
+    )),
+    (CAPABILITIES, re.compile(
+        r"^(what can you do|who are you|what are you|help|how can you help( me)?|what can i ask( you)?"
+        r"|what documents do you have|what is this chatbot for)$"
+    )),
+    (GOODBYE, re.compile(
+        r"^((ok(ay)?|alright|great|thanks?|thank you|i'm done|that's (it|all)( i need(ed)?)?) )*"
+        r"(good ?bye|bye( bye)?|see you( later| soon)?|farewell|talk to you later|have a (good|nice|great) (day|one))$"
+        r"|^(thanks?|thank you)\b.*\b(good ?bye|bye)$"
+    )),
+    (THANKS, re.compile(
+        r"^(ok(ay)? |great |perfect |awesome |that was (very )?helpful )?(thanks?|thank you|thx|ty|cheers)( (so|very) much| a lot)?$"
+        r"|^(thanks?|thank you)\b.*\b(all|everything) i (need|needed|wanted)$"
+    )),
+    (CORPUS_QUESTION, re.compile(
+        r"^(?!how are you )(what|which|who|whose|when|where|why|how|did|does|do|is|are|was|were|has|have|had"
+        r"|can|could|will|would|should|explain|summari[sz]e|describe|list|compare)( \S+){3,}"
+        r"(?<! about)(?<! you)(?<! yourself)(?<! me)$"
+    )),
+]
+
+# Labelled examples for the centroid model. The small-talk centroids keep
+# casual messages from being flagged as corpus questions.
+_TRAINING_EXAMPLES = {
+    GREETING: [
+        "hi there", "hello!", "hey, how are you?", "good morning", "how's it going",
+        "hi, how are you doing today", "yo", "hello again",
+    ],
+    THANKS: [
+        "thanks!", "thank you so much", "great, thanks", "that was helpful, thank you",
+        "awesome thanks", "perfect, thank you",
+    ],
+    GOODBYE: [
+        "bye", "goodbye!", "see you later", "thanks, that's all I needed. goodbye",
+        "ok bye", "talk to you later", "I'm done, bye",
+    ],
+    CAPABILITIES: [
+        "what can you do?", "who are you", "what do you know about", "how can you help me",
+        "what is this chatbot for", "what documents do you have",
+    ],
+    CORPUS_QUESTION: [
+        "what was the operating margin", "how did revenue change year over year",
+        "what are the main risk factors", "how much was capital expenditure",
+        "according to the report, what drove cloud growth",
+        "what does the document say about AI investments",
+        "summarize the MD&A section", "what were total revenues in 2024",
+        "explain the share repurchase program", "what is the effective tax rate",
+    ],
+}
+
+TEMPLATES = {
+    GREETING: "Hello! I can answer questions about the documents in my knowledge base. What would you like to know?",
+    THANKS: "You're welcome! Let me know if you have any other questions about the documents.",
+    GOODBYE: "Goodbye! Feel free to come back any time you have questions about the documents.",
+    CAPABILITIES: (
+        "I'm an assistant for the documents in my knowledge base. Ask me a specific question "
+        "about them and I'll answer with citations to the source files."
+    ),
+}
+
+# Small talk is short; longer messages go straight to the corpus path
+_MAX_SMALL_TALK_WORDS = 12
+_NGRAM_SIZES = (3, 4)
+_DIM = 2048
+_WORD_RE = re.compile(r"[\w'&]+")
+
+
+def _normalize(message: str) -> str:
+    return " ".join(_WORD_RE.findall(message.casefold()))
+
+
+def _features(texts: list[str]) -> np.ndarray:
+    """L2-normalized hashed character n-gram counts, one row per text."""
+    rows, cols = [], []
+    for row, text in enumerate(texts):
+        padded = f" {text} "
+        for n in _NGRAM_SIZES:
+            for i in range(len(padded) - n + 1):
+                rows.append(row)
+                cols.append(zlib.crc32(padded[i:i + n].encode()) % _DIM)
+    flat = np.asarray(rows, dtype=np.intp) * _DIM + np.asarray(cols, dtype=np.intp)
+    matrix = np.bincount(flat, minlength=len(texts) * _DIM).astype(np.float32).reshape(len(texts), _DIM)
+    return matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+
+
+class IntentRouter(TransientState):
+    """Classifies user messages and keeps routing statistics."""
+
+    _transient = ("_lock",)
+
+    def __init__(self, min_confidence: float = 0.35, min_margin: float = 0.05):
+        self.min_confidence = min_confidence
+        self.min_margin = min_margin
+        self.labels = list(_TRAINING_EXAMPLES)
+        centroids = np.stack([
+            _features([_normalize(text) for text in _TRAINING_EXAMPLES[label]]).mean(axis=0)
+            for label in self.labels
+        ])
+        self.centroids = centroids / np.linalg.norm(centroids, axis=1, keepdims=True)
+        self.counts = Counter()
+        self._init_transient()
+
+    def _init_transient(self):
+        self._lock = threading.Lock()
+
+    def classify(self, message: str) -> str:
+        text = _normalize(message)
+        if not text:
+            return UNKNOWN
+        if text.count(" ") + 1 > _MAX_SMALL_TALK_WORDS:
+            return CORPUS_QUESTION
+        for intent, pattern in _RULES:
+            if pattern.search(text):
+                return intent
+
+        # The model only flags corpus questions. A template reply needs a rule
+        # match: "what is the thank you note policy" is close to the thanks
+        # examples but is a question for the corpus.
+        scores = self.centroids @ _features([text])[0]
+        best, second = np.argsort(scores)[::-1][:2]
+        if scores[best] < self.min_confidence or scores[best] - scores[second] < self.min_margin:
+            return UNKNOWN
+        return CORPUS_QUESTION if self.labels[best] == CORPUS_QUESTION else UNKNOWN
+
+    def route(self, message: str) -> str:
+        """classify() plus bookkeeping for the short-circuit share."""
+        intent = self.classify(message)
+        with self._lock:
+            self.counts[intent] += 1
+            total = sum(self.counts.values())
+        if total % 100 == 0:
+            logger.info("Intent routing stats: %s", self.stats())
+        return intent
+
+    def stats(self) -> dict:
+        total = sum(self.counts.values())
+        short_circuited = sum(self.counts[intent] for intent in SMALL_TALK_INTENTS)
+        return {
+            "messages": total,
+            "short_circuited": short_circuited,
+            "short_circuit_share": short_circuited / total if total else 0.0,
+            "by_intent": dict(self.counts),
+        }
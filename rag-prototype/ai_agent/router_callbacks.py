@@ -0,0 +1,152 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Agent callbacks that put the IntentRouter in front of the agent."""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.genai import types
+
+from .router import (
+    CORPUS_QUESTION,
+    SMALL_TALK_INTENTS,
+    TEMPLATES,
+    UNKNOWN,
+    IntentRouter,
+)
+from .transient import TransientState
+
+# Session state key set when retrieval was injected by the router. It shows
+# up in the answer event's state delta, which is how evaluate.py attributes
+# the retrieval time of queries without a model-planned tool call.
+ROUTED_RETRIEVAL_STATE_KEY = "routed_retrieval"
+
+
+def _user_text(content: types.Content | None) -> str:
+    if content is None:
+        return ""
+    return " ".join(part.text for part in content.parts or [] if part.text)
+
+
+def _after_user_message(contents: list[types.Content]) -> int:
+    """Index just past the latest user message (not a tool response)."""
+    for index in range(len(contents) - 1, -1, -1):
+        if contents[index].role == "user" and _user_text(contents[index]):
+            return index + 1
+    return len(contents)
+
+
+class RoutingCallbacks(TransientState):
+    """
+    before_agent answers small talk from templates, which ends the turn
+    without a model call. For corpus questions, before_model runs retrieval on
+    the first model call of the turn and adds the result to the request as a
+    completed tool call, saving the model's tool-planning round trip. The
+    injected call is not a session event, so it is added again to every later
+    model call of the turn (after the model's own tool calls, say).
+    If the tool has a prefetcher, retrieval for corpus questions and unclear
+    messages starts in before_agent, and after_agent discards what was unused.
+    `retrieval_tool` is the agent's CorpusRetrievalTool.
+    """
+
+    _transient = ("_lock",)
+
+    def __init__(self, router: IntentRouter, retrieval_tool, max_tracked: int = 10000):
+        self.router = router
+        self.retrieval_tool = retrieval_tool
+        self.max_tracked = max_tracked
+        # invocation_id -> user query, for corpus questions awaiting retrieval
+        self._pending = OrderedDict()
+        # invocation_id -> the injected call and response contents
+        self._injected = OrderedDict()
+        self._init_transient()
+
+    def _init_transient(self):
+        self._lock = threading.Lock()
+
+    def before_agent(self, callback_context: CallbackContext) -> types.Content | None:
+        message = _user_text(callback_context.user_content)
+        intent = self.router.route(message)
+        if intent in SMALL_TALK_INTENTS:
+            # Answer from a template; the agent (and Gemini) is skipped entirely
+            return types.Content(role="model", parts=[types.Part(text=TEMPLATES[intent])])
+        prefetcher = self.retrieval_tool.prefetcher
+        if prefetcher is not None and intent in (CORPUS_QUESTION, UNKNOWN):
+            # Retrieval runs while the model plans; the tool call picks it up
+            prefetcher.start(callback_context.invocation_id, message)
+        if intent == CORPUS_QUESTION:
+            with self._lock:
+                self._pending[callback_context.invocation_id] = message
+                while len(self._pending) > self.max_tracked:
+                    self._pending.popitem(last=False)
+        return None
+
+    def after_agent(self, callback_context: CallbackContext) -> types.Content | None:
+        with self._lock:
+            self._pending.pop(callback_context.invocation_id, None)
+            self._injected.pop(callback_context.invocation_id, None)
+        if self.retrieval_tool.prefetcher is not None:
+            self.retrieval_tool.prefetcher.discard(callback_context.invocation_id)
+        return None
+
+    async def before_model(self, callback_context: CallbackContext, llm_request: LlmRequest) -> LlmResponse | None:
+        invocation_id = callback_context.invocation_id
+        with self._lock:
+            injected = self._injected.get(invocation_id)
+            query = self._pending.pop(invocation_id, None) if injected is None else None
+        if injected is None:
+            if query is None:
+                return None
+            injected = await self._retrieve(callback_context, query)
+            with self._lock:
+                self._injected[invocation_id] = injected
+                while len(self._injected) > self.max_tracked:
+                    self._injected.popitem(last=False)
+        # Right after the question, where the model would have called the tool
+        index = _after_user_message(llm_request.contents)
+        llm_request.contents[index:index] = [content.model_copy(deep=True) for content in injected]
+        return None
+
+    async def _retrieve(self, callback_context: CallbackContext, query: str) -> list[types.Content]:
+        """Runs retrieval now and returns it as a completed tool call."""
+        # Retrieve now instead of waiting for the model to plan the tool call,
+        # and hand the result over as if the tool had been called.
+        start = time.perf_counter()
+        chunks = None
+        if self.retrieval_tool.prefetcher is not None:
+            chunks = await self.retrieval_tool.prefetcher.take(callback_context.invocation_id, query)
+        if chunks is None:
+            chunks = await asyncio.to_thread(self.retrieval_tool.select, query)
+        callback_context.state[ROUTED_RETRIEVAL_STATE_KEY] = {
+            "retrieval_ms": round((time.perf_counter() - start) * 1000, 1),
+            "chunks": len(chunks),
+        }
+        name = self.retrieval_tool.name
+        return [
+            types.Content(
+                role="model",
+                parts=[types.Part(function_call=types.FunctionCall(name=name, args={"query": query}))],
+            ),
+            types.Content(
+                role="user",
+                parts=[types.Part(function_response=types.FunctionResponse(
+                    name=name,
+                    # Same payload as a real call: ADK wraps non-dict tool results in "result"
+                    response={"result": self.retrieval_tool.format_result(chunks)},
+                ))],
+            ),
+        ]
@@ -0,0 +1,111 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Per-turn token accounting for model calls.
+
+Splits every model request into instruction, history and retrieval parts and
+records the estimate, plus the token usage the model reports back (including
+tokens served from the context cache), on the current trace span.
+"""
+
+import json
+import logging
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from opentelemetry import trace
+
+from .retrieval import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+
+def instruction_text(system_instruction) -> str:
+    """Plain text of a system instruction given as a string or Content."""
+    if system_instruction is None:
+        return ""
+    if isinstance(system_instruction, str):
+        return system_instruction
+    parts = getattr(system_instruction, "parts", None) or []
+    return "".join(part.text or "" for part in parts)
+
+
+def _part_tokens(part) -> int:
+    if part.text:
+        return estimate_tokens(part.text)
+    if part.function_call:
+        return estimate_tokens(json.dumps(part.function_call.args or {}, default=str))
+    if part.function_response:
+        return estimate_tokens(json.dumps(part.function_response.response or {}, default=str))
+    return 0
+
+
+def request_token_breakdown(llm_request: LlmRequest, retrieval_tool_names) -> dict:
+    """Estimated tokens for the instruction, history and retrieval parts of a request."""
+    config = llm_request.config
+    instruction = estimate_tokens(instruction_text(config.system_instruction if config else None))
+    history = 0
+    retrieval = 0
+    for content in llm_request.contents or []:
+        for part in content.parts or []:
+            tokens = _part_tokens(part)
+            if part.function_response and part.function_response.name in retrieval_tool_names:
+                retrieval += tokens
+            else:
+                history += tokens
+    return {
+        "instruction": instruction,
+        "history": history,
+        "retrieval": retrieval,
+        "total": instruction + history + retrieval,
+    }
+
+
+def _record(prefix: str, values: dict):
+    span = trace.get_current_span()
+    for key, value in values.items():
+        if value is not None:
+            span.set_attribute(f"{prefix}.{key}", value)
+
+
+class TokenAccounting:
+    """Model callbacks that put per-turn token breakdowns into the traces."""
+
+    def __init__(self, retrieval_tool_names, prompt_version: str, prompt_fingerprint: str):
+        self.retrieval_tool_names = set(retrieval_tool_names)
+        self.prompt_version = prompt_version
+        self.prompt_fingerprint = prompt_fingerprint
+
+    def before_model(self, callback_context: CallbackContext, llm_request: LlmRequest) -> LlmResponse | None:
+        breakdown = request_token_breakdown(llm_request, self.retrieval_tool_names)
+        _record("rag.tokens.estimated", breakdown)
+        _record("rag.prompt", {"version": self.prompt_version, "fingerprint": self.prompt_fingerprint})
+        logger.info(
+            "Model call tokens (estimated) invocation=%s prompt=%s %s",
+            callback_context.invocation_id,
+            self.prompt_version,
+            breakdown,
+        )
+        return None
+
+    def after_model(self, callback_context: CallbackContext, llm_response: LlmResponse) -> LlmResponse | None:
+        usage = llm_response.usage_metadata
+        if usage is None:
+            return None
+        reported = {
+            "prompt": usage.prompt_token_count,
+            "cached": usage.cached_content_token_count,
+            "output": usage.candidates_token_count,
+        }
+        _record("rag.tokens.reported", reported)
+        logger.info("Model call tokens (reported) invocation=%s %s", callback_context.invocation_id, reported)
+        return None
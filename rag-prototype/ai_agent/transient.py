@@ -0,0 +1,40 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Copy and pickle support for objects holding per-process state.
+
+Deploying to Agent Engine deep-copies the agent (AdkApp.clone) and then
+cloudpickles it, and neither works on locks, thread pools or asyncio tasks.
+"""
+
+
+class TransientState:
+    """
+    Mixin for the agent's callbacks and retrievers. Attributes named in
+    `_transient` are left out when the object is copied or pickled, and
+    `_init_transient()` rebuilds them; __init__ calls it too.
+    """
+
+    _transient: tuple = ()
+
+    def _init_transient(self):
+        raise NotImplementedError
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in self._transient:
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_transient()
@@ -0,0 +1,335 @@
+"""
+Builds the slim deployment package for Agent Engine.
+
+- Finds the ai_agent modules reachable from agent.py through relative
+  imports and stages only those (no deploy scripts, caches or data files).
+- Resolves the requirements from the third-party modules those files
+  import, instead of a hand-maintained list, pinned to the versions
+  installed here (the ones the import check runs against).
+- Records the package size and measures `import ai_agent.agent` (what
+  Agent Engine loads) from the staged copy with a per-module breakdown
+  (python -X importtime), failing when it is over the import-time budget.
+  The import runs in a virtualenv holding only those requirements, as on
+  Agent Engine: packages installed here for other tools (llama-index pulls
+  itself into `google.adk` imports when present) would otherwise count.
+
+deploy.py runs this before every deploy. It can also run on its own:
+
+    uv run python ai_agent/vertex_engine_deploy/agent_package.py
+    uv run python ai_agent/vertex_engine_deploy/agent_package.py --import-budget-ms 7000
+    uv run python ai_agent/vertex_engine_deploy/agent_package.py --local-env
+"""
+
+import argparse
+import ast
+import importlib.metadata
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tomllib
+
+from dotenv import load_dotenv
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+ai_agent_dir = os.path.dirname(script_dir)
+project_root = os.path.dirname(ai_agent_dir)
+
+PACKAGE_NAME = os.path.basename(ai_agent_dir)
+# ai_agent/__init__.py is lazy; the agent module is what a replica imports
+IMPORT_TARGET = f"{PACKAGE_NAME}.agent"
+ENTRY_MODULES = ["__init__.py", "agent.py"]
+BUILD_DIR = os.path.join(project_root, "build", "agent_package")
+REPORT_PATH = os.path.join(project_root, "build", "agent_package.json")
+# Rebuilt only when the requirements change
+IMPORT_ENV_DIR = os.path.join(project_root, "build", "import_env")
+PYPROJECT_PATH = os.path.join(project_root, "pyproject.toml")
+
+# Distribution of each imported module (longest prefix wins). `google` is a
+# namespace shared by several distributions, so it is mapped per subpackage.
+MODULE_DISTRIBUTIONS = {
+    "google.adk": "google-adk",
+    "google.genai": "google-genai",
+    "google.cloud.aiplatform": "google-cloud-aiplatform",
+    "google.cloud.aiplatform_v1beta1": "google-cloud-aiplatform",
+    "vertexai": "google-cloud-aiplatform",
+    "opentelemetry": "opentelemetry-api",
+    "numpy": "numpy",
+    "dotenv": "python-dotenv",
+}
+# The extras carry what AdkApp itself needs on Agent Engine
+REQUIREMENT_EXTRAS = {
+    "google-cloud-aiplatform": "[adk,agent-engines]",
+}
+ALWAYS_REQUIRED = ["google-cloud-aiplatform", "google-adk"]
+# Imported only when a local .env exists, never on Agent Engine (see agent.py)
+LOCAL_ONLY_MODULES = {"dotenv"}
+
+DEFAULT_IMPORT_BUDGET_MS = 6000
+
+_IMPORT_TIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def _relative_target(node, current):
+    """Module files a relative import in `current` (a package-relative path) refers to."""
+    base = os.path.dirname(current)
+    for _ in range(node.level - 1):
+        base = os.path.dirname(base)
+    if node.module:
+        return [os.path.join(base, *node.module.split("."))]
+    return [os.path.join(base, alias.name) for alias in node.names]
+
+
+def agent_modules(package_dir=ai_agent_dir, entries=ENTRY_MODULES):
+    """Package-relative paths of the modules reachable from the entry modules."""
+    found, pending = set(), list(entries)
+    while pending:
+        module = pending.pop()
+        if module in found:
+            continue
+        found.add(module)
+        with open(os.path.join(package_dir, module)) as f:
+            tree = ast.parse(f.read(), filename=module)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.ImportFrom) and node.level:
+                for target in _relative_target(node, module):
+                    for candidate in (target + ".py", os.path.join(target, "__init__.py")):
+                        if os.path.exists(os.path.join(package_dir, candidate)):
+                            pending.append(candidate)
+    return sorted(found)
+
+
+def external_imports(package_dir, modules):
+    """Absolute third-party imports of the modules, including lazy ones in functions."""
+    imported = set()
+    for module in modules:
+        with open(os.path.join(package_dir, module)) as f:
+            tree = ast.parse(f.read(), filename=module)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                imported.update(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and not node.level:
+                # `from google import genai` imports google.genai
+                imported.update(f"{node.module}.{alias.name}" for alias in node.names)
+    return sorted(name for name in imported if name.split(".")[0] not in sys.stdlib_module_names)
+
+
+def distribution_for(module):
+    parts = module.split(".")
+    for end in range(len(parts), 0, -1):
+        distribution = MODULE_DISTRIBUTIONS.get(".".join(parts[:end]))
+        if distribution:
+            return distribution
+    raise ValueError(f"No distribution known for '{module}'. Add it to MODULE_DISTRIBUTIONS in {__file__}.")
+
+
+def _canonical(name):
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def _pyproject_requirement(distribution, pyproject_path=PYPROJECT_PATH):
+    """The pyproject.toml dependency line for a distribution, or None."""
+    with open(pyproject_path, "rb") as f:
+        dependencies = tomllib.load(f)["project"]["dependencies"]
+    for line in dependencies:
+        if _canonical(re.match(r"[A-Za-z0-9._-]+", line).group()) == _canonical(distribution):
+            return line
+    return None
+
+
+def requirement_for(distribution, pyproject_path=PYPROJECT_PATH):
+    """
+    Requirement line pinned to the installed version. Without a local install
+    the pyproject.toml constraint is used, so the pin never drops below the
+    project's floor.
+    """
+    extras = REQUIREMENT_EXTRAS.get(distribution, "")
+    try:
+        return f"{distribution}{extras}=={importlib.metadata.version(distribution)}"
+    except importlib.metadata.PackageNotFoundError:
+        return _pyproject_requirement(distribution, pyproject_path) or f"{distribution}{extras}"
+
+
+def resolve_requirements(imports, pyproject_path=PYPROJECT_PATH):
+    """Requirement lines for the imported modules (local-only modules left out)."""
+    distributions = set(ALWAYS_REQUIRED)
+    for module in imports:
+        if module.split(".")[0] not in LOCAL_ONLY_MODULES:
+            distributions.add(distribution_for(module))
+    return [requirement_for(distribution, pyproject_path) for distribution in sorted(distributions)]
+
+
+def stage_package(modules, package_dir=ai_agent_dir, build_dir=BUILD_DIR):
+    """Copies the modules into build_dir/<package>; returns the staged path and its size."""
+    staged = os.path.join(build_dir, PACKAGE_NAME)
+    shutil.rmtree(build_dir, ignore_errors=True)
+    files = {}
+    for module in modules:
+        target = os.path.join(staged, module)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copy2(os.path.join(package_dir, module), target)
+        files[module] = os.path.getsize(target)
+    return staged, files
+
+
+def _dir_size(path):
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, dirs, names in os.walk(path)
+        if "__pycache__" not in root
+        for name in names
+    )
+
+
+def import_env(requirements, env_dir=IMPORT_ENV_DIR):
+    """
+    Python executable of a virtualenv with exactly `requirements` installed.
+    The env is reused while the requirements are unchanged.
+    """
+    python = os.path.join(env_dir, "bin", "python")
+    marker = os.path.join(env_dir, "requirements.txt")
+    wanted = "\n".join(requirements) + "\n"
+    if os.path.exists(marker):
+        with open(marker) as f:
+            if f.read() == wanted:
+                return python
+    shutil.rmtree(env_dir, ignore_errors=True)
+    print(f"🐍 Building the import-check environment in {env_dir}")
+    os.makedirs(env_dir)
+    requirements_path = os.path.join(env_dir, "requirements.in")
+    with open(requirements_path, "w") as f:
+        f.write(wanted)
+    subprocess.run([sys.executable, "-m", "venv", env_dir], check=True)
+    subprocess.run([python, "-m", "pip", "install", "--quiet", "-r", requirements_path], check=True)
+    # Written last, so an interrupted install is redone next time
+    with open(marker, "w") as f:
+        f.write(wanted)
+    return python
+
+
+def measure_import(staged_dir, python=sys.executable, runs=3, top=15):
+    """
+    Imports the staged package in fresh `python` interpreters. Returns the
+    best total (ms) and, from that run, the slowest modules by cumulative
+    time and the package's own modules by self time.
+    """
+    code = (
+        "import time; start = time.perf_counter(); "
+        f"import {IMPORT_TARGET}; "
+        "print((time.perf_counter() - start) * 1000)"
+    )
+    best = None
+    for _ in range(runs):
+        # A fresh interpreter without bytecode caches, as on a new replica
+        result = subprocess.run(
+            [python, "-X", "importtime", "-B", "-W", "ignore", "-c", code],
+            cwd=os.path.dirname(staged_dir),
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"import {IMPORT_TARGET} failed:\n{result.stderr[-2000:]}")
+        total_ms = float(result.stdout.strip().splitlines()[-1])
+        if best is None or total_ms < best[0]:
+            best = (total_ms, result.stderr)
+
+    total_ms, trace = best
+    rows = []
+    for line in trace.splitlines():
+        match = _IMPORT_TIME_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append({"module": name, "self_ms": int(self_us) / 1000, "cumulative_ms": int(cumulative_us) / 1000, "depth": len(indent) // 2})
+    # Self time of the package's own modules is the part this repo controls
+    own = [row for row in rows if row["module"] == PACKAGE_NAME or row["module"].startswith(PACKAGE_NAME + ".")]
+    slowest = sorted((row for row in rows if row["depth"] <= 4), key=lambda row: -row["cumulative_ms"])[:top]
+    return {
+        "total_ms": total_ms,
+        "slowest_modules": slowest,
+        "own_modules": sorted(own, key=lambda row: -row["self_ms"]),
+    }
+
+
+def build_package(build_dir=BUILD_DIR, measure=True, import_runs=3, local_env=False):
+    """
+    Stages the package and returns the packaging report. With `local_env`
+    the import is measured with this interpreter, which is quicker but
+    includes whatever else is installed here.
+    """
+    modules = agent_modules()
+    imports = external_imports(ai_agent_dir, modules)
+    requirements = resolve_requirements(imports)
+    staged, files = stage_package(modules, build_dir=build_dir)
+    report = {
+        "staged_dir": staged,
+        "modules": files,
+        "package_bytes": sum(files.values()),
+        "source_dir_bytes": _dir_size(ai_agent_dir),
+        "imports": imports,
+        "requirements": requirements,
+    }
+    if measure:
+        python = sys.executable if local_env else import_env(requirements)
+        report["import"] = {"python": python, **measure_import(staged, python=python, runs=import_runs)}
+    return report
+
+
+def print_report(report):
+    print(f"📦 Staged {len(report['modules'])} modules in {report['staged_dir']}")
+    print(f"   {report['package_bytes'] / 1024:.1f} KB (the ai_agent folder is {report['source_dir_bytes'] / 1024:.1f} KB)")
+    print(f"📋 Requirements: {', '.join(report['requirements'])}")
+    if "import" in report:
+        measured = report["import"]
+        print(f"\n⏱️  import {IMPORT_TARGET}: {measured['total_ms']:.0f} ms (best run, {measured['python']})")
+        print(f"   {'cumulative ms':>13} {'self ms':>8}  module")
+        for row in measured["slowest_modules"]:
+            print(f"   {row['cumulative_ms']:>13.1f} {row['self_ms']:>8.1f}  {'  ' * row['depth']}{row['module']}")
+        own_ms = sum(row["self_ms"] for row in measured["own_modules"])
+        print(f"   {PACKAGE_NAME} modules themselves: {own_ms:.1f} ms")
+
+
+def check_import_budget(report, budget_ms):
+    """Error message when the import time is over the budget, else None."""
+    total_ms = report["import"]["total_ms"]
+    if total_ms > budget_ms:
+        return f"import {IMPORT_TARGET} took {total_ms:.0f} ms, over the {budget_ms:.0f} ms budget"
+    return None
+
+
+def write_report(report, path=REPORT_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n📝 Wrote {path}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--import-budget-ms", type=float,
+                        default=float(os.getenv("AGENT_IMPORT_BUDGET_MS", DEFAULT_IMPORT_BUDGET_MS)))
+    parser.add_argument("--import-runs", type=int, default=3)
+    parser.add_argument("--no-measure", action="store_true", help="Skip the import-time measurement")
+    parser.add_argument("--local-env", action="store_true",
+                        help="Measure the import with this interpreter instead of a clean virtualenv")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    # The staged agent reads its settings from the environment
+    load_dotenv(os.path.join(project_root, ".env"))
+    report = build_package(measure=not args.no_measure, import_runs=args.import_runs, local_env=args.local_env)
+    print_report(report)
+    write_report(report)
+    if not args.no_measure:
+        error = check_import_budget(report, args.import_budget_ms)
+        if error:
+            print(f"❌ {error}")
+            sys.exit(1)
+        print(f"✅ Within the {args.import_budget_ms:.0f} ms import budget")
+
+
+if __name__ == "__main__":
+    main()
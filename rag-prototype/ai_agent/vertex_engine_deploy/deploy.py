@@ -1,7 +1,14 @@
-import sys
-import os
+import argparse
+import json
 import logging
-from dotenv import set_key
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+
+from dotenv import load_dotenv, set_key
 
 # --- PATH SETUP ---
 # 1. Get the folder where THIS script lives (.../ai_agent/vertex_engine_deploy)
@@ -16,36 +23,218 @@ project_root = os.path.dirname(ai_agent_dir)
 # 4. Add Project Root to Python path
 # This allows us to do "from ai_agent.agent import ..."
 sys.path.insert(0, project_root)
+
+# 5. Add this folder for the packaging step (agent_package.py)
+sys.path.insert(0, script_dir)
 # ------------------
 
-import vertexai
-from vertexai import agent_engines
-from vertexai.preview.reasoning_engines import AdkApp
+from agent_package import (  # noqa: E402
+    DEFAULT_IMPORT_BUDGET_MS,
+    build_package,
+    check_import_budget,
+    print_report,
+    write_report,
+)
 
-# --- IMPORT FIX: Import directly from ai_agent package ---
-try:
-    from ai_agent.agent import root_agent
-    print(f"✅ Successfully imported root_agent from ai_agent")
-except ImportError as e:
-    print(f"❌ Error importing agent: {e}")
-    print(f"   Ensure 'agent.py' exists in: {ai_agent_dir}")
-    sys.exit(1)
+from ai_agent.stats import percentile  # noqa: E402
 
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-GOOGLE_CLOUD_PROJECT = os.getenv("GOOGLE_CLOUD_PROJECT")
-GOOGLE_CLOUD_LOCATION = os.getenv("GOOGLE_CLOUD_LOCATION")
-STAGING_BUCKET = os.getenv("STAGING_BUCKET")
-
 # .env path (Inside rag-prototype)
 ENV_FILE_PATH = os.path.join(project_root, ".env")
+PROFILES_FILE_PATH = os.path.join(script_dir, "performance_profiles.json")
+
+# Settings ai_agent/agent.py reads from the environment. The deployed agent
+# cannot read the local .env, so the ones set here are passed at deploy time.
+AGENT_ENV_VARS = [
+    "RAG_CORPUS",
+    "RAG_CORPORA",
+    "RAG_SHARD_TIMEOUT_SECONDS",
+    "RAG_SHARD_MERGE",
+    "RAG_CACHE_MAX_ENTRIES",
+    "RAG_CACHE_TTL_SECONDS",
+    "RAG_RETRIEVAL_MODE",
+    "RAG_CONTEXT_TOKEN_BUDGET",
+    "RAG_CONTEXT_COMPRESSION",
+    "AGENT_RETRIEVAL_PREFETCH",
+    "AGENT_PROMPT_VERSION",
+    "AGENT_CONTEXT_CACHE",
+    "AGENT_CONTEXT_CACHE_MIN_TOKENS",
+    "AGENT_HISTORY_MAX_TURNS",
+    "AGENT_HISTORY_SUMMARY_TOKENS",
+]
+
+# Agent Engine deployment limits
+CPU_VALUES = {"1", "2", "4", "6", "8"}
+MAX_MEMORY_GI = 32
+MAX_MIN_INSTANCES = 10
+MAX_MAX_INSTANCES = 1000
+
+# Synthetic warm-up queries: corpus questions, so retrieval and generation are exercised
+WARMUP_QUERIES = [
+    "What are the main topics covered in the documents?",
+    "Summarize the key financial results reported in the documents.",
+    "Which risks do the documents describe as most significant?",
+    "What do the documents say about future investments?",
+]
+
+
+@dataclass
+class WarmupSettings:
+    # Concurrent warm-up queries; at least min_instances spreads them over the replicas
+    concurrency: int = 4
+    queries_per_round: int = 8
+    # 0 skips the warm-up
+    max_rounds: int = 6
+    # Latency has settled once a round's p50 is within this fraction of the previous one
+    settle_tolerance: float = 0.15
+    measure_queries: int = 20
+    # The deploy fails if the warmed p95 query latency is above this (None: no budget)
+    p95_budget_ms: float | None = None
+
+
+@dataclass
+class PerformanceProfile:
+    name: str
+    min_instances: int = 1
+    max_instances: int = 100
+    # Concurrent requests per replica (Agent Engine recommends 2 * cpu + 1)
+    container_concurrency: int = 9
+    cpu: str = "4"
+    memory: str = "4Gi"
+    warmup: WarmupSettings = field(default_factory=WarmupSettings)
+
+    def __post_init__(self):
+        self.cpu = str(self.cpu)
+        if isinstance(self.warmup, dict):
+            self.warmup = WarmupSettings(**self.warmup)
+        self.validate()
+
+    def validate(self):
+        """Raises ValueError for settings Agent Engine would reject."""
+        if not 0 <= self.min_instances <= MAX_MIN_INSTANCES:
+            raise ValueError(f"min_instances must be between 0 and {MAX_MIN_INSTANCES}, got {self.min_instances}")
+        if not 1 <= self.max_instances <= MAX_MAX_INSTANCES:
+            raise ValueError(f"max_instances must be between 1 and {MAX_MAX_INSTANCES}, got {self.max_instances}")
+        if self.min_instances > self.max_instances:
+            raise ValueError(f"min_instances ({self.min_instances}) is above max_instances ({self.max_instances})")
+        if self.container_concurrency < 1:
+            raise ValueError(f"container_concurrency must be at least 1, got {self.container_concurrency}")
+        if self.cpu not in CPU_VALUES:
+            raise ValueError(f"cpu must be one of {sorted(CPU_VALUES, key=int)}, got {self.cpu!r}")
+        if not self.memory.endswith("Gi") or not self.memory[:-2].isdigit() or not 1 <= int(self.memory[:-2]) <= MAX_MEMORY_GI:
+            raise ValueError(f"memory must be between 1Gi and {MAX_MEMORY_GI}Gi, got {self.memory!r}")
+        if self.warmup.max_rounds > 0 and min(self.warmup.concurrency, self.warmup.queries_per_round, self.warmup.measure_queries) < 1:
+            raise ValueError("warmup concurrency, queries_per_round and measure_queries must be at least 1")
+
+    def deploy_kwargs(self) -> dict:
+        """Scaling and resource arguments for agent_engines.create."""
+        return {
+            "min_instances": self.min_instances,
+            "max_instances": self.max_instances,
+            "container_concurrency": self.container_concurrency,
+            "resource_limits": {"cpu": self.cpu, "memory": self.memory},
+        }
+
+
+def load_profile(name: str, path: str = PROFILES_FILE_PATH) -> PerformanceProfile:
+    """Reads one named profile from the profiles JSON file."""
+    with open(path) as f:
+        profiles = json.load(f)
+    if name not in profiles:
+        raise ValueError(f"Unknown performance profile {name!r} in {path}, expected one of {sorted(profiles)}")
+    return PerformanceProfile(name=name, **profiles[name])
+
+
+def agent_env_vars() -> dict:
+    return {name: os.environ[name] for name in AGENT_ENV_VARS if os.getenv(name)}
+
+
+def deploy(client, app, profile: PerformanceProfile, env_vars: dict, package: dict):
+    """
+    Creates the Agent Engine through `client` (vertexai.agent_engines or a
+    fake). `package` is the report of agent_package.build_package.
+    """
+    logger.debug("deploying agent to agent engine:")
+    return client.create(
+        app,
+        requirements=package["requirements"],
+        # The staged copy of 'ai_agent' (only the modules root_agent imports),
+        # so the cloud can resolve imports
+        extra_packages=[
+            package["staged_dir"],
+        ],
+        env_vars=env_vars,
+        **profile.deploy_kwargs(),
+    )
+
+
+def timed_query(remote_app, message: str) -> float | None:
+    """End-to-end latency of one query in ms, or None if it failed."""
+    start = time.perf_counter()
+    try:
+        for _ in remote_app.stream_query(user_id=f"warmup-{uuid.uuid4().hex[:8]}", message=message):
+            pass
+    except Exception as e:
+        logger.warning("Warm-up query failed: %s", e)
+        return None
+    return (time.perf_counter() - start) * 1000
+
+
+def warm_up(remote_app, settings: WarmupSettings, queries=WARMUP_QUERIES) -> dict:
+    """
+    Sends rounds of synthetic queries until the round p50 settles, then
+    measures the warmed latency. Returns the warm-up summary.
+    """
+    def run_batch(pool, count, offset):
+        return list(pool.map(lambda i: timed_query(remote_app, queries[(offset + i) % len(queries)]), range(count)))
+
+    rounds = []
+    settled = False
+    with ThreadPoolExecutor(max_workers=settings.concurrency) as pool:
+        for number in range(settings.max_rounds):
+            latencies = [latency for latency in run_batch(pool, settings.queries_per_round, number) if latency is not None]
+            p50 = percentile(latencies, 50)
+            rounds.append(p50)
+            print(f"🔥 Warm-up round {number + 1}: p50 {p50:.0f} ms ({settings.queries_per_round - len(latencies)} failed)")
+            if len(rounds) > 1 and rounds[-2] and abs(p50 - rounds[-2]) / rounds[-2] <= settings.settle_tolerance:
+                settled = True
+                break
+        measured = run_batch(pool, settings.measure_queries, 0)
+
+    ok = [latency for latency in measured if latency is not None]
+    return {
+        "rounds": len(rounds),
+        "round_p50_ms": rounds,
+        "settled": settled,
+        "queries": len(measured),
+        "errors": len(measured) - len(ok),
+        "p50_ms": percentile(ok, 50),
+        "p95_ms": percentile(ok, 95),
+        "p95_budget_ms": settings.p95_budget_ms,
+    }
+
+
+def check_warmup(summary: dict) -> list[str]:
+    """Reasons the warmed deployment fails its profile (empty if it passes)."""
+    failures = []
+    if summary["errors"]:
+        failures.append(f"{summary['errors']} of {summary['queries']} measured queries failed")
+    budget = summary["p95_budget_ms"]
+    if budget is not None and summary["p95_ms"] > budget:
+        failures.append(f"warmed p95 {summary['p95_ms']:.0f} ms is over the {budget:.0f} ms budget")
+    return failures
+
+
+def delete_engine(remote_app):
+    """Deletes a deployed engine (and its sessions) that should not serve traffic."""
+    try:
+        remote_app.delete(force=True)
+        print(f"🗑️  Deleted Agent Engine {remote_app.resource_name}")
+    except Exception as e:
+        print(f"⚠️  Could not delete Agent Engine {remote_app.resource_name}: {e}")
 
-vertexai.init(
-    project=GOOGLE_CLOUD_PROJECT,
-    location=GOOGLE_CLOUD_LOCATION,
-    staging_bucket=STAGING_BUCKET,
-)
 
 def update_env_file(agent_engine_id, env_file_path):
     """Updates the .env file with the agent engine ID."""
@@ -55,31 +244,102 @@ def update_env_file(agent_engine_id, env_file_path):
     except Exception as e:
         print(f"Error updating .env file: {e}")
 
-logger.info("deploying app...")
-app = AdkApp(
-    agent=root_agent,
-    enable_tracing=True,
-)
 
-logging.debug("deploying agent to agent engine:")
-
-remote_app = agent_engines.create(
-    app,
-    requirements=[
-        "google-cloud-aiplatform[adk,agent-engines]==1.108.0",
-        "google-adk==1.10.0",
-        "python-dotenv",
-        "google-auth",
-        "tqdm",
-        "requests",
-        "llama-index",
-    ],
-    # We upload the entire 'ai_agent' folder so the cloud can resolve imports
-    extra_packages=[
-        ai_agent_dir, 
-    ],
-)
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Deploys ai_agent to Vertex AI Agent Engine.")
+    parser.add_argument("--profile", default=os.getenv("AGENT_DEPLOY_PROFILE", "default"),
+                        help=f"Performance profile in {os.path.basename(PROFILES_FILE_PATH)}")
+    parser.add_argument("--profiles-file", default=PROFILES_FILE_PATH)
+    parser.add_argument("--skip-warmup", action="store_true")
+    parser.add_argument("--keep-failed", action="store_true",
+                        help="Keep an engine that fails its performance profile instead of deleting it")
+    parser.add_argument("--import-budget-ms", type=float,
+                        default=float(os.getenv("AGENT_IMPORT_BUDGET_MS", DEFAULT_IMPORT_BUDGET_MS)),
+                        help="Fail before deploying if 'import ai_agent.agent' takes longer")
+    parser.add_argument("--skip-import-check", action="store_true")
+    parser.add_argument("--local-import-env", action="store_true",
+                        help="Measure the import with this interpreter instead of a clean virtualenv")
+    parser.add_argument("--dry-run", action="store_true", help="Print the deploy settings without deploying")
+    return parser.parse_args(argv)
+
+
+def main(argv=None, client=None, app=None):
+    """
+    Deploys, warms up and checks the deployment. `client` and `app` default
+    to vertexai.agent_engines and an AdkApp around root_agent.
+    """
+    load_dotenv(ENV_FILE_PATH)
+    args = parse_args(argv)
+    profile = load_profile(args.profile, args.profiles_file)
+    print(f"📐 Performance profile '{profile.name}': {json.dumps(asdict(profile))}")
+
+    if app is None:
+        from vertexai.preview.reasoning_engines import AdkApp
+
+        # --- IMPORT FIX: Import directly from ai_agent package ---
+        try:
+            from ai_agent.agent import root_agent
+            print("✅ Successfully imported root_agent from ai_agent")
+        except ImportError as e:
+            print(f"❌ Error importing agent: {e}")
+            print(f"   Ensure 'agent.py' exists in: {ai_agent_dir}")
+            sys.exit(1)
+        app = AdkApp(
+            agent=root_agent,
+            enable_tracing=True,
+        )
+
+    env_vars = agent_env_vars()
+    print(f"🔧 Passing agent settings: {', '.join(env_vars)}")
+
+    package = build_package(measure=not args.skip_import_check, local_env=args.local_import_env)
+    print_report(package)
+    write_report(package)
+    if not args.skip_import_check:
+        error = check_import_budget(package, args.import_budget_ms)
+        if error:
+            print(f"❌ {error}. Check the breakdown above for new heavy imports.")
+            sys.exit(1)
+
+    if args.dry_run:
+        print(f"🧪 Dry run, would deploy with: {json.dumps(profile.deploy_kwargs())}")
+        return None
+
+    if client is None:
+        import vertexai
+        from vertexai import agent_engines
+
+        vertexai.init(
+            project=os.getenv("GOOGLE_CLOUD_PROJECT"),
+            location=os.getenv("GOOGLE_CLOUD_LOCATION"),
+            staging_bucket=os.getenv("STAGING_BUCKET"),
+        )
+        client = agent_engines
+
+    logger.info("deploying app...")
+    remote_app = deploy(client, app, profile, env_vars, package)
+    logger.info(f"Deployed agent to Vertex AI Agent Engine successfully, resource name: {remote_app.resource_name}")
+
+    if not args.skip_warmup and profile.warmup.max_rounds > 0:
+        summary = warm_up(remote_app, profile.warmup)
+        print(
+            f"🌡️  Warmed after {summary['rounds']} rounds ({'settled' if summary['settled'] else 'not settled'}): "
+            f"p50 {summary['p50_ms']:.0f} ms, p95 {summary['p95_ms']:.0f} ms"
+        )
+        failures = check_warmup(summary)
+        if failures:
+            # .env keeps pointing at the previous deployment
+            print(f"❌ Deployment {remote_app.resource_name} failed its performance profile: {'; '.join(failures)}")
+            if args.keep_failed:
+                print("   AGENT_ENGINE_ID was not updated. The engine was kept (--keep-failed).")
+            else:
+                delete_engine(remote_app)
+                print("   AGENT_ENGINE_ID was not updated. Raise the budget or fix the agent and redeploy.")
+            sys.exit(1)
+
+    update_env_file(remote_app.resource_name, ENV_FILE_PATH)
+    return remote_app
 
-logging.info(f"Deployed agent to Vertex AI Agent Engine successfully, resource name: {remote_app.resource_name}")
 
-update_env_file(remote_app.resource_name, ENV_FILE_PATH)
\ No newline at end of file
+if __name__ == "__main__":
+    main()
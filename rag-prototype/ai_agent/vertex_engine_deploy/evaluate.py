@@ -0,0 +1,337 @@
+"""
+Concurrent evaluation runner for the deployed agent.
+
+Runs query sets against the Agent Engine in many sessions at once, timestamps
+every streamed event and splits each query's latency into model planning
+(until the model calls a tool), retrieval (tool call to tool response, or
+the retrieval the intent router injected before the model call) and
+generation (last tool response to the end of the answer). Writes a report
+with percentiles per phase and token counts.
+
+Query files are either plain text (one query per line, each in its own
+session) or JSONL rows {"query": ..., "session": optional}, where rows with
+the same session run in order in one session.
+
+    uv run python ai_agent/vertex_engine_deploy/evaluate.py queries.txt --concurrency 8
+    uv run python ai_agent/vertex_engine_deploy/evaluate.py benchmarks/data/eval_queries.jsonl --record trace.jsonl
+
+--fake TRACE replays a recorded event trace ({"query", "events": [{"t_ms",
+"event"}]} per line, as written by --record) instead of calling the engine,
+so the runner works offline:
+
+    uv run python ai_agent/vertex_engine_deploy/evaluate.py benchmarks/data/eval_queries.jsonl \\
+        --fake benchmarks/data/agent_trace.jsonl --fake-speed 10
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+# --- PATH SETUP ---
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+# ------------------
+
+from ai_agent.stats import percentile  # noqa: E402
+
+PHASES = ["planning_ms", "retrieval_ms", "generation_ms", "ttft_ms", "total_ms"]
+# Set in the session state by ai_agent/router_callbacks.py (ROUTED_RETRIEVAL_STATE_KEY)
+# when the router ran retrieval before the model call
+ROUTED_RETRIEVAL_KEY = "routed_retrieval"
+PERCENTILES = [50, 90, 95, 99]
+TOKEN_FIELDS = {
+    "prompt": ("promptTokenCount", "prompt_token_count"),
+    "candidates": ("candidatesTokenCount", "candidates_token_count"),
+    "cached": ("cachedContentTokenCount", "cached_content_token_count"),
+}
+# Recorded traces use the API's camelCase; events from the deployed engine
+# are pydantic dumps with snake_case keys
+FUNCTION_CALL_KEYS = ("functionCall", "function_call")
+FUNCTION_RESPONSE_KEYS = ("functionResponse", "function_response")
+
+
+def load_sessions(paths, repeat=1):
+    """Returns a list of sessions, each a list of queries to run in order."""
+    sessions = OrderedDict()
+    for path in paths:
+        with open(path) as f:
+            lines = [line.strip() for line in f if line.strip()]
+        for number, line in enumerate(lines):
+            if path.endswith(".jsonl"):
+                row = json.loads(line)
+                key = (path, row.get("session", f"line-{number}"))
+                query = row["query"]
+            else:
+                key, query = (path, f"line-{number}"), line
+            sessions.setdefault(key, []).append(query)
+    return [list(queries) for _ in range(repeat) for queries in sessions.values()]
+
+
+def _parts(event):
+    return (event.get("content") or {}).get("parts") or []
+
+
+def _count_parts(parts, keys):
+    return sum(any(part.get(key) for key in keys) for part in parts)
+
+
+def _routed_retrieval(event):
+    actions = event.get("actions") or {}
+    state_delta = actions.get("stateDelta") or actions.get("state_delta") or {}
+    return state_delta.get(ROUTED_RETRIEVAL_KEY)
+
+
+def has_phase(result, phase):
+    """
+    Whether a result has the phase. Answers without retrieval (small talk)
+    would pull the planning and retrieval percentiles to 0, and routed
+    queries have retrieval but no planning.
+    """
+    if phase == "planning_ms":
+        return result["tool_calls"] > 0
+    if phase == "retrieval_ms":
+        return result["tool_calls"] + result["routed_retrievals"] > 0
+    return True
+
+
+def attribute_phases(timed_events):
+    """
+    Splits one query's latency over its (t_ms, event) pairs. Model time up to
+    each tool call counts as planning, tool call to response as retrieval, and
+    the time after the last tool response as generation. Retrieval the router
+    injected ran at the start of the model call its event reports.
+    """
+    planning = retrieval = 0.0
+    cursor = 0.0
+    ttft = None
+    tool_calls = routed_retrievals = 0
+    tokens = dict.fromkeys(TOKEN_FIELDS, 0)
+    for t_ms, event in timed_events:
+        parts = _parts(event)
+        routed = _routed_retrieval(event)
+        if routed:
+            routed_ms = min(routed["retrieval_ms"], t_ms - cursor)
+            retrieval += routed_ms
+            cursor += routed_ms
+            routed_retrievals += 1
+        calls = _count_parts(parts, FUNCTION_CALL_KEYS)
+        if calls:
+            planning += t_ms - cursor
+            cursor = t_ms
+            tool_calls += calls
+        elif _count_parts(parts, FUNCTION_RESPONSE_KEYS):
+            retrieval += t_ms - cursor
+            cursor = t_ms
+        elif ttft is None and any(part.get("text") and not part.get("thought") for part in parts):
+            ttft = t_ms
+        usage = event.get("usageMetadata") or event.get("usage_metadata") or {}
+        for name, keys in TOKEN_FIELDS.items():
+            tokens[name] += next((usage[key] for key in keys if usage.get(key)), 0)
+
+    total = timed_events[-1][0] if timed_events else 0.0
+    return {
+        "planning_ms": planning,
+        "retrieval_ms": retrieval,
+        "generation_ms": max(0.0, total - cursor),
+        "ttft_ms": ttft if ttft is not None else total,
+        "total_ms": total,
+        "tool_calls": tool_calls,
+        "routed_retrievals": routed_retrievals,
+        "tokens": tokens,
+    }
+
+
+class RemoteAgent:
+    """The deployed Agent Engine, with sessions created as in run.py."""
+
+    def __init__(self, agent_engine_id):
+        import vertexai
+        from google.adk.sessions import VertexAiSessionService
+        from vertexai import agent_engines
+
+        vertexai.init(project=os.getenv("GOOGLE_CLOUD_PROJECT"), location=os.getenv("GOOGLE_CLOUD_LOCATION"))
+        self.agent_engine_id = agent_engine_id
+        self.session_service = VertexAiSessionService(
+            project=os.getenv("GOOGLE_CLOUD_PROJECT"),
+            location=os.getenv("GOOGLE_CLOUD_LOCATION"),
+        )
+        self.agent_engine = agent_engines.get(agent_engine_id)
+
+    def create_session(self, user_id):
+        session = asyncio.run(self.session_service.create_session(app_name=self.agent_engine_id, user_id=user_id))
+        return session.id
+
+    def stream_query(self, user_id, session_id, message):
+        return self.agent_engine.stream_query(user_id=user_id, session_id=session_id, message=message)
+
+
+class FakeAgent:
+    """Replays recorded events with their original timing (divided by `speed`)."""
+
+    def __init__(self, trace_path, speed=1.0):
+        with open(trace_path) as f:
+            self.traces = [json.loads(line) for line in f if line.strip()]
+        if not self.traces:
+            raise ValueError(f"No traces in {trace_path}")
+        self.by_query = {trace["query"]: trace for trace in self.traces}
+        self.speed = speed
+
+    def create_session(self, user_id):
+        return f"fake-{uuid.uuid4()}"
+
+    def stream_query(self, user_id, session_id, message):
+        # Queries missing from the trace reuse a recorded one, picked stably
+        trace = self.by_query.get(message) or self.traces[sum(map(ord, message)) % len(self.traces)]
+        start = time.perf_counter()
+        for item in trace["events"]:
+            delay = item["t_ms"] / 1000 / self.speed - (time.perf_counter() - start)
+            if delay > 0:
+                time.sleep(delay)
+            yield item["event"]
+
+
+class TraceRecorder:
+    """Appends every query's timed events to a JSONL trace for --fake."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        open(path, "w").close()
+
+    def write(self, query, timed_events):
+        line = json.dumps({"query": query, "events": [{"t_ms": round(t, 1), "event": e} for t, e in timed_events]})
+        with self._lock, open(self.path, "a") as f:
+            f.write(line + "\n")
+
+
+def run_session(agent, queries, recorder=None, time_scale=1.0):
+    """Runs one session's queries in order; returns one result per query."""
+    user_id = f"eval-{uuid.uuid4().hex[:8]}"
+    try:
+        session_id = agent.create_session(user_id)
+    except Exception as e:
+        # None of the session's queries can run
+        return [{"query": query, "session_id": None, "error": f"create_session failed: {e}"} for query in queries]
+    results = []
+    for query in queries:
+        timed_events = []
+        start = time.perf_counter()
+        try:
+            for event in agent.stream_query(user_id=user_id, session_id=session_id, message=query):
+                timed_events.append(((time.perf_counter() - start) * 1000 * time_scale, event))
+        except Exception as e:
+            results.append({"query": query, "session_id": session_id, "error": str(e)})
+            continue
+        if recorder:
+            recorder.write(query, timed_events)
+        results.append({"query": query, "session_id": session_id, "events": len(timed_events), **attribute_phases(timed_events)})
+    return results
+
+
+def build_report(results, wall_seconds, args):
+    ok = [r for r in results if "error" not in r]
+    tokens = {name: sum(r["tokens"][name] for r in ok) for name in TOKEN_FIELDS}
+    return {
+        "queries": len(results),
+        "errors": len(results) - len(ok),
+        "concurrency": args.concurrency,
+        "fake": bool(args.fake),
+        "wall_seconds": wall_seconds,
+        "queries_per_second": len(results) / wall_seconds if wall_seconds else 0.0,
+        "phases": {
+            phase: {
+                f"p{pct}": percentile([r[phase] for r in ok if has_phase(r, phase)], pct)
+                for pct in PERCENTILES
+            }
+            for phase in PHASES
+        },
+        "tool_calls": sum(r["tool_calls"] for r in ok),
+        "routed_retrievals": sum(r["routed_retrievals"] for r in ok),
+        "tokens": {
+            **tokens,
+            "per_query": {name: total / len(ok) if ok else 0.0 for name, total in tokens.items()},
+        },
+        "results": results,
+    }
+
+
+def print_report(report):
+    header = f"{'phase':<14}" + "".join(f"{'p' + str(pct) + ' ms':>10}" for pct in PERCENTILES)
+    print(header)
+    print("-" * len(header))
+    for phase, values in report["phases"].items():
+        print(f"{phase.removesuffix('_ms'):<14}" + "".join(f"{values['p' + str(pct)]:>10.0f}" for pct in PERCENTILES))
+    tokens = report["tokens"]
+    print(
+        f"\n{report['queries']} queries ({report['errors']} errors) in {report['wall_seconds']:.1f}s, "
+        f"{report['queries_per_second']:.2f} queries/s at concurrency {report['concurrency']}"
+    )
+    print(
+        f"Tokens: {tokens['prompt']:,} prompt ({tokens['cached']:,} cached), {tokens['candidates']:,} output, "
+        f"{report['tool_calls']} tool calls, {report['routed_retrievals']} routed retrievals"
+    )
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("queries", nargs="+", help="Query files (.txt, one query per line, or .jsonl)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Sessions running at the same time")
+    parser.add_argument("--repeat", type=int, default=1, help="Run every session this many times")
+    parser.add_argument("--out", default="eval_report.json", help="JSON report path")
+    parser.add_argument("--record", help="Write the streamed events to this trace file")
+    parser.add_argument("--fake", metavar="TRACE", help="Replay this trace instead of calling the Agent Engine")
+    parser.add_argument("--fake-speed", type=float, default=1.0,
+                        help="Replay this many times faster; timings are reported at the recorded scale")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    load_dotenv()
+    sessions = load_sessions(args.queries, args.repeat)
+
+    if args.fake:
+        agent = FakeAgent(args.fake, speed=args.fake_speed)
+        time_scale = args.fake_speed
+        print(f"🎭 Replaying {args.fake} ({args.fake_speed:g}x)")
+    else:
+        agent_engine_id = os.getenv("AGENT_ENGINE_ID")
+        if not agent_engine_id:
+            raise ValueError("AGENT_ENGINE_ID is not set. Deploy the agent first or pass --fake.")
+        agent = RemoteAgent(agent_engine_id)
+        time_scale = 1.0
+        print(f"🤖 Evaluating {agent_engine_id}")
+    recorder = TraceRecorder(args.record) if args.record else None
+
+    print(f"Running {sum(map(len, sessions))} queries in {len(sessions)} sessions, {args.concurrency} at a time\n")
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        futures = [pool.submit(run_session, agent, queries, recorder, time_scale) for queries in sessions]
+        results = []
+        for future in futures:
+            results.extend(future.result())
+    wall_seconds = time.perf_counter() - start
+
+    report = build_report(results, wall_seconds, args)
+    print_report(report)
+    for result in results:
+        if "error" in result:
+            print(f"❌ {result['query'][:60]}: {result['error']}")
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n📝 Wrote {args.out}")
+    if recorder:
+        print(f"📼 Recorded events to {args.record}")
+
+
+if __name__ == "__main__":
+    main()
@@ -71,17 +71,24 @@ gcloud alpha services identity create --service=aiplatform.googleapis.com --proj
 ROLE_ID="ragCorpusQueryRole"
 ROLE_TITLE="RAG Corpus Query Role"
 ROLE_DESCRIPTION="Custom role with permission to query RAG Corpus"
+# ragFiles.list lets the agent read the corpus file count and latest file update
+# time (its generation marker), which invalidates its retrieval cache
+ROLE_PERMISSIONS="aiplatform.ragCorpora.query,aiplatform.ragFiles.list"
 
 echo "Checking if custom role $ROLE_ID exists..."
 if gcloud iam roles describe "$ROLE_ID" --project="$PROJECT_ID" &>/dev/null; then
-  echo "Custom role $ROLE_ID already exists."
+  echo "Custom role $ROLE_ID already exists. Updating permissions..."
+  gcloud iam roles update "$ROLE_ID" \
+    --project="$PROJECT_ID" \
+    --permissions="$ROLE_PERMISSIONS" \
+    --quiet
 else
   echo "Creating custom role $ROLE_ID..."
   gcloud iam roles create "$ROLE_ID" \
     --project="$PROJECT_ID" \
     --title="$ROLE_TITLE" \
     --description="$ROLE_DESCRIPTION" \
-    --permissions="aiplatform.ragCorpora.query"
+    --permissions="$ROLE_PERMISSIONS"
   echo "Custom role created."
 fi
 
@@ -6,12 +6,19 @@ from google.cloud import pubsub_v1
 import vertexai
 from vertexai.preview import rag
 
+from corpus_registry import CorpusRegistry
+
 # --- Environment Variable Validation ---
 PROJECT_ID = os.environ.get("GOOGLE_CLOUD_PROJECT")
 LOCATION = os.environ.get("GOOGLE_CLOUD_LOCATION")
 NOTIFICATION_TOPIC_ID = os.environ.get("NOTIFICATION_TOPIC_ID")
+# Default corpus: either the full resource name or the corpus display name
 RAG_CORPUS_NAME = os.environ.get("RAG_CORPUS")
 
+# Temporary parts written by parallel composite uploads
+# (see data-load-to-corpus/parallel_upload.py). Only the composed object is imported.
+PARALLEL_UPLOAD_PREFIX = "_parallel_uploads/"
+
 REQUIRED_ENV_VARS = {
     "GOOGLE_CLOUD_PROJECT": PROJECT_ID,
     "GOOGLE_CLOUD_LOCATION": LOCATION,
@@ -32,6 +39,24 @@ vertexai.init(project=PROJECT_ID, location=LOCATION)
 pubsub_publisher = pubsub_v1.PublisherClient()
 notification_topic_path = pubsub_publisher.topic_path(PROJECT_ID, NOTIFICATION_TOPIC_ID)
 
+# Resolve the default corpus once; the registry is reused across requests
+corpus_registry = CorpusRegistry(PROJECT_ID, LOCATION)
+RAG_CORPUS_NAME = corpus_registry.resolve(RAG_CORPUS_NAME)
+
+
+def resolve_target_corpus(file_name):
+    """
+    Files uploaded under a folder named after a corpus display name
+    (e.g. "cloud_unit_corpus/report.pdf") go to that corpus, everything
+    else goes to the default RAG_CORPUS.
+    """
+    if "/" in file_name:
+        folder = file_name.split("/", 1)[0]
+        corpus = corpus_registry.get(folder)
+        if corpus is not None:
+            return corpus.name
+    return RAG_CORPUS_NAME
+
 
 @functions_framework.cloud_event
 def rag_ingestion_handler(cloud_event: CloudEvent):
@@ -57,14 +82,20 @@ def rag_ingestion_handler(cloud_event: CloudEvent):
             print(f"📂 Ignoring folder creation event: {file_name}")
             return ("Folder ignored", 200)
 
+        # IGNORE PARALLEL UPLOAD PARTS
+        if file_name.startswith(PARALLEL_UPLOAD_PREFIX):
+            print(f"🧩 Ignoring parallel upload part: {file_name}")
+            return ("Upload part ignored", 200)
+
         gcs_uri = f"gs://{bucket_name}/{file_name}"
         print(f"📂 Received new GCS file: {gcs_uri}")
 
         # --- 2. Start RAG Import Job ---
-        print(f"🚀 Starting RAG import for corpus: {RAG_CORPUS_NAME}...")
+        corpus_name = resolve_target_corpus(file_name)
+        print(f"🚀 Starting RAG import for corpus: {corpus_name}...")
         # The client is already initialized globally with the correct region
         operation = rag.import_files(
-            corpus_name=RAG_CORPUS_NAME,
+            corpus_name=corpus_name,
             paths=[gcs_uri],
         )
         print(f"✅ Import operation started: {operation.operation.name}")
@@ -74,7 +105,7 @@ def rag_ingestion_handler(cloud_event: CloudEvent):
             "status": "RAG_UPDATE_INITIATED",
             "file_name": file_name,
             "gcs_uri": gcs_uri,
-            "corpus_name": RAG_CORPUS_NAME,
+            "corpus_name": corpus_name,
             "operation_id": operation.operation.name
         }
         future = pubsub_publisher.publish(
@@ -0,0 +1,221 @@
+# corpus_registry.py
+
+"""
+Cached registry of the RAG corpora in a project/location.
+
+Keeps a persisted display name -> resource name index so the loader, the
+validator and the ingestion worker don't walk `list_corpora()` on every run.
+The index is refreshed page by page (stopping as soon as a lookup is found)
+and expires after CORPUS_REGISTRY_TTL_SECONDS. Each entry also records the
+corpus embedding model and its last known file count. A name that is not
+found is looked up again after CORPUS_REGISTRY_MISS_TTL_SECONDS, so a corpus
+created in the meantime is picked up without waiting for the index to expire.
+"""
+
+import json
+import os
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+
+from google.cloud import aiplatform_v1beta1
+
+REGISTRY_PATH = os.environ.get(
+    "CORPUS_REGISTRY_PATH",
+    os.path.join(tempfile.gettempdir(), "rag_corpus_registry.json"),
+)
+REGISTRY_TTL_SECONDS = int(os.environ.get("CORPUS_REGISTRY_TTL_SECONDS", "3600"))
+MISS_TTL_SECONDS = int(os.environ.get("CORPUS_REGISTRY_MISS_TTL_SECONDS", "60"))
+PAGE_SIZE = 100
+
+
+@dataclass
+class CorpusInfo:
+    display_name: str
+    name: str
+    description: str = ""
+    embedding_model: str = ""
+    file_count: int | None = None
+    updated_at: float = 0.0
+
+
+def is_resource_name(value):
+    """True for full corpus names (projects/.../ragCorpora/...)."""
+    return value.startswith("projects/") and "/ragCorpora/" in value
+
+
+def _embedding_model(rag_corpus):
+    """Reads the embedding endpoint from either config location of the API."""
+    configs = (
+        getattr(getattr(rag_corpus, "vector_db_config", None), "rag_embedding_model_config", None),
+        getattr(rag_corpus, "rag_embedding_model_config", None),
+    )
+    for config in configs:
+        endpoint = getattr(getattr(config, "vertex_prediction_endpoint", None), "endpoint", "")
+        if endpoint:
+            return endpoint
+    return ""
+
+
+class CorpusRegistry:
+    """Display name -> corpus index for one project/location."""
+
+    def __init__(
+        self,
+        project_id,
+        location,
+        path=REGISTRY_PATH,
+        ttl_seconds=REGISTRY_TTL_SECONDS,
+        miss_ttl_seconds=MISS_TTL_SECONDS,
+        client=None,
+    ):
+        self.parent = f"projects/{project_id}/locations/{location}"
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.miss_ttl_seconds = miss_ttl_seconds
+        self._client = client
+        self._location = location
+        self._corpora = {}
+        self._refreshed_at = 0.0
+        # display name -> time of the walk that did not find it (not persisted)
+        self._misses = {}
+        self._load()
+
+    # --- Persistence ---
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                state = json.load(f).get(self.parent, {})
+        except (OSError, ValueError):
+            return
+        self._refreshed_at = state.get("refreshed_at", 0.0)
+        self._corpora = {
+            display_name: CorpusInfo(**entry)
+            for display_name, entry in state.get("corpora", {}).items()
+        }
+
+    def _save(self):
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = {}
+        state[self.parent] = {
+            "refreshed_at": self._refreshed_at,
+            "corpora": {name: asdict(info) for name, info in self._corpora.items()},
+        }
+        # Write to a temp file and swap it in, so concurrent readers never see half a file
+        directory = os.path.dirname(os.path.abspath(self.path))
+        with tempfile.NamedTemporaryFile("w", dir=directory, delete=False, suffix=".tmp") as f:
+            json.dump(state, f, indent=2)
+        os.replace(f.name, self.path)
+
+    # --- API access ---
+    @property
+    def client(self):
+        if self._client is None:
+            client_options = {"api_endpoint": f"{self._location}-aiplatform.googleapis.com"}
+            self._client = aiplatform_v1beta1.VertexRagDataServiceClient(client_options=client_options)
+        return self._client
+
+    def _is_stale(self):
+        return time.time() - self._refreshed_at > self.ttl_seconds
+
+    def _index_page(self, rag_corpora):
+        now = time.time()
+        for rag_corpus in rag_corpora:
+            previous = self._corpora.get(rag_corpus.display_name)
+            self._corpora[rag_corpus.display_name] = CorpusInfo(
+                display_name=rag_corpus.display_name,
+                name=rag_corpus.name,
+                description=rag_corpus.description,
+                embedding_model=_embedding_model(rag_corpus),
+                # Counting files is expensive, so keep the last known value
+                file_count=previous.file_count if previous and previous.name == rag_corpus.name else None,
+                updated_at=now,
+            )
+
+    def refresh(self, stop_at=None):
+        """
+        Re-indexes the corpora page by page. With `stop_at`, stops after the
+        page containing that display name. Returns the number of pages read.
+        """
+        request = aiplatform_v1beta1.ListRagCorporaRequest(parent=self.parent, page_size=PAGE_SIZE)
+        pages = 0
+        seen = set()
+        complete = True
+        for page in self.client.list_rag_corpora(request=request).pages:
+            pages += 1
+            self._index_page(page.rag_corpora)
+            seen.update(rag_corpus.display_name for rag_corpus in page.rag_corpora)
+            if stop_at is not None and stop_at in seen:
+                complete = False
+                break
+        if complete:
+            # Only a full walk can tell us which corpora were deleted
+            self._corpora = {name: info for name, info in self._corpora.items() if name in seen}
+            self._refreshed_at = time.time()
+        self._save()
+        return pages
+
+    # --- Lookups ---
+    def get(self, display_name):
+        """Returns the CorpusInfo for a display name, or None if it doesn't exist."""
+        info = self._corpora.get(display_name)
+        if info is not None and time.time() - info.updated_at <= self.ttl_seconds:
+            return info
+        if info is None and time.time() - self._misses.get(display_name, float("-inf")) <= self.miss_ttl_seconds:
+            # Corpora get created at any time, so a miss is only trusted briefly
+            return None
+        self.refresh(stop_at=display_name)
+        info = self._corpora.get(display_name)
+        if info is None:
+            self._misses[display_name] = time.time()
+        else:
+            self._misses.pop(display_name, None)
+        return info
+
+    def resolve(self, name_or_display_name):
+        """Returns the resource name for a corpus resource name or display name."""
+        if is_resource_name(name_or_display_name):
+            return name_or_display_name
+        info = self.get(name_or_display_name)
+        if info is None:
+            raise ValueError(f"No RAG corpus named '{name_or_display_name}' in {self.parent}")
+        return info.name
+
+    def all(self):
+        """Returns every known corpus, refreshing the index first if it is stale."""
+        if self._is_stale():
+            self.refresh()
+        return list(self._corpora.values())
+
+    # --- Mutations ---
+    def add(self, display_name, name, description="", embedding_model="", file_count=0):
+        """Records a corpus that was just created, without another list call."""
+        self._misses.pop(display_name, None)
+        self._corpora[display_name] = CorpusInfo(
+            display_name=display_name,
+            name=name,
+            description=description,
+            embedding_model=embedding_model,
+            file_count=file_count,
+            updated_at=time.time(),
+        )
+        self._save()
+
+    def record_file_count(self, name_or_display_name, file_count):
+        for info in self._corpora.values():
+            if name_or_display_name in (info.name, info.display_name):
+                info.file_count = file_count
+                self._save()
+                return
+
+    def count_files(self, corpus_name):
+        """Counts the files in a corpus page by page and records the result."""
+        request = aiplatform_v1beta1.ListRagFilesRequest(parent=corpus_name, page_size=PAGE_SIZE)
+        file_count = sum(
+            len(page.rag_files) for page in self.client.list_rag_files(request=request).pages
+        )
+        self.record_file_count(corpus_name, file_count)
+        return file_count
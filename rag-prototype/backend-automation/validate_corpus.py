@@ -1,22 +1,181 @@
 # validate_corpus.py
 
+"""
+Inspects one or more Vertex AI RAG corpora and prints a compact status report.
+
+Files are streamed page by page (the next page is fetched while the current
+one is aggregated), so memory stays constant no matter how large the corpus
+is. Several corpora are inspected concurrently. Errored files can be written
+to a JSON/NDJSON file for follow-up.
+
+    python backend-automation/validate_corpus.py
+    python backend-automation/validate_corpus.py unit_a_corpus unit_b_corpus --errors-out errors.ndjson
+"""
+
+import argparse
+import json
 import os
-from google.cloud import aiplatform_v1beta1
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, datetime
+
+from corpus_registry import CorpusRegistry
 from dotenv import load_dotenv
+from google.cloud import aiplatform_v1beta1
 
 load_dotenv()
 
 PROJECT_ID = os.environ.get("GOOGLE_CLOUD_PROJECT")
 LOCATION = os.environ.get("GOOGLE_CLOUD_LOCATION", "asia-southeast1")
+# Either the full resource name or the corpus display name
 RAG_CORPUS_ID = os.environ.get("RAG_CORPUS")
 
-def list_corpus_files():
+PAGE_SIZE = 100
+ERROR_STATE = "ERROR"
+
+SIZE_BUCKETS = [
+    ("<1MB", 1024 ** 2),
+    ("1-10MB", 10 * 1024 ** 2),
+    ("10-100MB", 100 * 1024 ** 2),
+    (">100MB", float("inf")),
+]
+AGE_BUCKETS = [
+    ("<1d", 1),
+    ("1-7d", 7),
+    ("7-30d", 30),
+    (">30d", float("inf")),
+]
+
+
+def _bucket(value, buckets):
+    for label, upper in buckets:
+        if value < upper:
+            return label
+    return buckets[-1][0]
+
+
+def file_state(rag_file):
+    """Returns the file status as a plain string (e.g. ACTIVE, ERROR)."""
+    state = rag_file.file_status.state
+    # Enum names differ across client versions, fall back to the raw value
+    return getattr(state, "name", str(state))
+
+
+def iter_rag_files(rag_client, corpus_name, page_size=PAGE_SIZE):
+    """
+    Lazily yields the files of a corpus. The next page is requested in the
+    background while the caller works through the current one.
+    """
+    request = aiplatform_v1beta1.ListRagFilesRequest(parent=corpus_name, page_size=page_size)
+    pages = rag_client.list_rag_files(request=request).pages
+    with ThreadPoolExecutor(max_workers=1) as prefetcher:
+        next_page = prefetcher.submit(next, pages, None)
+        while True:
+            page = next_page.result()
+            if page is None:
+                return
+            next_page = prefetcher.submit(next, pages, None)
+            yield from page.rag_files
+
+
+class CorpusSummary:
+    """Running counts by status, size and age. Holds no per-file data."""
+
+    def __init__(self, corpus_name):
+        self.corpus_name = corpus_name
+        self.total = 0
+        self.total_bytes = 0
+        self.by_status = Counter()
+        self.by_size = Counter()
+        self.by_age = Counter()
+
+    def add(self, rag_file, state, now):
+        self.total += 1
+        self.by_status[state] += 1
+        size = getattr(rag_file, "size_bytes", 0) or 0
+        self.total_bytes += size
+        self.by_size[_bucket(size, SIZE_BUCKETS)] += 1
+        created = getattr(rag_file, "create_time", None)
+        if created:
+            self.by_age[_bucket((now - created).total_seconds() / 86400, AGE_BUCKETS)] += 1
+
+    def print(self):
+        print(f"\n📊 {self.corpus_name}")
+        if not self.total:
+            print("⚠️ The corpus is currently empty.")
+            return
+        print(f"  Files:  {self.total:,}  |  Size: {self.total_bytes / 1024 ** 2:,.1f} MB")
+        print("  Status: " + "  ".join(f"{k}={v:,}" for k, v in self.by_status.most_common()))
+        print("  Size:   " + "  ".join(f"{k}={self.by_size[k]:,}" for k, _ in SIZE_BUCKETS if self.by_size[k]))
+        print("  Age:    " + "  ".join(f"{k}={self.by_age[k]:,}" for k, _ in AGE_BUCKETS if self.by_age[k]))
+
+
+class ErrorWriter:
+    """Streams errored files to a JSON array or NDJSON file (thread safe)."""
+
+    def __init__(self, path, output_format="ndjson"):
+        self.output_format = output_format
+        self._file = open(path, "w")
+        self._lock = threading.Lock()
+        self._count = 0
+        if output_format == "json":
+            self._file.write("[\n")
+
+    def write(self, corpus_name, rag_file):
+        record = json.dumps({
+            "corpus": corpus_name,
+            "name": rag_file.name,
+            "display_name": rag_file.display_name,
+            "error": rag_file.file_status.error_status,
+        })
+        with self._lock:
+            if self.output_format == "json" and self._count:
+                self._file.write(",\n")
+            self._file.write(record if self.output_format == "json" else record + "\n")
+            self._count += 1
+
+    def close(self):
+        if self.output_format == "json":
+            self._file.write("\n]\n")
+        self._file.close()
+        return self._count
+
+
+def inspect_corpus(rag_client, corpus_name, error_writer=None, status_filter=None, page_size=PAGE_SIZE):
+    """Streams every file of one corpus into a CorpusSummary."""
+    summary = CorpusSummary(corpus_name)
+    now = datetime.now(UTC)
+    for rag_file in iter_rag_files(rag_client, corpus_name, page_size):
+        state = file_state(rag_file)
+        if status_filter and state not in status_filter:
+            continue
+        summary.add(rag_file, state, now)
+        if error_writer is not None and state == ERROR_STATE:
+            error_writer.write(corpus_name, rag_file)
+    return summary
+
+
+def inspect_corpora(rag_client, corpus_names, error_writer=None, status_filter=None, page_size=PAGE_SIZE):
+    """Inspects several corpora (e.g. one per business unit) concurrently."""
+    with ThreadPoolExecutor(max_workers=max(1, len(corpus_names))) as executor:
+        futures = [
+            executor.submit(inspect_corpus, rag_client, name, error_writer, status_filter, page_size)
+            for name in corpus_names
+        ]
+        return [future.result() for future in futures]
+
+
+def list_corpus_files(corpora=None, errors_out=None, output_format="ndjson", status_filter=None, page_size=PAGE_SIZE):
     """
-    Lists all the files within a specified Vertex AI RAG Corpus.
+    Summarizes the files within the given Vertex AI RAG Corpora
+    (defaults to RAG_CORPUS).
     """
-    print(f"🔍 Inspecting RAG Corpus: {RAG_CORPUS_ID}")
+    corpora = corpora or [RAG_CORPUS_ID]
+    print(f"🔍 Inspecting RAG Corpora: {', '.join(corpora)}")
     print(f"📍 Region: {LOCATION}")
 
+    error_writer = None
     try:
         # Construct the API endpoint for the specified location
         API_ENDPOINT = f"{LOCATION}-aiplatform.googleapis.com"
@@ -25,39 +184,50 @@ def list_corpus_files():
         # Initialize the Vertex RAG Data Service Client
         rag_client = aiplatform_v1beta1.VertexRagDataServiceClient(client_options=client_options)
 
-        # Create the request to list files in the corpus
-        request = aiplatform_v1beta1.ListRagFilesRequest(parent=RAG_CORPUS_ID)
-        page_result = rag_client.list_rag_files(request=request)
+        # Resolve display names through the shared corpus registry
+        registry = CorpusRegistry(PROJECT_ID, LOCATION, client=rag_client)
+        corpus_names = [registry.resolve(corpus) for corpus in corpora]
 
-        print("\n--- 📄 Files in Corpus ---")
-        files = list(page_result)
+        if errors_out:
+            error_writer = ErrorWriter(errors_out, output_format)
 
-        if not files:
-            print("⚠️ The corpus is currently empty.")
-        else:
-            for rag_file in files:
-                # Extract just the numeric ID for cleaner reading
-                short_id = rag_file.name.split('/')[-1]
-
-                print(f"File: {rag_file.display_name}")
-                print(f"  ID: {short_id}")
-                
-                # --- FIX: Print the status object directly ---
-                # This avoids version conflicts with Enum lookups
-                print(f"  Status: {rag_file.file_status}")
-                print("-" * 30)
+        summaries = inspect_corpora(rag_client, corpus_names, error_writer, status_filter, page_size)
+        for summary in summaries:
+            summary.print()
+            if not status_filter:
+                registry.record_file_count(summary.corpus_name, summary.total)
 
+        if error_writer is not None:
+            print(f"\n📝 Wrote {error_writer.close()} errored file(s) to {errors_out}")
+            error_writer = None
         print("\n✅ Verification complete.")
 
     except Exception as e:
         print(f"\n❌ Error: {e}")
         print("  - Please check if the RAG_CORPUS_ID in your .env file is correct.")
         print("  - Ensure the service account has 'Vertex AI User' permissions.")
+    finally:
+        if error_writer is not None:
+            error_writer.close()
 
 
 if __name__ == "__main__":
-    if not all([PROJECT_ID, LOCATION, RAG_CORPUS_ID]):
+    parser = argparse.ArgumentParser(description="Summarize the files in Vertex AI RAG corpora.")
+    parser.add_argument("corpora", nargs="*", help="Corpus resource or display names (default: RAG_CORPUS)")
+    parser.add_argument("--errors-out", help="Write errored files to this path")
+    parser.add_argument("--format", choices=["ndjson", "json"], default="ndjson", dest="output_format")
+    parser.add_argument("--status", nargs="+", help="Only count files in these states (e.g. ERROR)")
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE)
+    args = parser.parse_args()
+
+    if not all([PROJECT_ID, LOCATION]) or not (args.corpora or RAG_CORPUS_ID):
         print("❌ Error: Missing required environment variables.")
         print("  Please ensure GOOGLE_CLOUD_PROJECT, GOOGLE_CLOUD_LOCATION, and RAG_CORPUS are set in your .env file.")
     else:
-        list_corpus_files()
\ No newline at end of file
+        list_corpus_files(
+            corpora=args.corpora,
+            errors_out=args.errors_out,
+            output_format=args.output_format,
+            status_filter=set(args.status) if args.status else None,
+            page_size=args.page_size,
+        )
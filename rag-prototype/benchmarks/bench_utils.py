@@ -0,0 +1,21 @@
+"""Small helpers shared by the benchmark scripts."""
+
+import json
+import os
+import sys
+
+# --- PATH SETUP ---
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+# ------------------
+
+
+def load_jsonl(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def write_json(path, payload):
+    with open(path, "w") as f:
+        json.dump(payload, f, indent=2)
+    print(f"\n📝 Wrote {path}")
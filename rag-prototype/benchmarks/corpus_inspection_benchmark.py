@@ -0,0 +1,84 @@
+"""
+Checks that corpus inspection stays fast and flat in memory as corpora grow.
+
+Runs validate_corpus.inspect_corpus against a fake paginated client (no cloud
+access needed) and reports throughput and peak traced memory per corpus size.
+
+    uv run python benchmarks/corpus_inspection_benchmark.py --sizes 1000 10000 100000
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
+
+# --- PATH SETUP ---
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, "backend-automation"))
+# ------------------
+
+from validate_corpus import ErrorWriter, inspect_corpus  # noqa: E402
+
+STATES = ["ACTIVE"] * 98 + ["ERROR"] * 2
+
+
+class FakeRagClient:
+    """Generates RagFile-like pages on demand, like the real pager does."""
+
+    def __init__(self, total_files, page_latency=0.0):
+        self.total_files = total_files
+        self.page_latency = page_latency
+
+    def _page(self, start, page_size, now):
+        if self.page_latency:
+            time.sleep(self.page_latency)
+        return SimpleNamespace(rag_files=[
+            SimpleNamespace(
+                name=f"projects/p/locations/l/ragCorpora/1/ragFiles/{i}",
+                display_name=f"doc-{i}.pdf",
+                size_bytes=(i * 7919) % (200 * 1024 ** 2),
+                create_time=now - timedelta(hours=i % 2000),
+                file_status=SimpleNamespace(
+                    state=SimpleNamespace(name=STATES[i % len(STATES)]),
+                    error_status="Failed to parse document" if STATES[i % len(STATES)] == "ERROR" else "",
+                ),
+            )
+            for i in range(start, min(start + page_size, self.total_files))
+        ])
+
+    def list_rag_files(self, request):
+        now = datetime.now(UTC)
+        pages = (
+            self._page(start, request.page_size, now)
+            for start in range(0, self.total_files, request.page_size)
+        )
+        return SimpleNamespace(pages=pages)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--page-latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    print(f"{'files':>10} {'seconds':>9} {'files/s':>10} {'peak KiB':>10}")
+    for size in args.sizes:
+        client = FakeRagClient(size, args.page_latency_ms / 1000)
+        writer = ErrorWriter(os.devnull)
+        tracemalloc.start()
+        start = time.perf_counter()
+        summary = inspect_corpus(client, "fake-corpus", writer, page_size=args.page_size)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        writer.close()
+        assert summary.total == size
+        print(f"{size:>10,} {elapsed:>9.2f} {size / elapsed:>10,.0f} {peak / 1024:>10,.0f}")
+
+
+if __name__ == "__main__":
+    main()
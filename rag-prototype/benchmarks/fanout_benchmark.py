@@ -0,0 +1,104 @@
+"""
+Fan-out retrieval benchmark: latency over several corpus shards.
+
+Splits the fixture corpus into shards with different simulated latencies and
+runs the question set through ai_agent.fanout.FanoutRetriever. Reports
+fan-out latency percentiles next to the slowest single shard and the
+sequential sum, plus recall/MRR of the merged ranking versus a single
+unsharded corpus. No cloud access needed.
+
+    uv run python benchmarks/fanout_benchmark.py --shard-latencies-ms 80 120 200 350
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from bench_utils import load_jsonl, write_json
+from fixture_retriever import DEFAULT_CHUNKS_PATH, FixtureRetriever
+from retrieval_benchmark import DEFAULT_QUESTIONS_PATH, score_question
+
+from ai_agent.fanout import CorpusShard, FanoutRetriever
+from ai_agent.stats import percentile
+
+
+def write_shards(chunks_path, count, out_dir):
+    """Deals the fixture chunks round-robin into `count` JSONL shard files."""
+    chunks = load_jsonl(chunks_path)
+    paths = [os.path.join(out_dir, f"shard-{i}.jsonl") for i in range(count)]
+    for i, path in enumerate(paths):
+        with open(path, "w") as f:
+            for chunk in chunks[i::count]:
+                f.write(json.dumps(chunk) + "\n")
+    return paths
+
+
+def measure(retrieve, questions, top_k, threshold, repeats):
+    latencies, recalls, reciprocal_ranks = [], [], []
+    for question in questions:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            chunks = retrieve(question["question"], top_k, threshold)
+            latencies.append((time.perf_counter() - start) * 1000)
+        recall, reciprocal_rank = score_question(chunks, question["relevant"])
+        recalls.append(recall)
+        reciprocal_ranks.append(reciprocal_rank)
+    n = len(questions)
+    return {
+        "recall_at_k": sum(recalls) / n,
+        "mrr": sum(reciprocal_ranks) / n,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--questions", default=DEFAULT_QUESTIONS_PATH)
+    parser.add_argument("--chunks", default=DEFAULT_CHUNKS_PATH)
+    parser.add_argument("--shard-latencies-ms", type=float, nargs="+", default=[80, 120, 200, 350])
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--threshold", type=float, default=1.0)
+    parser.add_argument("--merge", choices=["distance", "rank"], default="distance")
+    parser.add_argument("--repeats", type=int, default=1, help="Timed runs per question")
+    parser.add_argument("--json-out", help="Also write the results to this JSON file")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    questions = load_jsonl(args.questions)
+    latencies = args.shard_latencies_ms
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = write_shards(args.chunks, len(latencies), tmp)
+        shards = [CorpusShard(path, name=f"shard-{i}") for i, path in enumerate(paths)]
+        by_path = dict(zip(paths, latencies, strict=True))
+        fanout = FanoutRetriever(
+            shards,
+            lambda path: FixtureRetriever(path, latency_ms=by_path[path]),
+            timeout_seconds=max(latencies) / 1000 + 1,
+            merge=args.merge,
+        )
+        print(f"🔬 {len(questions)} questions over {len(shards)} shards ({', '.join(f'{ms:.0f}' for ms in latencies)} ms)\n")
+        sharded = measure(fanout, questions, args.top_k, args.threshold, args.repeats)
+        single = measure(FixtureRetriever(args.chunks), questions, args.top_k, args.threshold, 1)
+
+    print(f"Fan-out latency:     p50 {sharded['p50_ms']:.0f} ms, p95 {sharded['p95_ms']:.0f} ms")
+    print(f"Slowest shard:       {max(latencies):.0f} ms")
+    print(f"Sequential sum:      {sum(latencies):.0f} ms")
+    print(f"Recall@k / MRR:      {sharded['recall_at_k']:.3f} / {sharded['mrr']:.3f} merged, "
+          f"{single['recall_at_k']:.3f} / {single['mrr']:.3f} unsharded")
+
+    if args.json_out:
+        write_json(args.json_out, {
+            "shard_latencies_ms": latencies,
+            "fanout": sharded,
+            "unsharded": single,
+        })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+In-process stand-in for a RAG corpus, used to run retrieval benchmarks offline.
+
+Chunks are loaded from a JSONL file ({"id", "text", "source_uri",
+"source_display_name"}) and scored with a bag-of-words cosine, reported as a
+cosine distance like Vertex AI RAG Engine does. An optional simulated
+latency makes latency sweeps meaningful.
+"""
+
+import json
+import math
+import os
+import re
+import sys
+import time
+from collections import Counter
+
+# --- PATH SETUP ---
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+# ------------------
+
+from ai_agent.retrieval import RetrievedChunk  # noqa: E402
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+DEFAULT_CHUNKS_PATH = os.path.join(DATA_DIR, "retrieval_fixture_chunks.jsonl")
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "by", "did", "does", "for", "from", "how",
+    "in", "is", "it", "of", "on", "or", "our", "so", "the", "to", "we", "what",
+    "which", "why", "with",
+}
+
+
+def _vectorize(text):
+    return Counter(t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS)
+
+
+def _cosine(a, b):
+    dot = sum(count * b.get(token, 0) for token, count in a.items())
+    if not dot:
+        return 0.0
+    norm = math.sqrt(sum(v * v for v in a.values())) * math.sqrt(sum(v * v for v in b.values()))
+    return dot / norm
+
+
+class FixtureRetriever:
+    """Callable with the same signature as ai_agent.retrieval retrievers."""
+
+    def __init__(self, chunks_path=DEFAULT_CHUNKS_PATH, latency_ms=0.0):
+        with open(chunks_path) as f:
+            self.chunks = [json.loads(line) for line in f if line.strip()]
+        self.vectors = [_vectorize(chunk["text"]) for chunk in self.chunks]
+        self.latency_ms = latency_ms
+
+    def __call__(self, query, top_k, threshold):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        query_vector = _vectorize(query)
+        scored = sorted(
+            ((1.0 - _cosine(query_vector, vector), chunk) for vector, chunk in zip(self.vectors, self.chunks, strict=True)),
+            key=lambda pair: pair[0],
+        )
+        return [
+            RetrievedChunk(
+                text=chunk["text"],
+                source_uri=chunk.get("source_uri", ""),
+                source_display_name=chunk.get("source_display_name", ""),
+                distance=distance,
+            )
+            for distance, chunk in scored[:top_k]
+            if distance <= threshold
+        ]
@@ -0,0 +1,156 @@
+"""
+Hedged request benchmark: time to first event across Agent Engine deployments.
+
+Streams queries from fake engines whose time to first event follows a
+configurable distribution (log-normal body plus a slow tail and a failure
+rate), once from the primary engine alone and once through the frontend's
+HedgedStreamer (frontend-ui/hedging.py). Reports time-to-first-event
+percentiles, hedge rate, hedge win rate and the extra requests sent. No
+cloud access needed.
+
+    uv run python benchmarks/hedging_benchmark.py
+    uv run python benchmarks/hedging_benchmark.py --engines primary:400:0.3:0.1:5000:0.01 secondary:600:0.3:0.02:5000
+
+An engine is name:median_ms:sigma:slow_rate:slow_ms[:fail_rate].
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# --- PATH SETUP ---
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, "frontend-ui"))
+# ------------------
+
+from bench_utils import write_json  # noqa: E402
+from hedging import FirstEventLatency, HedgedStreamer  # noqa: E402
+
+from ai_agent.stats import percentile  # noqa: E402
+
+
+class FakeEngine:
+    """stream_query with a random time to first event, then two more events."""
+
+    def __init__(self, name, median_ms, sigma, slow_rate, slow_ms, fail_rate=0.0, seed=0):
+        self.name = name
+        self.median_ms = median_ms
+        self.sigma = sigma
+        self.slow_rate = slow_rate
+        self.slow_ms = slow_ms
+        self.fail_rate = fail_rate
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def parse(cls, spec, seed):
+        name, *values = spec.split(":")
+        return cls(name, *map(float, values), seed=seed)
+
+    def _sample(self):
+        with self._lock:
+            self.calls += 1
+            if self._rng.random() < self.fail_rate:
+                return None
+            latency = self.median_ms * self._rng.lognormvariate(0, self.sigma)
+            if self._rng.random() < self.slow_rate:
+                latency += self.slow_ms * self._rng.uniform(0.5, 1.5)
+            return latency
+
+    def stream_query(self, user_id, message):
+        latency = self._sample()
+        if latency is None:
+            time.sleep(self.median_ms / 4000)
+            raise ConnectionError(f"{self.name} unavailable")
+        time.sleep(latency / 1000)
+        yield {"author": self.name, "content": {"parts": [{"functionCall": {"name": "retrieve_rag_documentation"}}]}}
+        time.sleep(0.02)
+        yield {"author": self.name, "content": {"parts": [{"text": f"Answer to: {message}"}]}}
+
+
+def run(streamer, requests, concurrency):
+    def one(i):
+        start = time.perf_counter()
+        try:
+            stream = streamer.stream(f"question {i}", user_id=f"bench-{i}")
+            next(stream)
+            first_event_ms = (time.perf_counter() - start) * 1000
+            for _ in stream:
+                pass
+            return first_event_ms
+        except Exception:
+            return None
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(one, range(requests)))
+    ok = [latency for latency in latencies if latency is not None]
+    return {
+        "requests": requests,
+        "errors": requests - len(ok),
+        "p50_ms": percentile(ok, 50),
+        "p95_ms": percentile(ok, 95),
+        "p99_ms": percentile(ok, 99),
+        "max_ms": max(ok, default=0.0),
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--engines", nargs="+", default=["primary:400:0.3:0.04:4000:0.01", "secondary:550:0.3:0.02:4000"])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--hedge-percentile", type=float, default=95)
+    parser.add_argument("--json-out", help="Also write the results to this JSON file")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    results = {}
+
+    primary = FakeEngine.parse(args.engines[0], seed=1)
+    single = HedgedStreamer([(primary.name, primary)], log_every=0)
+    results["primary only"] = {**run(single, args.requests, args.concurrency), "engine_calls": primary.calls}
+
+    engines = [FakeEngine.parse(spec, seed=1 + i) for i, spec in enumerate(args.engines)]
+    # Seeded from the primary-only run, as the frontend would be after warm-up
+    latency = FirstEventLatency()
+    for sample in list(single.latency.samples):
+        latency.record(sample)
+    hedged = HedgedStreamer(
+        [(engine.name, engine) for engine in engines],
+        latency=latency,
+        hedge_percentile=args.hedge_percentile,
+        log_every=0,
+    )
+    results["hedged"] = {
+        **run(hedged, args.requests, args.concurrency),
+        "engine_calls": sum(engine.calls for engine in engines),
+        **hedged.stats(),
+    }
+
+    print(f"🔬 {args.requests} requests, concurrency {args.concurrency}, engines: {' '.join(args.engines)}\n")
+    header = f"{'mode':<14} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'errors':>7} {'calls/req':>10}"
+    print(header)
+    print("-" * len(header))
+    for mode, r in results.items():
+        print(
+            f"{mode:<14} {r['p50_ms']:>8.0f} {r['p95_ms']:>8.0f} {r['p99_ms']:>8.0f} {r['max_ms']:>8.0f} "
+            f"{r['errors']:>7} {r['engine_calls'] / r['requests']:>10.2f}"
+        )
+    stats = results["hedged"]
+    print(
+        f"\nHedge delay {stats['hedge_delay_ms']:.0f} ms (p{args.hedge_percentile:g}), hedge rate {stats['hedge_rate']:.1%}, "
+        f"hedge win rate {stats['hedge_win_rate']:.1%}, {stats['failovers']} failovers, wins {stats['wins']}"
+    )
+    if args.json_out:
+        write_json(args.json_out, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+History windowing benchmark: per-turn input tokens over a long conversation.
+
+Simulates a conversation in which every turn calls the retrieval tool
+(fixture passages as the tool result) and compares the estimated input
+tokens of each turn's final model call with and without
+ai_agent.history.HistoryWindow. No cloud access needed.
+
+    uv run python benchmarks/history_benchmark.py --turns 50
+    uv run python benchmarks/history_benchmark.py --max-turns 4 --summary-tokens 300
+"""
+
+import argparse
+import itertools
+from types import SimpleNamespace
+
+from bench_utils import load_jsonl, write_json
+from fixture_retriever import DEFAULT_CHUNKS_PATH
+from google.genai import types
+from retrieval_benchmark import DEFAULT_QUESTIONS_PATH
+
+from ai_agent.compression import group_by_source
+from ai_agent.history import HistoryWindow
+from ai_agent.retrieval import RetrievedChunk
+from ai_agent.token_budget import request_token_breakdown
+
+TOOL_NAME = "retrieve_rag_documentation"
+
+
+def simulated_turns(turns, passages_per_turn):
+    """Yields (question, tool result, answer) for each turn."""
+    questions = itertools.cycle(row["question"] for row in load_jsonl(DEFAULT_QUESTIONS_PATH))
+    chunks = [
+        RetrievedChunk(text=row["text"], source_uri=row["source_uri"], source_display_name=row["source_display_name"])
+        for row in load_jsonl(DEFAULT_CHUNKS_PATH)
+    ]
+    for turn in range(turns):
+        start = (turn * passages_per_turn) % len(chunks)
+        selected = (chunks * 2)[start:start + passages_per_turn]
+        answer = " ".join(chunk.text for chunk in selected[:2])
+        yield next(questions), group_by_source(selected), answer
+
+
+def tool_contents(question, result):
+    return [
+        types.Content(role="model", parts=[types.Part(function_call=types.FunctionCall(
+            name=TOOL_NAME, args={"query": question},
+        ))]),
+        types.Content(role="user", parts=[types.Part(function_response=types.FunctionResponse(
+            name=TOOL_NAME, response={"result": result},
+        ))]),
+    ]
+
+
+def run(args):
+    window = HistoryWindow(
+        tool_names=[TOOL_NAME],
+        max_turns=args.max_turns,
+        summary_token_budget=args.summary_tokens,
+    )
+    history, rows = [], []
+    for turn, (question, result, answer) in enumerate(simulated_turns(args.turns, args.passages), start=1):
+        history.append(types.Content(role="user", parts=[types.Part(text=question)]))
+        history.extend(tool_contents(question, result))
+        # The final model call of the turn sees the question and the tool result
+        full = request_token_breakdown(SimpleNamespace(contents=history, config=None), {TOOL_NAME})
+        windowed = request_token_breakdown(
+            SimpleNamespace(contents=window.apply(list(history)), config=None), {TOOL_NAME},
+        )
+        rows.append({"turn": turn, "full": full["total"], "windowed": windowed["total"]})
+        history.append(types.Content(role="model", parts=[types.Part(text=answer)]))
+    return rows
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--passages", type=int, default=6, help="Retrieved passages per turn")
+    parser.add_argument("--max-turns", type=int, default=6)
+    parser.add_argument("--summary-tokens", type=int, default=400)
+    parser.add_argument("--json-out", help="Also write the results to this JSON file")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    rows = run(args)
+    print(f"🔬 {args.turns} turns, {args.passages} passages per turn, window of {args.max_turns} turns\n")
+    print(f"{'turn':>5} {'full history':>13} {'windowed':>9}")
+    print("-" * 29)
+    for row in rows:
+        if row["turn"] in (1, 2, 5) or row["turn"] % 10 == 0 or row["turn"] == len(rows):
+            print(f"{row['turn']:>5} {row['full']:>13,} {row['windowed']:>9,}")
+    tail = rows[-10:]
+    print(f"\nLast {len(tail)} turns, windowed: min {min(r['windowed'] for r in tail):,}, "
+          f"max {max(r['windowed'] for r in tail):,} tokens")
+    print(f"Total input tokens: {sum(r['full'] for r in rows):,} full, {sum(r['windowed'] for r in rows):,} windowed")
+    if args.json_out:
+        write_json(args.json_out, rows)
+
+
+if __name__ == "__main__":
+    main()
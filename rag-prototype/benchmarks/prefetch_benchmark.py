@@ -0,0 +1,112 @@
+"""
+Speculative prefetch benchmark: time to first token on corpus questions.
+
+Simulates the agent turn with a fake model: a planning call that decides to
+call the retrieval tool (with a query rewritten from the question), the tool
+call, and the answering call up to its first token. Runs each question
+sequentially (retrieval starts after planning) and with
+ai_agent.prefetch.RetrievalPrefetcher (retrieval starts with the message).
+Some turns don't use the tool, or rewrite the query beyond recognition, to
+show discarded prefetches. No cloud access needed.
+
+    uv run python benchmarks/prefetch_benchmark.py
+    uv run python benchmarks/prefetch_benchmark.py --plan-ms 800 --retrieval-ms 400 --first-token-ms 300
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+
+from bench_utils import load_jsonl, write_json
+from fixture_retriever import FixtureRetriever
+from retrieval_benchmark import DEFAULT_QUESTIONS_PATH
+
+from ai_agent.prefetch import RetrievalPrefetcher
+from ai_agent.stats import percentile
+
+STOPWORDS = {"how", "what", "why", "did", "does", "the", "a", "an", "of", "to", "is", "are", "and", "might", "which"}
+
+
+def model_query(question):
+    """What the model typically sends to the tool: the question's key words."""
+    return " ".join(word for word in question.rstrip("?").split() if word.lower() not in STOPWORDS)
+
+
+async def turn(question, kind, args, select, prefetcher):
+    """Returns milliseconds until the answer's first token."""
+    invocation_id = uuid.uuid4().hex
+    start = time.perf_counter()
+    if prefetcher is not None:
+        prefetcher.start(invocation_id, question)
+    await asyncio.sleep(args.plan_ms / 1000)  # planning call
+    if kind != "no_tool":
+        query = model_query(question) if kind == "tool" else "segment reporting changes"
+        chunks = await prefetcher.take(invocation_id, query) if prefetcher is not None else None
+        if chunks is None:
+            chunks = await asyncio.to_thread(select, query)
+    await asyncio.sleep(args.first_token_ms / 1000)  # answering call, first token
+    elapsed = (time.perf_counter() - start) * 1000
+    if prefetcher is not None:
+        prefetcher.discard(invocation_id)
+    return elapsed
+
+
+async def run(args):
+    retriever = FixtureRetriever(latency_ms=args.retrieval_ms)
+    select = lambda query: retriever(query, 10, 0.6)  # noqa: E731
+    questions = [row["question"] for row in load_jsonl(args.questions)]
+    rng = random.Random(7)
+    plan = [
+        (question, "no_tool" if rng.random() < args.no_tool_share else
+         "rewritten" if rng.random() < args.rewritten_share else "tool")
+        for _ in range(args.repeats) for question in questions
+    ]
+
+    results = {}
+    for mode in ("sequential", "prefetch"):
+        prefetcher = RetrievalPrefetcher(select) if mode == "prefetch" else None
+        latencies = {"tool": [], "rewritten": [], "no_tool": []}
+        for question, kind in plan:
+            latencies[kind].append(await turn(question, kind, args, select, prefetcher))
+        results[mode] = {
+            kind: {"n": len(values), "p50_ms": percentile(values, 50), "p95_ms": percentile(values, 95)}
+            for kind, values in latencies.items() if values
+        }
+        if prefetcher is not None:
+            results[mode]["prefetch"] = prefetcher.stats()
+    return results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--questions", default=DEFAULT_QUESTIONS_PATH)
+    parser.add_argument("--plan-ms", type=float, default=700)
+    parser.add_argument("--retrieval-ms", type=float, default=400)
+    parser.add_argument("--first-token-ms", type=float, default=300)
+    parser.add_argument("--no-tool-share", type=float, default=0.1)
+    parser.add_argument("--rewritten-share", type=float, default=0.1)
+    parser.add_argument("--repeats", type=int, default=2)
+    parser.add_argument("--json-out", help="Also write the results to this JSON file")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    results = asyncio.run(run(args))
+    print(f"🔬 plan {args.plan_ms:.0f} ms, retrieval {args.retrieval_ms:.0f} ms, first token {args.first_token_ms:.0f} ms\n")
+    print(f"{'mode':>10} {'turn kind':>10} {'n':>4} {'p50 TTFT':>9} {'p95 TTFT':>9}")
+    print("-" * 46)
+    for mode, kinds in results.items():
+        for kind, r in kinds.items():
+            if kind != "prefetch":
+                print(f"{mode:>10} {kind:>10} {r['n']:>4} {r['p50_ms']:>9.0f} {r['p95_ms']:>9.0f}")
+    stats = results["prefetch"]["prefetch"]
+    print(f"\nPrefetches: {stats['started']} started, {stats['used']} used, {stats['discarded']} discarded")
+    if args.json_out:
+        write_json(args.json_out, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Retrieval benchmark: sweeps similarity_top_k and vector_distance_threshold.
+
+Runs a labeled question set through retrieval and reports recall@k, MRR,
+retrieved-token volume and latency percentiles for every combination, so the
+agent's retrieval settings can be chosen on data.
+
+Offline, against the in-process fixture corpus:
+
+    uv run python benchmarks/retrieval_benchmark.py
+
+Against the real corpus (RAG_CORPUS from .env) with your own question set:
+
+    uv run python benchmarks/retrieval_benchmark.py --backend vertex --questions my_questions.jsonl
+
+With --adaptive and/or --compress, each threshold is also run through the
+agent's post-processing (over-fetch + ai_agent.adaptive.AdaptiveCutoff,
+ai_agent.compression.ContextCompressor) to compare tokens, latency and
+recall/MRR against the fixed settings.
+
+Question files are JSONL: {"question": "...", "relevant": [{"source": "doc.pdf",
+"contains": "phrase from the relevant chunk"}]}. "source" is optional.
+"""
+
+import argparse
+import os
+import time
+
+from bench_utils import load_jsonl, write_json
+from fixture_retriever import DATA_DIR, FixtureRetriever
+
+from ai_agent.adaptive import AdaptiveCutoff
+from ai_agent.compression import ContextCompressor
+from ai_agent.retrieval import estimate_tokens, vertex_retriever
+from ai_agent.stats import percentile
+
+DEFAULT_QUESTIONS_PATH = os.path.join(DATA_DIR, "retrieval_questions.jsonl")
+# Values currently hard-coded in ai_agent/agent.py
+CURRENT_SETTINGS = (10, 0.6)
+
+
+def is_relevant(chunk, label):
+    if label.get("source") and label["source"] not in (chunk.source_display_name, chunk.source_uri):
+        return False
+    return label["contains"].lower() in chunk.text.lower()
+
+
+def score_question(chunks, labels):
+    """Returns (recall, reciprocal rank) for one question."""
+    found = sum(any(is_relevant(chunk, label) for chunk in chunks) for label in labels)
+    reciprocal_rank = 0.0
+    for rank, chunk in enumerate(chunks, start=1):
+        if any(is_relevant(chunk, label) for label in labels):
+            reciprocal_rank = 1.0 / rank
+            break
+    return found / len(labels), reciprocal_rank
+
+
+def run_config(retrieve, questions, top_k, threshold, repeats=1):
+    recalls, reciprocal_ranks, tokens, counts, latencies = [], [], [], [], []
+    for question in questions:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            chunks = retrieve(question["question"], top_k, threshold)
+            latencies.append((time.perf_counter() - start) * 1000)
+        recall, reciprocal_rank = score_question(chunks, question["relevant"])
+        recalls.append(recall)
+        reciprocal_ranks.append(reciprocal_rank)
+        tokens.append(sum(estimate_tokens(chunk.text) for chunk in chunks))
+        counts.append(len(chunks))
+    n = len(questions)
+    return {
+        "top_k": top_k,
+        "threshold": threshold,
+        "recall_at_k": sum(recalls) / n,
+        "mrr": sum(reciprocal_ranks) / n,
+        "avg_chunks": sum(counts) / n,
+        "avg_tokens": sum(tokens) / n,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+    }
+
+
+def print_results(results):
+    header = f"{'top_k':>5} {'thresh':>6} {'recall@k':>9} {'MRR':>6} {'chunks':>7} {'tokens':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        marker = "  <- current" if (r["top_k"], r["threshold"]) == CURRENT_SETTINGS else ""
+        print(
+            f"{r['top_k']:>5} {r['threshold']:>6.2f} {r['recall_at_k']:>9.3f} {r['mrr']:>6.3f} "
+            f"{r['avg_chunks']:>7.1f} {r['avg_tokens']:>7.0f} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} "
+            f"{r['p99_ms']:>8.1f}{marker}"
+        )
+
+
+def pipeline_retriever(retrieve, postprocessors):
+    """Wraps a retriever so its results go through the post-processors."""
+    def run(query, top_k, threshold):
+        chunks = retrieve(query, top_k, threshold)
+        for postprocess in postprocessors:
+            chunks = postprocess(query, chunks)
+        return chunks
+    return run
+
+
+def build_retriever(args):
+    if args.backend == "fixture":
+        return FixtureRetriever(args.chunks, latency_ms=args.fixture_latency_ms)
+
+    import vertexai
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    vertexai.init(project=os.getenv("GOOGLE_CLOUD_PROJECT"), location=os.getenv("GOOGLE_CLOUD_LOCATION"))
+    return vertex_retriever(args.corpus or os.getenv("RAG_CORPUS"))
+
+
+def parse_args(description=__doc__):
+    parser = argparse.ArgumentParser(description=description.strip().splitlines()[0])
+    parser.add_argument("--backend", choices=["fixture", "vertex"], default="fixture")
+    parser.add_argument("--corpus", help="Corpus resource name (default: RAG_CORPUS)")
+    parser.add_argument("--questions", default=DEFAULT_QUESTIONS_PATH)
+    parser.add_argument("--chunks", default=os.path.join(DATA_DIR, "retrieval_fixture_chunks.jsonl"))
+    parser.add_argument("--fixture-latency-ms", type=float, default=0.0)
+    parser.add_argument("--top-k", type=int, nargs="+", default=[1, 3, 5, 10, 20])
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.4, 0.6, 0.8, 1.0])
+    parser.add_argument("--adaptive", action="store_true", help="Also run adaptive top-k")
+    parser.add_argument("--compress", action="store_true", help="Also run context compression")
+    parser.add_argument("--overfetch-top-k", type=int, default=20)
+    parser.add_argument("--token-budget", type=int, default=2000)
+    parser.add_argument("--repeats", type=int, default=1, help="Timed runs per question")
+    parser.add_argument("--json-out", help="Also write the results to this JSON file")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    questions = load_jsonl(args.questions)
+    retrieve = build_retriever(args)
+    print(f"🔬 {len(questions)} questions, backend={args.backend}\n")
+
+    results = [
+        run_config(retrieve, questions, top_k, threshold, args.repeats)
+        for threshold in args.thresholds
+        for top_k in args.top_k
+    ]
+    if args.adaptive or args.compress:
+        postprocessors, labels = [], []
+        if args.adaptive:
+            postprocessors.append(AdaptiveCutoff(max_keep=args.overfetch_top_k, token_budget=args.token_budget))
+            labels.append("A")
+        if args.compress:
+            postprocessors.append(ContextCompressor())
+            labels.append("C")
+        pipeline = pipeline_retriever(retrieve, postprocessors)
+        top_k = args.overfetch_top_k if args.adaptive else CURRENT_SETTINGS[0]
+        for threshold in args.thresholds:
+            result = run_config(pipeline, questions, top_k, threshold, args.repeats)
+            result["top_k"] = "+".join(labels)
+            results.append(result)
+    print_results(results)
+    if args.json_out:
+        write_json(args.json_out, results)
+
+
+if __name__ == "__main__":
+    main()
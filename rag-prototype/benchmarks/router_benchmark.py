@@ -0,0 +1,80 @@
+"""
+Intent router benchmark: routing latency, short-circuit share and accuracy.
+
+Classifies a labeled message mix (small talk plus corpus questions, including
+the queries from ai_agent/vertex_engine_deploy/run.py) with
+ai_agent.router.IntentRouter and reports per-message latency percentiles,
+the share of traffic answered from templates and how often each intent was
+predicted correctly. No cloud access needed.
+
+    uv run python benchmarks/router_benchmark.py
+    uv run python benchmarks/router_benchmark.py --messages my_traffic.jsonl --repeats 1000
+
+Message files are JSONL: {"message": "...", "expected": "greeting"}.
+"expected" is optional; "unknown" means the model decides, as before routing.
+"""
+
+import argparse
+import os
+import time
+from collections import Counter
+
+from bench_utils import load_jsonl, write_json
+from fixture_retriever import DATA_DIR
+
+from ai_agent.router import SMALL_TALK_INTENTS, UNKNOWN, IntentRouter
+from ai_agent.stats import percentile
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", default=os.path.join(DATA_DIR, "router_messages.jsonl"))
+    parser.add_argument("--repeats", type=int, default=200, help="Timed runs per message")
+    parser.add_argument("--json-out", help="Also write the results to this JSON file")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    messages = load_jsonl(args.messages)
+    router = IntentRouter()
+
+    latencies = []
+    for _ in range(args.repeats):
+        for row in messages:
+            start = time.perf_counter()
+            router.classify(row["message"])
+            latencies.append((time.perf_counter() - start) * 1_000_000)
+
+    predicted = [router.route(row["message"]) for row in messages]
+    labeled = [(row["expected"], intent) for row, intent in zip(messages, predicted, strict=True) if row.get("expected")]
+    # A small-talk template sent in reply to a real question is the costly mistake
+    wrong_template = sum(1 for expected, intent in labeled if intent in SMALL_TALK_INTENTS and intent != expected)
+    deferred = sum(1 for _, intent in labeled if intent == UNKNOWN)
+    stats = router.stats()
+
+    print(f"🔬 {len(messages)} messages x {args.repeats} repeats\n")
+    print(f"Routing latency:     p50 {percentile(latencies, 50):.1f} µs, p99 {percentile(latencies, 99):.1f} µs")
+    print(f"Short-circuited:     {stats['short_circuited']}/{stats['messages']} ({stats['short_circuit_share']:.0%})")
+    print(f"Predicted intents:   {dict(Counter(predicted))}")
+    if labeled:
+        correct = sum(1 for expected, intent in labeled if expected == intent)
+        print(f"Correct:             {correct}/{len(labeled)}")
+        print(f"Deferred to model:   {deferred}/{len(labeled)}")
+        print(f"Wrong template:      {wrong_template}/{len(labeled)}")
+    for row, intent in zip(messages, predicted, strict=True):
+        if row.get("expected") and row["expected"] != intent:
+            print(f"  ⚠️  {intent:<15} (expected {row['expected']}): {row['message'][:70]}")
+
+    if args.json_out:
+        write_json(args.json_out, {
+            "p50_us": percentile(latencies, 50),
+            "p99_us": percentile(latencies, 99),
+            "stats": stats,
+            "wrong_template": wrong_template,
+            "deferred": deferred,
+        })
+
+
+if __name__ == "__main__":
+    main()
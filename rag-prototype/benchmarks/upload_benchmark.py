@@ -0,0 +1,89 @@
+"""
+Compares single-stream and parallel composite upload throughput.
+
+Runs against a local storage emulator, e.g. fake-gcs-server:
+
+    docker run -d -p 4443:4443 fsouza/fake-gcs-server -scheme http
+    export STORAGE_EMULATOR_HOST=http://localhost:4443
+    uv run python benchmarks/upload_benchmark.py --size-mb 512
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from google.auth.credentials import AnonymousCredentials
+from google.cloud import storage
+
+# --- PATH SETUP ---
+# Make the loader modules importable (.../rag-prototype/data-load-to-corpus)
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, "data-load-to-corpus"))
+# ------------------
+
+from parallel_upload import parallel_upload_to_gcs  # noqa: E402
+
+
+def make_test_file(directory, size_mb):
+    """Writes a file of random bytes so compression can't skew the numbers."""
+    path = os.path.join(directory, f"bench-{size_mb}mb.bin")
+    with open(path, "wb") as f:
+        for _ in range(size_mb):
+            f.write(os.urandom(1024 * 1024))
+    return path
+
+
+def timed(label, size_mb, fn):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40} {elapsed:8.2f} s {size_mb / elapsed:10.1f} MB/s")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=256)
+    parser.add_argument("--bucket", default="upload-benchmark")
+    parser.add_argument("--part-sizes-mb", type=int, nargs="+", default=[16, 32, 64])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[4, 8, 16])
+    args = parser.parse_args()
+
+    if not os.getenv("STORAGE_EMULATOR_HOST"):
+        print("❌ STORAGE_EMULATOR_HOST is not set. Start a local storage emulator first.")
+        sys.exit(1)
+
+    client = storage.Client(project="benchmark", credentials=AnonymousCredentials())
+    bucket = client.bucket(args.bucket)
+    if not bucket.exists():
+        bucket = client.create_bucket(args.bucket)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = make_test_file(temp_dir, args.size_mb)
+        print(f"\nUploading {args.size_mb} MB to {os.getenv('STORAGE_EMULATOR_HOST')}\n")
+
+        baseline = timed(
+            "single stream",
+            args.size_mb,
+            lambda: bucket.blob("bench/single").upload_from_filename(path),
+        )
+        for part_size_mb in args.part_sizes_mb:
+            for concurrency in args.concurrency:
+                elapsed = timed(
+                    f"parallel part={part_size_mb}MB workers={concurrency}",
+                    args.size_mb,
+                    lambda part_size_mb=part_size_mb, concurrency=concurrency: parallel_upload_to_gcs(
+                        bucket,
+                        path,
+                        "bench/parallel",
+                        part_size_mb=part_size_mb,
+                        concurrency=concurrency,
+                    ),
+                )
+                print(f"{'':<40} speedup x{baseline / elapsed:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Builds or updates the local vector index snapshot (ai_agent/local_index.py).
+
+Reads the same source documents as the RAG corpus (the SOURCE_GCS_BUCKET
+objects by default, or local files), chunks and embeds them, and appends
+them to the snapshot. Sources already in the snapshot are skipped, so
+re-running after new documents land only embeds the new ones. The ingestion
+pipeline (backend-automation) does not update the snapshot; run this again
+after new uploads.
+
+    uv run python data-load-to-corpus/build_local_index.py
+    uv run python data-load-to-corpus/build_local_index.py docs/*.pdf --embedder hashed --dtype float16
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+from dotenv import load_dotenv
+
+# --- PATH SETUP ---
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+# ------------------
+
+from ai_agent.local_index import HASHED_EMBEDDING_MODEL, LocalVectorIndex, make_embedder  # noqa: E402
+
+load_dotenv()
+
+DEFAULT_INDEX_PATH = os.getenv("RAG_LOCAL_INDEX_PATH", os.path.join(project_root, "local_index"))
+# Same model as the RAG corpus (data_load_to_corpus.py), so scores are comparable
+DEFAULT_EMBEDDING_MODEL = "publishers/google/models/text-embedding-004"
+EMBEDDING_DIMS = {"text-embedding-004": 768, HASHED_EMBEDDING_MODEL: 768}
+SUPPORTED_EXTENSIONS = (".pdf", ".txt", ".md")
+
+
+def extract_text(path):
+    """Plain text of a PDF, text or markdown file."""
+    if path.lower().endswith(".pdf"):
+        from pypdf import PdfReader
+
+        return "\n".join(page.extract_text() or "" for page in PdfReader(path).pages)
+    with open(path, encoding="utf-8", errors="replace") as f:
+        return f.read()
+
+
+def chunk_text(text, chunk_size, chunk_overlap):
+    """Overlapping word windows of about chunk_size tokens (~0.75 words per token)."""
+    words = text.split()
+    size = max(1, chunk_size * 3 // 4)
+    step = max(1, size - chunk_overlap * 3 // 4)
+    return [" ".join(words[i:i + size]) for i in range(0, max(1, len(words) - size + step), step) if words[i:i + size]]
+
+
+def gcs_sources(bucket_name, temp_dir):
+    """Downloads the source bucket's documents; yields (uri, display name, local path)."""
+    from google.cloud import storage
+    from parallel_upload import PARTS_PREFIX
+
+    bucket_name = bucket_name.replace("gs://", "")
+    client = storage.Client(project=os.getenv("GOOGLE_CLOUD_PROJECT"))
+    for blob in client.list_blobs(bucket_name):
+        if blob.name.startswith(PARTS_PREFIX) or not blob.name.lower().endswith(SUPPORTED_EXTENSIONS):
+            continue
+        path = os.path.join(temp_dir, blob.name.replace("/", "_"))
+        blob.download_to_filename(path)
+        yield f"gs://{bucket_name}/{blob.name}", os.path.basename(blob.name), path
+
+
+def local_sources(paths):
+    for path in paths:
+        yield os.path.abspath(path), os.path.basename(path), path
+
+
+def open_or_create_index(args):
+    if os.path.exists(os.path.join(args.index_dir, "manifest.json")):
+        index = LocalVectorIndex(args.index_dir)
+        print(f"Found existing index at {args.index_dir} ({len(index)} chunks, {index.embedding_model})")
+        return index
+    model = HASHED_EMBEDDING_MODEL if args.embedder == "hashed" else args.embedding_model
+    dim = EMBEDDING_DIMS.get(model.rsplit("/", 1)[-1])
+    if dim is None:
+        raise ValueError(f"Unknown embedding dimension for {model}")
+    print(f"Creating index at {args.index_dir} ({model}, {args.dtype})")
+    return LocalVectorIndex.create(args.index_dir, dim=dim, dtype=args.dtype, embedding_model=model)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("sources", nargs="*", help="Local files (default: all documents in SOURCE_GCS_BUCKET)")
+    parser.add_argument("--index-dir", default=DEFAULT_INDEX_PATH)
+    parser.add_argument("--embedder", choices=["vertex", "hashed"], default="vertex",
+                        help="'hashed' needs no network (lexical matching only)")
+    parser.add_argument("--embedding-model", default=DEFAULT_EMBEDDING_MODEL)
+    # int8 is half the size of float16 and faster to search (see benchmarks/local_index_benchmark.py)
+    parser.add_argument("--dtype", choices=["float16", "int8"], default="int8")
+    parser.add_argument("--chunk-size", type=int, default=1024, help="Tokens per chunk")
+    parser.add_argument("--chunk-overlap", type=int, default=200, help="Tokens shared by neighbouring chunks")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    index = open_or_create_index(args)
+    embedder = make_embedder(index.embedding_model, index.dim, task_type="RETRIEVAL_DOCUMENT")
+    indexed = index.source_uris()
+
+    added = skipped = 0
+    with tempfile.TemporaryDirectory() as temp_dir:
+        if args.sources:
+            sources = local_sources(args.sources)
+        else:
+            bucket = os.getenv("SOURCE_GCS_BUCKET")
+            if not bucket:
+                raise ValueError("SOURCE_GCS_BUCKET is not set. Pass local files or run data_load_to_corpus.py first.")
+            sources = gcs_sources(bucket, temp_dir)
+
+        for uri, display_name, path in sources:
+            if uri in indexed:
+                skipped += 1
+                continue
+            chunks = chunk_text(extract_text(path), args.chunk_size, args.chunk_overlap)
+            if not chunks:
+                print(f"⚠️  No text extracted from {display_name}, skipping")
+                continue
+            index.append(embedder(chunks), chunks, uri, display_name)
+            added += 1
+            print(f"✅ Indexed {display_name}: {len(chunks)} chunks")
+
+    print(f"\nIndex {args.index_dir}: {len(index)} chunks from {len(index.source_uris())} files "
+          f"({added} added, {skipped} already indexed)")
+
+
+if __name__ == "__main__":
+    main()
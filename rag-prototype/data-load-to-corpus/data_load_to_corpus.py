@@ -9,16 +9,23 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import os
+import sys
+
+# The corpus registry is shared with the backend worker and validator
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend-automation")))
+
 from google.auth import default
 from google.api_core.exceptions import ResourceExhausted
 import vertexai
 from vertexai.preview import rag
 from google.cloud import storage
-import os
 from dotenv import load_dotenv, set_key
 import requests
 import tempfile
 import uuid
+from parallel_upload import PARALLEL_UPLOAD_THRESHOLD_MB, parallel_upload_to_gcs
+from corpus_registry import CorpusRegistry
 
 # Load environment variables from .env file
 load_dotenv()
@@ -35,8 +42,10 @@ if not LOCATION:
     raise ValueError(
         "GOOGLE_CLOUD_LOCATION environment variable not set. Please set it in your .env file."
     )
-CORPUS_DISPLAY_NAME = "Alphabet_10K_2024_corpus"
+# Override with RAG_CORPUS_DISPLAY_NAME to load into another (e.g. per business unit) corpus
+CORPUS_DISPLAY_NAME = os.getenv("RAG_CORPUS_DISPLAY_NAME", "Alphabet_10K_2024_corpus")
 CORPUS_DESCRIPTION = "Corpus containing Alphabet's 10-K 2024 document"
+EMBEDDING_MODEL = "publishers/google/models/text-embedding-004"
 # Initial URL (Primary)
 PDF_URL = "https://abc.xyz/assets/77/51/9841ad5c4fbe85b4440c47a4df8d/goog-10-k-2024.pdf"
 PDF_FILENAME = "goog-10-k-2024.pdf"
@@ -139,26 +148,28 @@ def ensure_staging_bucket(env_file_path):
     
     return raw_bucket_name
 
-def create_or_get_corpus():
-  """Creates a new corpus or retrieves an existing one."""
+def create_or_get_corpus(registry):
+  """Creates a new corpus or retrieves an existing one from the corpus registry."""
+  corpus = registry.get(CORPUS_DISPLAY_NAME)
+  if corpus is not None:
+    print(f"Found existing corpus with display name '{CORPUS_DISPLAY_NAME}'")
+    return corpus
   embedding_model_config = rag.EmbeddingModelConfig(
-      publisher_model="publishers/google/models/text-embedding-004"
+      publisher_model=EMBEDDING_MODEL
   )
-  existing_corpora = rag.list_corpora()
-  corpus = None
-  for existing_corpus in existing_corpora:
-    if existing_corpus.display_name == CORPUS_DISPLAY_NAME:
-      corpus = existing_corpus
-      print(f"Found existing corpus with display name '{CORPUS_DISPLAY_NAME}'")
-      break
-  if corpus is None:
-    corpus = rag.create_corpus(
-        display_name=CORPUS_DISPLAY_NAME,
-        description=CORPUS_DESCRIPTION,
-        embedding_model_config=embedding_model_config,
-    )
-    print(f"Created new corpus with display name '{CORPUS_DISPLAY_NAME}'")
-  return corpus
+  created = rag.create_corpus(
+      display_name=CORPUS_DISPLAY_NAME,
+      description=CORPUS_DESCRIPTION,
+      embedding_model_config=embedding_model_config,
+  )
+  registry.add(
+      CORPUS_DISPLAY_NAME,
+      created.name,
+      description=CORPUS_DESCRIPTION,
+      embedding_model=EMBEDDING_MODEL,
+  )
+  print(f"Created new corpus with display name '{CORPUS_DISPLAY_NAME}'")
+  return registry.get(CORPUS_DISPLAY_NAME)
 
 def download_pdf_from_url(url, output_path):
   """Downloads a PDF file from the specified URL with browser-like headers."""
@@ -202,10 +213,15 @@ def upload_to_gcs(bucket_name, source_file_path, destination_blob_name):
         # Ensure bucket name is clean for upload (no gs://)
         clean_bucket_name = bucket_name.replace("gs://", "")
         bucket = storage_client.bucket(clean_bucket_name)
-        blob = bucket.blob(destination_blob_name)
 
         print(f"Uploading {destination_blob_name} to gs://{clean_bucket_name}...")
-        blob.upload_from_filename(source_file_path)
+        # Large files (e.g. scanned filings) are split and uploaded in parallel
+        file_size = os.path.getsize(source_file_path)
+        if file_size >= PARALLEL_UPLOAD_THRESHOLD_MB * 1024 * 1024:
+            parallel_upload_to_gcs(bucket, source_file_path, destination_blob_name)
+        else:
+            blob = bucket.blob(destination_blob_name)
+            blob.upload_from_filename(source_file_path)
         print(f"File uploaded to GCS successfully.")
     except Exception as e:
         print(f"Error uploading to GCS: {e}")
@@ -233,12 +249,13 @@ def upload_pdf_to_corpus(corpus_name, pdf_path, display_name, description):
     print(f"Error uploading file {display_name}: {e}")
     return None
 
-def list_corpus_files(corpus_name):
+def list_corpus_files(corpus_name, registry):
   """Lists files in the specified corpus."""
   files = list(rag.list_files(corpus_name=corpus_name))
   print(f"Total files in corpus: {len(files)}")
   for file in files:
     print(f"File: {file.display_name} - {file.name}")
+  registry.record_file_count(corpus_name, len(files))
 
 
 def main():
@@ -251,7 +268,8 @@ def main():
   ensure_staging_bucket(ENV_FILE_PATH)
   
   # 3. Ensure RAG Corpus exists
-  corpus = create_or_get_corpus()
+  registry = CorpusRegistry(PROJECT_ID, LOCATION)
+  corpus = create_or_get_corpus(registry)
 
   # Update the .env file with the corpus name
   update_env_file("RAG_CORPUS", corpus.name, ENV_FILE_PATH)
@@ -275,7 +293,7 @@ def main():
     upload_to_gcs(source_bucket_name, pdf_path, PDF_FILENAME)
   
   # List all files in the corpus
-  list_corpus_files(corpus_name=corpus.name)
+  list_corpus_files(corpus_name=corpus.name, registry=registry)
 
 if __name__ == "__main__":
   main()
\ No newline at end of file
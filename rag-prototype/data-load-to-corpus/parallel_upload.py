@@ -0,0 +1,154 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Parallel composite uploads for large source documents.
+
+The file is split into parts, the parts are uploaded concurrently as temporary
+objects, composed into the destination object and the CRC32C of the result is
+checked against the local file.
+"""
+
+import base64
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import google_crc32c
+from google.api_core.exceptions import NotFound
+
+# Tunables (can be overridden from the .env file)
+PART_SIZE_MB = int(os.getenv("GCS_UPLOAD_PART_SIZE_MB", "32"))
+CONCURRENCY = int(os.getenv("GCS_UPLOAD_CONCURRENCY", "8"))
+# Files at or above this size use the parallel path in upload_to_gcs()
+PARALLEL_UPLOAD_THRESHOLD_MB = int(os.getenv("GCS_PARALLEL_UPLOAD_THRESHOLD_MB", "100"))
+
+# Temporary parts live under this prefix. The ingestion worker ignores it,
+# otherwise every part would be imported into the RAG corpus.
+PARTS_PREFIX = "_parallel_uploads/"
+
+# GCS accepts at most 32 source objects per compose request
+MAX_COMPOSE_COMPONENTS = 32
+
+_READ_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+def file_crc32c(file_path):
+    """Returns the base64 encoded CRC32C of a local file, as reported by GCS."""
+    checksum = google_crc32c.Checksum()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(_READ_CHUNK_SIZE), b""):
+            checksum.update(chunk)
+    return base64.b64encode(checksum.digest()).decode("utf-8")
+
+
+def _split_parts(file_size, part_size):
+    """Returns (offset, length) tuples covering the whole file."""
+    if file_size == 0:
+        return [(0, 0)]
+    return [
+        (offset, min(part_size, file_size - offset))
+        for offset in range(0, file_size, part_size)
+    ]
+
+
+def _upload_part(blob, source_file_path, offset, length):
+    """Uploads one byte range of the file as a temporary object."""
+    # Every worker uses its own file handle so reads don't interfere
+    with open(source_file_path, "rb") as f:
+        f.seek(offset)
+        blob.upload_from_file(f, size=length, checksum="crc32c")
+    return blob
+
+
+def _compose(bucket, destination_blob_name, parts, temp_prefix, intermediates):
+    """
+    Composes the parts into the destination, in rounds of 32 if needed.
+    Intermediate objects are appended to `intermediates` for cleanup.
+    """
+    level = 0
+    while len(parts) > MAX_COMPOSE_COMPONENTS:
+        next_parts = []
+        for i in range(0, len(parts), MAX_COMPOSE_COMPONENTS):
+            group = parts[i:i + MAX_COMPOSE_COMPONENTS]
+            intermediate = bucket.blob(f"{temp_prefix}compose-{level}-{i:05d}")
+            intermediate.compose(group)
+            intermediates.append(intermediate)
+            next_parts.append(intermediate)
+        parts = next_parts
+        level += 1
+
+    destination = bucket.blob(destination_blob_name)
+    destination.compose(parts)
+    return destination
+
+
+def _delete_quietly(blobs):
+    for blob in blobs:
+        try:
+            blob.delete()
+        except NotFound:
+            # Part never made it to the bucket (failed or cancelled upload)
+            pass
+        except Exception as e:
+            print(f"Warning: could not delete temporary object {blob.name}: {e}")
+
+
+def parallel_upload_to_gcs(
+    bucket,
+    source_file_path,
+    destination_blob_name,
+    part_size_mb=PART_SIZE_MB,
+    concurrency=CONCURRENCY,
+):
+    """
+    Uploads a large file as a parallel composite upload and verifies it.
+    Raises ValueError if the composed object's CRC32C doesn't match the file.
+    """
+    file_size = os.path.getsize(source_file_path)
+    part_size = max(1, int(part_size_mb * 1024 * 1024))
+    parts = _split_parts(file_size, part_size)
+    temp_prefix = f"{PARTS_PREFIX}{uuid.uuid4().hex}/"
+
+    print(
+        f"Parallel upload: {len(parts)} part(s) of up to {part_size_mb} MB, "
+        f"{concurrency} worker(s)"
+    )
+
+    part_blobs = [
+        bucket.blob(f"{temp_prefix}part-{index:05d}") for index in range(len(parts))
+    ]
+    intermediates = []
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = [
+                executor.submit(_upload_part, blob, source_file_path, offset, length)
+                for blob, (offset, length) in zip(part_blobs, parts, strict=True)
+            ]
+            # Checksum the local file while the parts are in flight
+            expected_crc32c = file_crc32c(source_file_path)
+            for future in futures:
+                future.result()
+
+        destination = _compose(
+            bucket, destination_blob_name, part_blobs, temp_prefix, intermediates
+        )
+        destination.reload()
+        if destination.crc32c != expected_crc32c:
+            destination.delete()
+            raise ValueError(
+                f"Checksum mismatch for gs://{bucket.name}/{destination_blob_name}: "
+                f"expected {expected_crc32c}, got {destination.crc32c}"
+            )
+        print(f"Composed object verified (crc32c={destination.crc32c}).")
+        return destination
+    finally:
+        _delete_quietly(part_blobs + intermediates)
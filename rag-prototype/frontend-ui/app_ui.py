@@ -12,6 +12,15 @@ from vertexai import agent_engines
 # --- NEW IMPORTS FOR VERTEX AI ---
 import vertexai
 from vertexai import agent_engines
+from functools import lru_cache
+import sys
+
+# --- PATH SETUP ---
+# hedging.py uses ai_agent.stats from the project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# ------------------
+
+from hedging import FirstEventLatency, HedgedStreamer
 
 # --- CONFIGURATION & SETUP ---
 # Load environment variables
@@ -20,8 +29,10 @@ load_dotenv()
 PROJECT_ID = os.getenv("GOOGLE_CLOUD_PROJECT")
 LOCATION = os.getenv("GOOGLE_CLOUD_LOCATION")
 AGENT_ENGINE_ID = os.getenv("AGENT_ENGINE_ID")
+# Deployments to hedge across, primary first (comma-separated resource names)
+AGENT_ENGINE_IDS = [engine_id.strip() for engine_id in os.getenv("AGENT_ENGINE_IDS", AGENT_ENGINE_ID or "").split(",") if engine_id.strip()]
 
-if not AGENT_ENGINE_ID:
+if not AGENT_ENGINE_IDS:
     print("WARNING: AGENT_ENGINE_ID not found in .env. Make sure you ran the deployment script.")
 
 # Initialize Vertex AI SDK
@@ -211,26 +222,45 @@ body {
 """
 
 # --- BACKEND AGENT LOGIC (Vertex AI SDK) ---
+def engine_name(resource_name: str) -> str:
+    """Short label for logs: the region and engine id of the resource name."""
+    parts = resource_name.split("/")
+    if len(parts) >= 6 and parts[2] == "locations":
+        return f"{parts[3]}/{parts[5]}"
+    return resource_name
+
+
+@lru_cache(maxsize=1)
+def get_streamer() -> HedgedStreamer:
+    """Remote Agent objects are fetched once and reused across requests."""
+    engines = [(engine_name(engine_id), agent_engines.get(engine_id)) for engine_id in AGENT_ENGINE_IDS]
+    latency = FirstEventLatency(default_ms=float(os.getenv("AGENT_HEDGE_DEFAULT_MS", "5000")))
+    return HedgedStreamer(
+        engines,
+        latency=latency,
+        hedge_percentile=float(os.getenv("AGENT_HEDGE_PERCENTILE", "95")),
+        first_event_timeout_seconds=float(os.getenv("AGENT_FIRST_EVENT_TIMEOUT_SECONDS", "60")),
+    )
+
+
 def stream_from_agent_engine(prompt: str):
     """
     Connects to the Deployed Vertex AI Agent Engine and yields chunks of text.
+    With several engines in AGENT_ENGINE_IDS, a slow primary is hedged to the next one.
     """
-    if not AGENT_ENGINE_ID:
+    if not AGENT_ENGINE_IDS:
         yield "Error: AGENT_ENGINE_ID is missing. Check your .env file or deployment."
         return
 
     try:
-        # 1. Get the Remote Agent Object
-        agent_engine = agent_engines.get(AGENT_ENGINE_ID)
+        # 1. Get the Remote Agent Objects (primary first)
+        streamer = get_streamer()
         
         # 2. Generate a unique user session ID (or use a fixed one for demo)
         user_session_id = f"gradio-user-{uuid.uuid4()}"
 
-        # 3. Stream the query to Vertex AI
-        response_stream = agent_engine.stream_query(
-            user_id=user_session_id,
-            message=prompt
-        )
+        # 3. Stream the query to Vertex AI, hedged across the engines
+        response_stream = streamer.stream(prompt, user_id=user_session_id)
 
         # 4. Parse the event stream from Vertex
         for event in response_stream:
@@ -300,6 +330,6 @@ app = gr.mount_gradio_app(main_app, demo, path="/chatbot")
 
 # --- Run the combined app with Uvicorn ---
 if __name__ == "__main__":
-    print(f"Launching app connected to Vertex AI Agent Engine: {AGENT_ENGINE_ID}")
+    print(f"Launching app connected to Vertex AI Agent Engine: {', '.join(AGENT_ENGINE_IDS)}")
     print("Access at http://127.0.0.1:7860/")
     uvicorn.run(app, host="127.0.0.1", port=7860)
\ No newline at end of file
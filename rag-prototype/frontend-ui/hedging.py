@@ -0,0 +1,209 @@
+"""
+Hedged streaming across several Agent Engine deployments.
+
+A query goes to the primary engine first. If no event arrives by the
+observed p95 time to first event, the same query is sent to the next
+engine. The first stream to produce an event is kept and the others are
+cancelled. An engine that fails before its first event is replaced by the
+next one right away, without waiting for the hedge delay.
+
+Every query uses a fresh user id and no session id, so each engine creates
+its own session and the streams are interchangeable.
+"""
+
+import queue
+import threading
+import time
+from collections import Counter, deque
+
+from ai_agent.stats import percentile
+
+_EVENT, _DONE, _ERROR = "event", "done", "error"
+
+
+class FirstEventLatency:
+    """Rolling window of the primary engine's time to first event, in ms."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20, default_ms: float = 5000.0):
+        self.samples = deque(maxlen=window)
+        self.min_samples = min_samples
+        self.default_ms = default_ms
+        self._lock = threading.Lock()
+
+    def record(self, latency_ms: float):
+        with self._lock:
+            self.samples.append(latency_ms)
+
+    def percentile(self, pct: float) -> float:
+        """Nearest-rank percentile, or default_ms until min_samples are seen."""
+        with self._lock:
+            if not self.samples or len(self.samples) < self.min_samples:
+                return self.default_ms
+            return percentile(list(self.samples), pct)
+
+
+class _Attempt:
+    """One stream_query call, iterated in its own thread."""
+
+    def __init__(self, index, name, engine, user_id, message, events):
+        self.index = index
+        self.name = name
+        self.started = time.perf_counter()
+        self.cancelled = threading.Event()
+        self.failed = False
+        self._thread = threading.Thread(
+            target=self._run, args=(engine, user_id, message, events), daemon=True, name=f"hedge-{name}"
+        )
+        self._thread.start()
+
+    def _run(self, engine, user_id, message, events):
+        stream = None
+        try:
+            stream = engine.stream_query(user_id=user_id, message=message)
+            for event in stream:
+                # A stream blocked on the network only notices the cancel at its next event
+                if self.cancelled.is_set():
+                    break
+                events.put((self, _EVENT, event))
+            else:
+                events.put((self, _DONE, None))
+        except Exception as e:
+            events.put((self, _ERROR, e))
+        finally:
+            close = getattr(stream, "close", None)
+            if close is not None and self.cancelled.is_set():
+                close()
+
+
+class HedgedStreamer:
+    """
+    Streams a query from `engines`, a list of (name, engine) pairs in order of
+    preference, where each engine has `stream_query(user_id=..., message=...)`.
+    """
+
+    def __init__(
+        self,
+        engines,
+        latency: FirstEventLatency = None,
+        hedge_percentile: float = 95,
+        first_event_timeout_seconds: float = 60.0,
+        log_every: int = 100,
+    ):
+        if not engines:
+            raise ValueError("At least one Agent Engine is required")
+        self.engines = list(engines)
+        self.latency = latency or FirstEventLatency()
+        self.hedge_percentile = hedge_percentile
+        self.first_event_timeout_seconds = first_event_timeout_seconds
+        self.log_every = log_every
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.failovers = 0
+        self.wins = Counter()
+
+    def hedge_delay_ms(self) -> float:
+        return self.latency.percentile(self.hedge_percentile)
+
+    def stream(self, message: str, user_id: str):
+        """Yields the events of the first engine to respond."""
+        events = queue.Queue()
+        attempts = []
+        hedge_delay = self.hedge_delay_ms() / 1000
+        start = time.perf_counter()
+        deadline = start + self.first_event_timeout_seconds
+        next_hedge = start + hedge_delay
+        hedged = failed_over = False
+
+        def launch():
+            name, engine = self.engines[len(attempts)]
+            attempts.append(_Attempt(len(attempts), name, engine, user_id, message, events))
+
+        launch()
+        try:
+            # --- Wait for the first event from any attempt ---
+            while True:
+                now = time.perf_counter()
+                if now >= deadline:
+                    raise TimeoutError(
+                        f"No Agent Engine responded within {self.first_event_timeout_seconds:g}s "
+                        f"(tried {', '.join(attempt.name for attempt in attempts)})"
+                    )
+                can_hedge = len(attempts) < len(self.engines)
+                wait = min(deadline, next_hedge) - now if can_hedge else deadline - now
+                try:
+                    attempt, kind, payload = events.get(timeout=max(0.0, wait))
+                except queue.Empty:
+                    if can_hedge and time.perf_counter() >= next_hedge:
+                        hedged = True
+                        print(f"⏱️  No event from {attempts[-1].name} after {hedge_delay * 1000:.0f} ms, hedging to {self.engines[len(attempts)][0]}")
+                        launch()
+                        next_hedge = time.perf_counter() + hedge_delay
+                    continue
+                if kind == _EVENT:
+                    winner = attempt
+                    break
+                # Finished or failed without any event: fail over right away
+                # unless another attempt is still running
+                attempt.failed = True
+                last_error = payload if kind == _ERROR else RuntimeError(f"{attempt.name} returned no events")
+                print(f"⚠️  Agent Engine {attempt.name} failed before responding: {last_error}")
+                if all(a.failed for a in attempts):
+                    if len(attempts) == len(self.engines):
+                        raise last_error
+                    failed_over = True
+                    launch()
+                    next_hedge = time.perf_counter() + hedge_delay
+
+            # --- Commit to the winner and cancel the others ---
+            for attempt in attempts:
+                if attempt is not winner:
+                    attempt.cancelled.set()
+            self._record(attempts, winner, hedged, failed_over)
+            yield payload
+            while True:
+                attempt, kind, payload = events.get()
+                if attempt is not winner:
+                    continue
+                if kind == _EVENT:
+                    yield payload
+                elif kind == _ERROR:
+                    raise payload
+                else:
+                    return
+        finally:
+            for attempt in attempts:
+                attempt.cancelled.set()
+
+    def _record(self, attempts, winner, hedged, failed_over):
+        now = time.perf_counter()
+        primary = attempts[0]
+        # The hedge delay estimates the primary's latency. When the primary lost,
+        # the time it had been waiting is a lower bound of its latency, which
+        # keeps slow primaries from pulling the estimate down.
+        if not primary.failed:
+            self.latency.record((now - primary.started) * 1000)
+        with self._lock:
+            self.requests += 1
+            self.hedged += int(hedged)
+            self.hedge_wins += int(hedged and winner.index > 0)
+            self.failovers += int(failed_over)
+            self.wins[winner.name] += 1
+            if self.log_every and self.requests % self.log_every == 0:
+                stats = self.stats()
+                print(
+                    f"📊 Hedging: {stats['requests']} requests, hedge rate {stats['hedge_rate']:.1%}, "
+                    f"hedge win rate {stats['hedge_win_rate']:.1%}, {stats['failovers']} failovers"
+                )
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "hedge_rate": self.hedged / self.requests if self.requests else 0.0,
+            "hedge_win_rate": self.hedge_wins / self.hedged if self.hedged else 0.0,
+            "failovers": self.failovers,
+            "wins": dict(self.wins),
+            "hedge_delay_ms": self.hedge_delay_ms(),
+        }
@@ -0,0 +1,42 @@
+import importlib
+import pickle
+import sys
+
+import cloudpickle
+import pytest
+import vertexai
+from vertexai.preview.reasoning_engines import AdkApp
+
+SHARDS = "projects/1/locations/us-central1/ragCorpora/2,projects/1/locations/us-central1/ragCorpora/3"
+
+
+@pytest.fixture
+def agent_module(monkeypatch):
+    """ai_agent.agent imported against two shards, as it is at deploy time."""
+    monkeypatch.setenv("RAG_CORPORA", SHARDS)
+    monkeypatch.setenv("AGENT_RETRIEVAL_PREFETCH", "true")
+    vertexai.init(project="test-project", location="us-central1")
+    monkeypatch.delitem(sys.modules, "ai_agent.agent", raising=False)
+    return importlib.import_module("ai_agent.agent")
+
+
+def test_agent_survives_clone_and_pickle(agent_module):
+    root_agent = agent_module.root_agent
+
+    # agent_engines.create clones the app and then cloudpickles it
+    app = AdkApp(agent=root_agent).clone()
+
+    restored = pickle.loads(cloudpickle.dumps(app))
+
+    agent = restored._tmpl_attrs["agent"]
+    assert agent.name == root_agent.name
+    assert len(agent.tools) == len(root_agent.tools)
+
+
+def test_copies_rebuild_their_executor(agent_module):
+    retriever = agent_module.retriever
+
+    restored = pickle.loads(cloudpickle.dumps(retriever))
+
+    assert restored._executor is not retriever._executor
+    assert restored._executor.submit(lambda: 42).result() == 42
@@ -0,0 +1,56 @@
+import importlib.metadata
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ai_agent", "vertex_engine_deploy"))
+
+import agent_package
+
+
+def not_installed(distribution):
+    raise importlib.metadata.PackageNotFoundError(distribution)
+
+
+def test_requirements_are_pinned_to_installed_versions(monkeypatch):
+    monkeypatch.setattr(agent_package.importlib.metadata, "version", lambda distribution: "9.9.9")
+
+    requirements = agent_package.resolve_requirements(["google.adk.agents", "numpy", "dotenv"])
+
+    assert requirements == [
+        "google-adk==9.9.9",
+        "google-cloud-aiplatform[adk,agent-engines]==9.9.9",
+        "numpy==9.9.9",
+    ]
+
+
+def test_without_a_local_install_the_pyproject_floor_is_used(monkeypatch, tmp_path):
+    pyproject = tmp_path / "pyproject.toml"
+    pyproject.write_text(
+        '[project]\nname = "rag"\ndependencies = [\n'
+        '    "google-cloud-aiplatform[adk,agent-engines]>=1.110.0",\n'
+        '    "Google_ADK>=1.10.0",\n'
+        ']\n'
+    )
+    monkeypatch.setattr(agent_package.importlib.metadata, "version", not_installed)
+
+    assert agent_package.resolve_requirements(["numpy"], pyproject_path=str(pyproject)) == [
+        "Google_ADK>=1.10.0",
+        "google-cloud-aiplatform[adk,agent-engines]>=1.110.0",
+        "numpy",
+    ]
+
+
+def test_import_env_is_rebuilt_only_when_the_requirements_change(monkeypatch, tmp_path):
+    commands = []
+    monkeypatch.setattr(agent_package.subprocess, "run", lambda command, check: commands.append(command))
+    env_dir = str(tmp_path / "import_env")
+
+    python = agent_package.import_env(["google-adk==1.10.0"], env_dir=env_dir)
+    assert python == os.path.join(env_dir, "bin", "python")
+    assert [command[1:3] for command in commands] == [["-m", "venv"], ["-m", "pip"]]
+
+    agent_package.import_env(["google-adk==1.10.0"], env_dir=env_dir)
+    assert len(commands) == 2
+
+    agent_package.import_env(["google-adk==1.11.0"], env_dir=env_dir)
+    assert len(commands) == 4
@@ -0,0 +1,54 @@
+import threading
+from types import SimpleNamespace
+
+from google.adk.models import LlmRequest
+from google.genai import types
+
+from ai_agent.context_cache import StaticPrefixCache
+
+
+class BlockingCaches:
+    """caches.create that waits for `release`, counting the calls."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.created = 0
+
+    def create(self, model, config):
+        self.created += 1
+        self.started.set()
+        assert self.release.wait(timeout=5)
+        return SimpleNamespace(name=f"cachedContents/{self.created}")
+
+
+def request():
+    return LlmRequest(
+        model="gemini-2.5-flash",
+        config=types.GenerateContentConfig(system_instruction="Answer from the documents."),
+    )
+
+
+def test_one_request_creates_the_cache_while_the_others_send_the_full_prefix():
+    caches = BlockingCaches()
+    prefix_cache = StaticPrefixCache(min_tokens=0, client=SimpleNamespace(caches=caches))
+    first = request()
+    creating = threading.Thread(target=prefix_cache, args=(None, first))
+    creating.start()
+    assert caches.started.wait(timeout=5)
+
+    # Neither blocked on the lock nor a second create
+    meanwhile = request()
+    prefix_cache(None, meanwhile)
+    assert meanwhile.config.cached_content is None
+    assert meanwhile.config.system_instruction == "Answer from the documents."
+
+    caches.release.set()
+    creating.join(timeout=5)
+    assert first.config.cached_content == "cachedContents/1"
+
+    later = request()
+    prefix_cache(None, later)
+    assert later.config.cached_content == "cachedContents/1"
+    assert later.config.system_instruction is None
+    assert caches.created == 1
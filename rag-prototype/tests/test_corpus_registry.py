@@ -0,0 +1,62 @@
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend-automation"))
+
+from corpus_registry import CorpusRegistry
+
+
+def rag_corpus(display_name):
+    return SimpleNamespace(
+        display_name=display_name,
+        name=f"projects/p/locations/l/ragCorpora/{display_name}",
+        description="",
+    )
+
+
+class FakeRagClient:
+    """list_rag_corpora over one page of corpora; counts the list calls."""
+
+    def __init__(self, *display_names):
+        self.corpora = [rag_corpus(name) for name in display_names]
+        self.walks = 0
+
+    def list_rag_corpora(self, request):
+        self.walks += 1
+        return SimpleNamespace(pages=iter([SimpleNamespace(rag_corpora=list(self.corpora))]))
+
+
+def registry(tmp_path, client, **kwargs):
+    return CorpusRegistry("p", "l", path=str(tmp_path / "registry.json"), client=client, **kwargs)
+
+
+def test_lookups_are_served_from_the_index(tmp_path):
+    client = FakeRagClient("finance")
+    corpora = registry(tmp_path, client)
+
+    assert corpora.get("finance").name.endswith("/finance")
+    assert corpora.get("finance").name.endswith("/finance")
+    assert client.walks == 1
+
+
+def test_a_corpus_created_after_a_miss_is_found_once_the_miss_expires(tmp_path):
+    client = FakeRagClient("finance")
+    corpora = registry(tmp_path, client, miss_ttl_seconds=0)
+
+    assert corpora.get("legal") is None
+    client.corpora.append(rag_corpus("legal"))
+
+    assert corpora.get("legal").name.endswith("/legal")
+
+
+def test_misses_are_cached_for_the_miss_ttl_only(tmp_path):
+    client = FakeRagClient("finance")
+    corpora = registry(tmp_path, client, miss_ttl_seconds=3600)
+
+    assert corpora.get("legal") is None
+    assert corpora.get("legal") is None
+    assert client.walks == 1
+
+    corpora.add("legal", "projects/p/locations/l/ragCorpora/legal")
+    assert corpora.get("legal") is not None
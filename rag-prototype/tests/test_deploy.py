@@ -0,0 +1,199 @@
+import importlib.util
+import json
+import os
+
+import pytest
+
+DEPLOY_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ai_agent", "vertex_engine_deploy", "deploy.py")
+
+# deploy.py is a script, not part of the ai_agent package
+_spec = importlib.util.spec_from_file_location("deploy", DEPLOY_PATH)
+deploy = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(deploy)
+
+RESOURCE_NAME = "projects/1/locations/us-central1/reasoningEngines/42"
+
+
+class FakeRemoteApp:
+    resource_name = RESOURCE_NAME
+
+    def __init__(self):
+        self.deleted = None
+
+    def stream_query(self, user_id, message):
+        yield {"content": {"parts": [{"text": "ok"}]}}
+
+    def delete(self, force=False):
+        self.deleted = {"force": force}
+
+
+class FakeClient:
+    """Stands in for vertexai.agent_engines."""
+
+    def __init__(self):
+        self.kwargs = []
+        self.created = []
+
+    def create(self, app, **kwargs):
+        self.kwargs.append(kwargs)
+        self.created.append(FakeRemoteApp())
+        return self.created[-1]
+
+
+def latency_schedule(monkeypatch, round_latencies, measured_ms):
+    """timed_query returns `count` times each (latency, count), then measured_ms."""
+    calls = []
+    queue = [latency for latency, count in round_latencies for _ in range(count)]
+
+    def timed_query(remote_app, message):
+        calls.append(message)
+        return queue.pop(0) if queue else measured_ms
+
+    monkeypatch.setattr(deploy, "timed_query", timed_query)
+    return calls
+
+
+@pytest.fixture
+def deploy_env(tmp_path, monkeypatch):
+    """A temporary .env and a packaging step that stages nothing."""
+    env_file = tmp_path / ".env"
+    env_file.write_text("AGENT_ENGINE_ID='projects/1/locations/us-central1/reasoningEngines/old'\n")
+    monkeypatch.setattr(deploy, "ENV_FILE_PATH", str(env_file))
+    monkeypatch.setenv("AGENT_ENGINE_ID", "unchanged")
+    monkeypatch.setattr(deploy, "build_package", lambda measure, local_env: {"requirements": ["google-adk"], "staged_dir": str(tmp_path)})
+    monkeypatch.setattr(deploy, "print_report", lambda package: None)
+    monkeypatch.setattr(deploy, "write_report", lambda package: None)
+    return env_file
+
+
+def write_profiles(tmp_path, **warmup):
+    path = tmp_path / "profiles.json"
+    path.write_text(json.dumps({
+        "test": {
+            "min_instances": 1,
+            "max_instances": 2,
+            "warmup": {"concurrency": 1, "queries_per_round": 2, "max_rounds": 3, "measure_queries": 4, **warmup},
+        },
+    }))
+    return str(path)
+
+
+# --- Profile validation ---
+
+def test_shipped_profiles_are_valid():
+    with open(deploy.PROFILES_FILE_PATH) as f:
+        names = list(json.load(f))
+    for name in names:
+        profile = deploy.load_profile(name)
+        assert profile.deploy_kwargs()["resource_limits"]["cpu"] in deploy.CPU_VALUES
+
+
+def test_min_instances_above_max_instances_is_rejected():
+    with pytest.raises(ValueError, match="above max_instances"):
+        deploy.PerformanceProfile(name="bad", min_instances=5, max_instances=2)
+
+
+@pytest.mark.parametrize("settings, message", [
+    ({"min_instances": -1}, "min_instances"),
+    ({"min_instances": deploy.MAX_MIN_INSTANCES + 1, "max_instances": 100}, "min_instances"),
+    ({"max_instances": 0, "min_instances": 0}, "max_instances"),
+    ({"max_instances": deploy.MAX_MAX_INSTANCES + 1}, "max_instances"),
+    ({"container_concurrency": 0}, "container_concurrency"),
+    ({"cpu": "3"}, "cpu"),
+    ({"memory": "64Gi"}, "memory"),
+    ({"memory": "512Mi"}, "memory"),
+    ({"warmup": {"concurrency": 0}}, "warmup"),
+])
+def test_out_of_range_settings_are_rejected(settings, message):
+    with pytest.raises(ValueError, match=message):
+        deploy.PerformanceProfile(name="bad", **settings)
+
+
+def test_unknown_profile_names_the_available_ones(tmp_path):
+    with pytest.raises(ValueError, match="'test'"):
+        deploy.load_profile("missing", write_profiles(tmp_path))
+
+
+# --- Warm-up ---
+
+def test_warm_up_stops_once_the_round_p50_settles(monkeypatch):
+    calls = latency_schedule(monkeypatch, [(3000, 2), (1000, 2), (950, 2), (900, 2)], measured_ms=900)
+    settings = deploy.WarmupSettings(concurrency=1, queries_per_round=2, max_rounds=6, settle_tolerance=0.1, measure_queries=4)
+
+    summary = deploy.warm_up(FakeRemoteApp(), settings)
+
+    assert summary["settled"]
+    assert summary["round_p50_ms"] == [3000, 1000, 950]
+    assert summary["rounds"] == 3
+    assert len(calls) == 3 * 2 + 4
+    assert summary["p95_ms"] == 900
+
+
+def test_warm_up_gives_up_after_max_rounds(monkeypatch):
+    latency_schedule(monkeypatch, [(4000, 2), (2000, 2), (1000, 2)], measured_ms=500)
+    settings = deploy.WarmupSettings(concurrency=1, queries_per_round=2, max_rounds=3, settle_tolerance=0.1, measure_queries=2)
+
+    summary = deploy.warm_up(FakeRemoteApp(), settings)
+
+    assert not summary["settled"]
+    assert summary["rounds"] == 3
+
+
+def test_failed_queries_fail_the_warm_up_check(monkeypatch):
+    latency_schedule(monkeypatch, [], measured_ms=None)
+    summary = deploy.warm_up(FakeRemoteApp(), deploy.WarmupSettings(concurrency=1, max_rounds=1, measure_queries=3))
+
+    assert summary["errors"] == 3
+    assert deploy.check_warmup(summary) == ["3 of 3 measured queries failed"]
+
+
+# --- Deploy with a fake client ---
+
+def test_deploy_passes_the_profile_and_updates_env(tmp_path, monkeypatch, deploy_env):
+    latency_schedule(monkeypatch, [], measured_ms=100)
+    client = FakeClient()
+
+    remote_app = deploy.main(
+        ["--profile", "test", "--profiles-file", write_profiles(tmp_path, p95_budget_ms=1000), "--skip-import-check"],
+        client=client,
+        app=object(),
+    )
+
+    assert client.kwargs[0]["min_instances"] == 1
+    assert client.kwargs[0]["max_instances"] == 2
+    assert remote_app.deleted is None
+    assert RESOURCE_NAME in deploy_env.read_text()
+
+
+def test_p95_over_budget_deletes_the_engine_and_leaves_env_untouched(tmp_path, monkeypatch, deploy_env):
+    latency_schedule(monkeypatch, [], measured_ms=5000)
+    before = deploy_env.read_text()
+    client = FakeClient()
+
+    with pytest.raises(SystemExit) as exited:
+        deploy.main(
+            ["--profile", "test", "--profiles-file", write_profiles(tmp_path, p95_budget_ms=1000), "--skip-import-check"],
+            client=client,
+            app=object(),
+        )
+
+    assert exited.value.code == 1
+    assert client.created[0].deleted == {"force": True}
+    assert deploy_env.read_text() == before
+
+
+def test_keep_failed_keeps_the_engine(tmp_path, monkeypatch, deploy_env):
+    latency_schedule(monkeypatch, [], measured_ms=5000)
+    before = deploy_env.read_text()
+    client = FakeClient()
+
+    with pytest.raises(SystemExit):
+        deploy.main(
+            ["--profile", "test", "--profiles-file", write_profiles(tmp_path, p95_budget_ms=1000),
+             "--skip-import-check", "--keep-failed"],
+            client=client,
+            app=object(),
+        )
+
+    assert client.created[0].deleted is None
+    assert deploy_env.read_text() == before
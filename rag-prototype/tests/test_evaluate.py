@@ -0,0 +1,122 @@
+import importlib.util
+import os
+from types import SimpleNamespace
+
+import pytest
+from google.adk.events import Event
+from google.genai import types
+from vertexai.agent_engines._utils import dump_event_for_json
+
+EVALUATE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ai_agent", "vertex_engine_deploy", "evaluate.py")
+
+# evaluate.py is a script, not part of the ai_agent package
+_spec = importlib.util.spec_from_file_location("evaluate", EVALUATE_PATH)
+evaluate = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(evaluate)
+
+
+def text_event(text, **extra):
+    return {"author": "ask_rag_agent", "content": {"role": "model", "parts": [{"text": text}]}, **extra}
+
+
+def tool_call_events():
+    return [
+        (900.0, {"content": {"role": "model", "parts": [{"functionCall": {"name": "retrieve_rag_documentation"}}]}}),
+        (1200.0, {"content": {"role": "user", "parts": [{"functionResponse": {"name": "retrieve_rag_documentation"}}]}}),
+        (3000.0, text_event("answer", usageMetadata={"promptTokenCount": 1500, "candidatesTokenCount": 200})),
+    ]
+
+
+def routed_events(retrieval_ms=400.0):
+    delta = {evaluate.ROUTED_RETRIEVAL_KEY: {"retrieval_ms": retrieval_ms, "chunks": 5}}
+    return [(2500.0, text_event("answer", actions={"stateDelta": delta}))]
+
+
+def test_tool_call_phases():
+    phases = evaluate.attribute_phases(tool_call_events())
+
+    assert phases["planning_ms"] == 900
+    assert phases["retrieval_ms"] == 300
+    assert phases["generation_ms"] == 1800
+    assert phases["ttft_ms"] == 3000
+    assert phases["tool_calls"] == 1
+    assert phases["routed_retrievals"] == 0
+    assert phases["tokens"]["prompt"] == 1500
+
+
+def test_routed_retrieval_is_attributed_to_retrieval():
+    phases = evaluate.attribute_phases(routed_events(retrieval_ms=400))
+
+    assert phases["planning_ms"] == 0
+    assert phases["retrieval_ms"] == 400
+    assert phases["generation_ms"] == 2100
+    assert phases["total_ms"] == 2500
+    assert phases["tool_calls"] == 0
+    assert phases["routed_retrievals"] == 1
+
+
+def test_snake_case_state_delta_is_read():
+    events = [(1000.0, text_event("answer", actions={"state_delta": {evaluate.ROUTED_RETRIEVAL_KEY: {"retrieval_ms": 250}}}))]
+
+    assert evaluate.attribute_phases(events)["retrieval_ms"] == 250
+
+
+def test_deployed_events_with_snake_case_parts():
+    def deployed(part, role="model", **fields):
+        event = Event(author="ask_rag_agent", content=types.Content(role=role, parts=[part]), **fields)
+        return dump_event_for_json(event)
+
+    events = [
+        (900.0, deployed(types.Part(function_call=types.FunctionCall(name="retrieve_rag_documentation")))),
+        (1200.0, deployed(types.Part(function_response=types.FunctionResponse(name="retrieve_rag_documentation", response={})), role="user")),
+        (3000.0, deployed(types.Part(text="answer"), usage_metadata=types.GenerateContentResponseUsageMetadata(prompt_token_count=1500))),
+    ]
+    assert "function_call" in events[0][1]["content"]["parts"][0]
+
+    phases = evaluate.attribute_phases(events)
+
+    assert phases["tool_calls"] == 1
+    assert phases["planning_ms"] == 900
+    assert phases["retrieval_ms"] == 300
+    assert phases["generation_ms"] == 1800
+    assert phases["tokens"]["prompt"] == 1500
+
+
+def test_report_percentiles_include_routed_retrieval_but_not_small_talk():
+    results = [
+        {"query": "tool", **evaluate.attribute_phases(tool_call_events())},
+        {"query": "routed", **evaluate.attribute_phases(routed_events(retrieval_ms=400))},
+        {"query": "small talk", **evaluate.attribute_phases([(50.0, text_event("Hello!"))])},
+    ]
+
+    report = evaluate.build_report(results, wall_seconds=1.0, args=SimpleNamespace(concurrency=1, fake="trace.jsonl"))
+
+    # Retrieval: the tool call (300 ms) and the routed query (400 ms)
+    assert report["phases"]["retrieval_ms"]["p50"] == 300
+    assert report["phases"]["retrieval_ms"]["p99"] == 400
+    # Planning only from the model-planned tool call
+    assert report["phases"]["planning_ms"]["p50"] == 900
+    assert report["phases"]["total_ms"]["p50"] == 2500
+    assert report["routed_retrievals"] == 1
+    assert report["tool_calls"] == 1
+
+
+def test_failed_session_creation_is_recorded_as_errors():
+    class NoSessions:
+        def create_session(self, user_id):
+            raise ConnectionError("session service unavailable")
+
+    results = evaluate.run_session(NoSessions(), ["first", "second"])
+
+    assert [r["query"] for r in results] == ["first", "second"]
+    assert all("session service unavailable" in r["error"] for r in results)
+    report = evaluate.build_report(results, wall_seconds=1.0, args=SimpleNamespace(concurrency=1, fake=None))
+    assert report["errors"] == 2
+
+
+@pytest.mark.parametrize("phase", ["planning_ms", "retrieval_ms"])
+def test_small_talk_has_no_retrieval_phases(phase):
+    result = evaluate.attribute_phases([(50.0, text_event("Hello!"))])
+
+    assert not evaluate.has_phase(result, phase)
+    assert evaluate.has_phase(result, "total_ms")
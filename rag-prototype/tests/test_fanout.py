@@ -0,0 +1,54 @@
+import threading
+
+import pytest
+
+from ai_agent.fanout import (
+    CorpusShard,
+    FanoutRetriever,
+    merge_by_distance,
+    merge_by_rank,
+)
+from ai_agent.retrieval import RetrievedChunk
+
+
+def chunk(text, distance, source="gs://b/doc.pdf"):
+    return RetrievedChunk(text=text, source_uri=source, distance=distance)
+
+
+def test_a_single_slow_shard_still_times_out():
+    release = threading.Event()
+
+    def slow_retriever(corpus):
+        def retrieve(query, top_k, threshold):
+            release.wait(timeout=5)
+            return [chunk("late", 0.1)]
+        return retrieve
+
+    fanout = FanoutRetriever([CorpusShard("corpora/1")], slow_retriever, timeout_seconds=0.05)
+    try:
+        with pytest.raises(TimeoutError):
+            fanout("query", 5, 0.6)
+    finally:
+        release.set()
+
+
+def test_a_single_shard_is_tagged_with_its_name():
+    fanout = FanoutRetriever([CorpusShard("corpora/1", name="2024")], lambda corpus: lambda q, k, t: [chunk("a", 0.1)])
+
+    assert [c.corpus for c in fanout("query", 5, 0.6)] == ["2024"]
+
+
+def test_distance_merge_keeps_the_closest_copy_of_a_duplicate():
+    merged = merge_by_distance([[chunk("a", 0.3), chunk("b", 0.4)], [chunk("a", 0.2)]], top_k=5)
+
+    assert [(c.text, c.distance) for c in merged] == [("a", 0.2), ("b", 0.4)]
+
+
+def test_rank_merge_sums_the_scores_of_a_duplicate():
+    shard_1 = [chunk("x", 0.1, source="gs://b/one.pdf"), chunk("shared", 0.5)]
+    shard_2 = [chunk("y", 0.1, source="gs://b/two.pdf"), chunk("shared", 0.6)]
+
+    merged = merge_by_rank([shard_1, shard_2], top_k=5)
+
+    assert [c.text for c in merged] == ["shared", "x", "y"]
+    assert merged[0].distance == 0.5
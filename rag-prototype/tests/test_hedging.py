@@ -0,0 +1,131 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "frontend-ui"))
+
+from hedging import FirstEventLatency, HedgedStreamer
+
+
+class FakeEngine:
+    """stream_query that waits `first_event_s`, then yields `events` events (or raises `error`)."""
+
+    def __init__(self, name, first_event_s=0.0, events=2, error=None):
+        self.name = name
+        self.first_event_s = first_event_s
+        self.events = events
+        self.error = error
+        self.calls = 0
+        self.closed = threading.Event()
+
+    def stream_query(self, user_id, message):
+        self.calls += 1
+        return self._stream(message)
+
+    def _stream(self, message):
+        try:
+            time.sleep(self.first_event_s)
+            if self.error is not None:
+                raise self.error
+            for i in range(self.events):
+                yield {"author": self.name, "content": {"parts": [{"text": f"{message} {i}"}]}}
+        finally:
+            self.closed.set()
+
+
+def streamer(*engines, hedge_after_ms=50, timeout_s=5.0):
+    # Below min_samples the hedge delay is default_ms
+    latency = FirstEventLatency(min_samples=1000, default_ms=hedge_after_ms)
+    return HedgedStreamer(
+        [(engine.name, engine) for engine in engines],
+        latency=latency,
+        first_event_timeout_seconds=timeout_s,
+        log_every=0,
+    )
+
+
+def authors(events):
+    return {event["author"] for event in events}
+
+
+def test_fast_primary_is_not_hedged():
+    primary, secondary = FakeEngine("primary"), FakeEngine("secondary")
+    hedged = streamer(primary, secondary)
+
+    events = list(hedged.stream("q", user_id="u"))
+
+    assert authors(events) == {"primary"}
+    assert len(events) == 2
+    assert secondary.calls == 0
+    assert hedged.stats()["hedged"] == 0
+
+
+def test_hedge_fires_after_the_delay_and_the_first_event_wins():
+    primary, secondary = FakeEngine("primary", first_event_s=1.0), FakeEngine("secondary")
+    hedged = streamer(primary, secondary, hedge_after_ms=50)
+
+    start = time.perf_counter()
+    stream = hedged.stream("q", user_id="u")
+    first = next(stream)
+    elapsed = time.perf_counter() - start
+    events = [first, *stream]
+
+    assert 0.05 <= elapsed < 1.0
+    assert secondary.calls == 1
+    assert authors(events) == {"secondary"}
+    stats = hedged.stats()
+    assert stats["hedged"] == 1
+    assert stats["wins"] == {"secondary": 1}
+    assert stats["hedge_win_rate"] == 1.0
+
+
+def test_losing_stream_is_closed():
+    primary, secondary = FakeEngine("primary", first_event_s=0.3), FakeEngine("secondary")
+    hedged = streamer(primary, secondary, hedge_after_ms=20)
+
+    assert authors(hedged.stream("q", user_id="u")) == {"secondary"}
+
+    # The loser notices the cancel at its first event and closes its stream
+    assert primary.closed.wait(timeout=2)
+
+
+def test_primary_error_fails_over_without_waiting_for_the_hedge_delay():
+    primary = FakeEngine("primary", error=ConnectionError("primary unavailable"))
+    secondary = FakeEngine("secondary")
+    hedged = streamer(primary, secondary, hedge_after_ms=5000)
+
+    start = time.perf_counter()
+    events = list(hedged.stream("q", user_id="u"))
+
+    assert time.perf_counter() - start < 1.0
+    assert authors(events) == {"secondary"}
+    assert hedged.stats()["failovers"] == 1
+    assert hedged.stats()["hedged"] == 0
+
+
+def test_all_engines_failing_raises_the_last_error():
+    primary = FakeEngine("primary", error=ConnectionError("primary unavailable"))
+    secondary = FakeEngine("secondary", error=ConnectionError("secondary unavailable"))
+    hedged = streamer(primary, secondary)
+
+    with pytest.raises(ConnectionError, match="secondary unavailable"):
+        list(hedged.stream("q", user_id="u"))
+
+
+def test_no_first_event_before_the_deadline_times_out():
+    hedged = streamer(FakeEngine("primary", first_event_s=1.0), timeout_s=0.1)
+
+    with pytest.raises(TimeoutError, match="primary"):
+        list(hedged.stream("q", user_id="u"))
+
+
+def test_hedge_delay_follows_the_observed_latency():
+    latency = FirstEventLatency(min_samples=3, default_ms=5000)
+    assert latency.percentile(95) == 5000
+    for sample in (100, 200, 300, 400):
+        latency.record(sample)
+    assert latency.percentile(95) == 400
+    assert latency.percentile(50) == 200
@@ -0,0 +1,100 @@
+import base64
+import os
+import sys
+
+import google_crc32c
+import pytest
+from google.api_core.exceptions import NotFound
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data-load-to-corpus"))
+
+import parallel_upload
+from parallel_upload import PARTS_PREFIX, file_crc32c, parallel_upload_to_gcs
+
+
+class FakeBlob:
+    def __init__(self, bucket, name):
+        self.bucket = bucket
+        self.name = name
+        self.crc32c = None
+
+    def upload_from_file(self, f, size, checksum):
+        self.bucket.objects[self.name] = f.read(size)
+
+    def compose(self, sources):
+        assert len(sources) <= parallel_upload.MAX_COMPOSE_COMPONENTS
+        self.bucket.compose_calls.append(len(sources))
+        self.bucket.objects[self.name] = b"".join(self.bucket.objects[source.name] for source in sources)
+
+    def reload(self):
+        data = self.bucket.corrupt(self.bucket.objects[self.name])
+        self.crc32c = base64.b64encode(google_crc32c.Checksum(data).digest()).decode("utf-8")
+
+    def delete(self):
+        if self.bucket.objects.pop(self.name, None) is None:
+            raise NotFound(self.name)
+
+
+class FakeBucket:
+    """In-memory bucket; `corrupt` alters what reload() checksums."""
+
+    name = "bucket"
+
+    def __init__(self, corrupt=lambda data: data):
+        self.objects = {}
+        self.compose_calls = []
+        self.corrupt = corrupt
+
+    def blob(self, name):
+        return FakeBlob(self, name)
+
+
+@pytest.fixture
+def source_file(tmp_path):
+    path = tmp_path / "doc.pdf"
+    path.write_bytes(os.urandom(100 * 1024 + 7))
+    return str(path)
+
+
+def test_parts_are_composed_in_order_and_cleaned_up(source_file):
+    bucket = FakeBucket()
+
+    # 10 KiB parts: 11 parts, one compose
+    destination = parallel_upload_to_gcs(bucket, source_file, "docs/doc.pdf", part_size_mb=10 / 1024, concurrency=4)
+
+    with open(source_file, "rb") as f:
+        assert bucket.objects["docs/doc.pdf"] == f.read()
+    assert destination.crc32c == file_crc32c(source_file)
+    assert bucket.compose_calls == [11]
+    assert list(bucket.objects) == ["docs/doc.pdf"]
+
+
+def test_more_than_32_parts_are_composed_in_rounds(source_file):
+    bucket = FakeBucket()
+
+    # 1 KiB parts: 101 parts -> 4 intermediates -> destination
+    parallel_upload_to_gcs(bucket, source_file, "docs/doc.pdf", part_size_mb=1 / 1024, concurrency=8)
+
+    with open(source_file, "rb") as f:
+        assert bucket.objects["docs/doc.pdf"] == f.read()
+    assert bucket.compose_calls == [32, 32, 32, 5, 4]
+    assert not any(name.startswith(PARTS_PREFIX) for name in bucket.objects)
+
+
+def test_checksum_mismatch_deletes_the_object(source_file):
+    bucket = FakeBucket(corrupt=lambda data: data[:-1] + b"x")
+
+    with pytest.raises(ValueError, match="Checksum mismatch"):
+        parallel_upload_to_gcs(bucket, source_file, "docs/doc.pdf", part_size_mb=10 / 1024)
+
+    assert bucket.objects == {}
+
+
+def test_empty_file_uploads_as_one_empty_part(tmp_path):
+    path = tmp_path / "empty.pdf"
+    path.write_bytes(b"")
+    bucket = FakeBucket()
+
+    parallel_upload_to_gcs(bucket, str(path), "docs/empty.pdf")
+
+    assert bucket.objects == {"docs/empty.pdf": b""}
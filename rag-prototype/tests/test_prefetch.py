@@ -0,0 +1,87 @@
+import asyncio
+import threading
+
+import pytest
+
+from ai_agent.prefetch import RetrievalPrefetcher, query_overlap
+
+MESSAGE = "How did Google Cloud operating income change in 2024?"
+
+
+class RecordingSelect:
+    """select(query) that records its queries; blocks until `release` when gated."""
+
+    def __init__(self, gated=False):
+        self.queries = []
+        self.release = threading.Event()
+        if not gated:
+            self.release.set()
+
+    def __call__(self, query):
+        self.queries.append(query)
+        assert self.release.wait(timeout=5)
+        return [f"chunk for {query}"]
+
+
+def test_query_overlap_is_the_share_of_query_words_in_the_message():
+    assert query_overlap(MESSAGE, "Google Cloud operating income") == 1.0
+    assert query_overlap(MESSAGE, "Google Cloud headcount") == pytest.approx(2 / 3)
+    assert query_overlap(MESSAGE, "") == 0.0
+
+
+@pytest.mark.asyncio
+async def test_a_close_tool_query_is_served_from_the_prefetch():
+    select = RecordingSelect()
+    prefetcher = RetrievalPrefetcher(select)
+
+    prefetcher.start("inv-1", MESSAGE)
+    chunks = await prefetcher.take("inv-1", "Google Cloud operating income 2024")
+
+    assert chunks == [f"chunk for {MESSAGE}"]
+    assert select.queries == [MESSAGE]
+    assert prefetcher.stats()["used"] == 1
+    # Taken prefetches are gone
+    assert await prefetcher.take("inv-1", "Google Cloud operating income") is None
+
+
+@pytest.mark.asyncio
+async def test_a_query_below_min_overlap_is_not_served():
+    prefetcher = RetrievalPrefetcher(RecordingSelect(), min_overlap=0.6)
+    prefetcher.start("inv-1", MESSAGE)
+
+    assert await prefetcher.take("inv-1", "segment reporting changes") is None
+    assert await prefetcher.take("other-invocation", "Google Cloud operating income") is None
+    assert prefetcher.stats()["used"] == 0
+
+    prefetcher.discard("inv-1")
+
+
+@pytest.mark.asyncio
+async def test_an_unused_prefetch_is_cancelled_on_discard():
+    select = RecordingSelect(gated=True)
+    prefetcher = RetrievalPrefetcher(select)
+    prefetcher.start("inv-1", MESSAGE)
+    task = prefetcher._pending["inv-1"][1]
+
+    prefetcher.discard("inv-1")
+    select.release.set()
+    await asyncio.sleep(0.05)
+
+    # The retrieval thread may already be running; the task no longer waits for it
+    assert task.cancelled()
+    assert prefetcher.stats()["discarded"] == 1
+    assert await prefetcher.take("inv-1", "Google Cloud operating income") is None
+
+
+@pytest.mark.asyncio
+async def test_the_oldest_prefetches_are_dropped_past_max_pending():
+    prefetcher = RetrievalPrefetcher(RecordingSelect(), max_pending=2)
+
+    for invocation in ("inv-1", "inv-2", "inv-3"):
+        prefetcher.start(invocation, MESSAGE)
+
+    assert list(prefetcher._pending) == ["inv-2", "inv-3"]
+    assert prefetcher.stats() == {"started": 3, "used": 0, "discarded": 1, "use_rate": 0.0}
+    assert await prefetcher.take("inv-1", "Google Cloud operating income") is None
+    assert await prefetcher.take("inv-3", "Google Cloud operating income") is not None
+    prefetcher.discard("inv-2")
@@ -0,0 +1,15 @@
+from google.cloud.aiplatform_v1beta1.types import RagContexts
+
+from ai_agent.retrieval import _context_distance
+
+
+def test_a_zero_score_is_an_exact_match():
+    assert _context_distance(RagContexts.Context(score=0.0, distance=0.4)) == 0.0
+
+
+def test_score_is_preferred_over_the_deprecated_distance():
+    assert _context_distance(RagContexts.Context(score=0.2, distance=0.4)) == 0.2
+
+
+def test_without_a_score_the_distance_is_used():
+    assert _context_distance(RagContexts.Context(distance=0.4)) == 0.4
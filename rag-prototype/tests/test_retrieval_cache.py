@@ -0,0 +1,100 @@
+import threading
+import time
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
+
+from ai_agent.retrieval_cache import (
+    CorpusGeneration,
+    RetrievalCache,
+    vertex_corpus_generation,
+)
+
+CORPUS = "projects/1/locations/us-central1/ragCorpora/2"
+T0 = datetime(2025, 6, 1, tzinfo=UTC)
+
+
+class FakeCorpus:
+    """RAG data client over one corpus whose files can be imported and removed."""
+
+    def __init__(self, files=2):
+        self.files = {f"doc-{i}.pdf": T0 for i in range(files)}
+        self.listed = 0
+
+    def import_file(self, display_name, at):
+        self.files[display_name] = at
+
+    def list_rag_files(self, parent):
+        assert parent == CORPUS
+        self.listed += 1
+        return [SimpleNamespace(display_name=name, update_time=updated) for name, updated in self.files.items()]
+
+
+def test_generation_changes_when_files_are_added_reimported_or_removed():
+    corpus = FakeCorpus()
+    generation = vertex_corpus_generation(CORPUS, client=corpus)
+
+    first = generation()
+    assert generation() == first
+
+    corpus.import_file("doc-2.pdf", T0)
+    added = generation()
+    assert added != first
+
+    corpus.import_file("doc-0.pdf", T0 + timedelta(hours=1))
+    reimported = generation()
+    assert reimported != added
+
+    del corpus.files["doc-1.pdf"]
+    assert generation() != reimported
+
+
+def test_empty_corpus_has_a_generation():
+    assert vertex_corpus_generation(CORPUS, client=FakeCorpus(files=0))() == (0, "None")
+
+
+def test_import_invalidates_cached_results():
+    corpus = FakeCorpus()
+    generation = CorpusGeneration(vertex_corpus_generation(CORPUS, client=corpus), poll_seconds=0)
+    cache = RetrievalCache()
+    cache.put((CORPUS, generation.current(), "query"), ["old chunk"], 100.0)
+
+    assert cache.get((CORPUS, generation.current(), "query")) == ["old chunk"]
+    corpus.import_file("doc-9.pdf", T0 + timedelta(days=1))
+    generation.refresh()
+    assert cache.get((CORPUS, generation.current(), "query")) is None
+
+
+def test_generation_is_polled_at_most_every_poll_seconds():
+    corpus = FakeCorpus()
+    generation = CorpusGeneration(vertex_corpus_generation(CORPUS, client=corpus), poll_seconds=3600)
+
+    for _ in range(5):
+        generation.current()
+
+    assert corpus.listed == 1
+
+
+def test_later_reads_do_not_wait_for_the_corpus_listing():
+    release = threading.Event()
+    calls = []
+
+    def slow_generation():
+        calls.append(threading.current_thread().name)
+        if len(calls) == 1:
+            return "first"
+        release.wait(timeout=5)
+        return "second"
+
+    generation = CorpusGeneration(slow_generation, poll_seconds=0)
+    assert generation.current() == "first"
+
+    # The re-read is blocked, so callers keep the previous marker meanwhile
+    assert generation.current() == "first"
+    assert generation.current() == "first"
+    assert calls[1:] == ["corpus-generation"]
+
+    release.set()
+    deadline = time.monotonic() + 5
+    while generation.current() != "second" and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert generation.current() == "second"
@@ -0,0 +1,27 @@
+import json
+import os
+
+import pytest
+
+from ai_agent.router import CORPUS_QUESTION, GREETING, UNKNOWN, IntentRouter
+
+MESSAGES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "data", "router_messages.jsonl")
+
+with open(MESSAGES_PATH) as f:
+    LABELLED = [json.loads(line) for line in f if line.strip()]
+
+
+@pytest.mark.parametrize("row", LABELLED, ids=[row["message"][:40] for row in LABELLED])
+def test_labelled_messages(row):
+    assert IntentRouter().classify(row["message"]) == row["expected"]
+
+
+@pytest.mark.parametrize("message, intent", [
+    ("how are you doing today my friend", UNKNOWN),
+    ("how are you doing today", GREETING),
+    ("what do you know about", UNKNOWN),
+    ("can you help me", UNKNOWN),
+    ("Compare cloud and advertising margins", CORPUS_QUESTION),
+])
+def test_question_rule_edges(message, intent):
+    assert IntentRouter().classify(message) == intent
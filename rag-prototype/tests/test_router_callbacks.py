@@ -0,0 +1,102 @@
+from types import SimpleNamespace
+
+import pytest
+from google.adk.models import LlmRequest
+from google.genai import types
+
+from ai_agent.retrieval import RetrievedChunk
+from ai_agent.retrieval_tool import CorpusRetrievalTool
+from ai_agent.router import IntentRouter
+from ai_agent.router_callbacks import ROUTED_RETRIEVAL_STATE_KEY, RoutingCallbacks
+
+QUESTION = (
+    "According to the MD&A, how might the increasing proportion of revenues derived from "
+    "non-advertising sources impact the overall operating margin, and why?"
+)
+
+
+def callback_context(message, invocation_id="inv-1"):
+    return SimpleNamespace(
+        invocation_id=invocation_id,
+        state={},
+        user_content=types.Content(role="user", parts=[types.Part(text=message)]),
+    )
+
+
+def routing(chunks):
+    tool = CorpusRetrievalTool(
+        name="retrieve_rag_documentation",
+        description="Retrieves passages.",
+        retriever=lambda query, top_k, threshold: chunks,
+        similarity_top_k=5,
+        vector_distance_threshold=0.6,
+    )
+    return RoutingCallbacks(IntentRouter(), tool), tool
+
+
+async def injected_response(callbacks, context):
+    assert callbacks.before_agent(context) is None
+    request = LlmRequest(contents=[context.user_content])
+    assert await callbacks.before_model(context, request) is None
+    call, response = request.contents[-2:]
+    assert call.parts[0].function_call.args == {"query": QUESTION}
+    return response.parts[0].function_response.response
+
+
+def test_small_talk_is_answered_from_a_template():
+    callbacks, _ = routing([])
+
+    content = callbacks.before_agent(callback_context("thanks!"))
+
+    assert "welcome" in content.parts[0].text
+
+
+@pytest.mark.asyncio
+async def test_corpus_question_gets_retrieval_injected_and_recorded():
+    chunk = RetrievedChunk(text="Cloud margins improved.", source_uri="gs://b/10k.pdf", source_display_name="10k.pdf", distance=0.2)
+    callbacks, tool = routing([chunk])
+    context = callback_context(QUESTION)
+
+    response = await injected_response(callbacks, context)
+
+    assert response == {"result": tool.format_result([chunk])}
+    recorded = context.state[ROUTED_RETRIEVAL_STATE_KEY]
+    assert recorded["chunks"] == 1
+    assert recorded["retrieval_ms"] >= 0
+
+
+@pytest.mark.asyncio
+async def test_empty_injected_retrieval_matches_the_tool_result():
+    callbacks, tool = routing([])
+    context = callback_context(QUESTION)
+
+    response = await injected_response(callbacks, context)
+
+    assert response["result"].startswith("No matching result found")
+    assert response == {"result": tool.format_result([])}
+
+
+@pytest.mark.asyncio
+async def test_later_model_calls_of_the_turn_keep_the_injected_retrieval():
+    chunk = RetrievedChunk(text="Cloud margins improved.", source_uri="gs://b/10k.pdf", distance=0.2)
+    callbacks, tool = routing([chunk])
+    context = callback_context(QUESTION)
+    await injected_response(callbacks, context)
+
+    # The model answered the first call with a tool call of its own
+    own_call = types.Content(role="model", parts=[types.Part(function_call=types.FunctionCall(name="other_tool"))])
+    own_response = types.Content(role="user", parts=[types.Part(function_response=types.FunctionResponse(name="other_tool", response={}))])
+    request = LlmRequest(contents=[context.user_content, own_call, own_response])
+    await callbacks.before_model(context, request)
+
+    assert [content.parts[0].function_call or content.parts[0].function_response for content in request.contents[1:3]] == [
+        types.FunctionCall(name=tool.name, args={"query": QUESTION}),
+        types.FunctionResponse(name=tool.name, response={"result": tool.format_result([chunk])}),
+    ]
+    assert request.contents[3:] == [own_call, own_response]
+
+    # The next turn starts clean
+    callbacks.after_agent(context)
+    request = LlmRequest(contents=[context.user_content])
+    await callbacks.before_model(context, request)
+    assert len(request.contents) == 1
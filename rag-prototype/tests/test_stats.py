@@ -0,0 +1,12 @@
+from ai_agent.stats import percentile
+
+
+def test_nearest_rank_percentile():
+    values = [5, 1, 4, 2, 3]
+    assert percentile(values, 50) == 3
+    assert percentile(values, 95) == 5
+    assert percentile(values, 0) == 1
+
+
+def test_empty_list_is_zero():
+    assert percentile([], 95) == 0.0
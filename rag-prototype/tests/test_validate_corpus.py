@@ -0,0 +1,135 @@
+import json
+import os
+import sys
+import threading
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend-automation"))
+
+from validate_corpus import ErrorWriter, inspect_corpus, iter_rag_files
+
+NOW = datetime(2025, 6, 1, tzinfo=UTC)
+
+
+def rag_file(i, state="ACTIVE", size_bytes=1024, age_days=0.5):
+    return SimpleNamespace(
+        name=f"projects/p/locations/l/ragCorpora/1/ragFiles/{i}",
+        display_name=f"doc-{i}.pdf",
+        size_bytes=size_bytes,
+        create_time=NOW - timedelta(days=age_days),
+        file_status=SimpleNamespace(
+            state=SimpleNamespace(name=state),
+            error_status="Failed to parse document" if state == "ERROR" else "",
+        ),
+    )
+
+
+class FakeRagClient:
+    """list_rag_files over fixed pages; records which pages have been requested."""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.requests = []
+        self.fetched = [threading.Event() for _ in pages]
+
+    def _pages(self):
+        for number, files in enumerate(self.pages):
+            self.fetched[number].set()
+            yield SimpleNamespace(rag_files=files)
+
+    def list_rag_files(self, request):
+        self.requests.append(request)
+        return SimpleNamespace(pages=self._pages())
+
+
+def test_iterates_every_page_in_order():
+    pages = [[rag_file(0), rag_file(1)], [rag_file(2), rag_file(3)], [rag_file(4)]]
+    client = FakeRagClient(pages)
+
+    names = [f.display_name for f in iter_rag_files(client, "corpora/1", page_size=2)]
+
+    assert names == [f"doc-{i}.pdf" for i in range(5)]
+    assert client.requests[0].parent == "corpora/1"
+    assert client.requests[0].page_size == 2
+
+
+def test_next_page_is_fetched_while_the_current_one_is_consumed():
+    client = FakeRagClient([[rag_file(0), rag_file(1)], [rag_file(2)], [rag_file(3)]])
+    files = iter_rag_files(client, "corpora/1")
+
+    next(files)
+
+    # Still on page 1, page 2 is already requested but page 3 is not
+    assert client.fetched[1].wait(timeout=2)
+    assert not client.fetched[2].is_set()
+    assert [f.display_name for f in files] == ["doc-1.pdf", "doc-2.pdf", "doc-3.pdf"]
+
+
+def test_empty_pages_do_not_end_the_iteration():
+    client = FakeRagClient([[rag_file(0)], [], [rag_file(1)]])
+
+    assert [f.display_name for f in iter_rag_files(client, "corpora/1")] == ["doc-0.pdf", "doc-1.pdf"]
+
+
+def test_empty_corpus(capsys):
+    summary = inspect_corpus(FakeRagClient([]), "corpora/empty")
+
+    assert summary.total == 0
+    summary.print()
+    assert "empty" in capsys.readouterr().out
+
+
+def test_summary_counts_status_size_and_age():
+    client = FakeRagClient([
+        [rag_file(0), rag_file(1, size_bytes=5 * 1024 ** 2, age_days=3)],
+        [rag_file(2, state="ERROR", size_bytes=200 * 1024 ** 2, age_days=60)],
+    ])
+
+    summary = inspect_corpus(client, "corpora/1")
+
+    assert summary.total == 3
+    assert summary.total_bytes == 1024 + 5 * 1024 ** 2 + 200 * 1024 ** 2
+    assert summary.by_status == {"ACTIVE": 2, "ERROR": 1}
+    assert summary.by_size == {"<1MB": 1, "1-10MB": 1, ">100MB": 1}
+    # Ages are measured from the current time, so the fixed create times are all old
+    assert summary.by_age == {">30d": 3}
+
+
+def test_status_filter_only_counts_matching_files():
+    client = FakeRagClient([[rag_file(0), rag_file(1, state="ERROR")]])
+
+    summary = inspect_corpus(client, "corpora/1", status_filter={"ERROR"})
+
+    assert summary.total == 1
+    assert summary.by_status == {"ERROR": 1}
+
+
+@pytest.mark.parametrize("output_format", ["ndjson", "json"])
+def test_error_writer_records_errored_files(tmp_path, output_format):
+    path = tmp_path / f"errors.{output_format}"
+    writer = ErrorWriter(str(path), output_format)
+    client = FakeRagClient([[rag_file(0), rag_file(1, state="ERROR")], [rag_file(2, state="ERROR")]])
+
+    inspect_corpus(client, "corpora/1", error_writer=writer)
+    assert writer.close() == 2
+
+    text = path.read_text()
+    records = json.loads(text) if output_format == "json" else [json.loads(line) for line in text.splitlines()]
+    assert [record["display_name"] for record in records] == ["doc-1.pdf", "doc-2.pdf"]
+    assert records[0] == {
+        "corpus": "corpora/1",
+        "name": "projects/p/locations/l/ragCorpora/1/ragFiles/1",
+        "display_name": "doc-1.pdf",
+        "error": "Failed to parse document",
+    }
+
+
+def test_json_error_writer_without_errors_writes_an_empty_array(tmp_path):
+    path = tmp_path / "errors.json"
+    writer = ErrorWriter(str(path), "json")
+
+    assert writer.close() == 0
+    assert json.loads(path.read_text()) == []